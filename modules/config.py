@@ -1,15 +1,15 @@
 """Config class for qBittorrent-Manage"""
 
 import os
-import re
-import stat
 import time
 
 import requests
 from retrying import retry
 
+from modules import fs_watcher
 from modules import util
 from modules.apprise import Apprise
+from modules.core.share_limits import ShareLimitClassifier
 from modules.notifiarr import Notifiarr
 from modules.qbittorrent import Qbt
 from modules.util import YAML
@@ -147,6 +147,7 @@ class Config:
         logger.debug(f"    --port (QBT_PORT): {self.args['port']}")
         logger.debug(f"    --base-url (QBT_BASE_URL): {self.args['base_url']}")
         logger.debug(f"    --host (QBT_HOST): {self.args['host']}")
+        logger.debug(f"    --fs-watcher (QBT_FS_WATCHER): {self.args.get('fs_watcher', False)}")
 
         # Log run commands (which may come from config or env)
         logger.separator(command_source, space=False, border=False, loglevel="DEBUG")
@@ -344,8 +345,20 @@ class Config:
             "rem_unregistered_grace_minutes": self.util.check_for_attribute(
                 self.data, "rem_unregistered_grace_minutes", parent="settings", var_type="int", default=10, min_int=0
             ),
+            "max_concurrent_api_requests": self.util.check_for_attribute(
+                self.data, "max_concurrent_api_requests", parent="settings", var_type="int", default=8, min_int=1
+            ),
+            "max_concurrent_dir_scans": self.util.check_for_attribute(
+                self.data, "max_concurrent_dir_scans", parent="settings", var_type="int", default=8, min_int=1
+            ),
+            "max_concurrent_file_operations": self.util.check_for_attribute(
+                self.data, "max_concurrent_file_operations", parent="settings", var_type="int", default=8, min_int=1
+            ),
         }
+        util.set_io_workers(self.settings["max_concurrent_file_operations"])
 
+        # Directory listings and file stats shared by the commands of this run
+        self.fs_inventory = util.FileSystemInventory(self.settings["max_concurrent_dir_scans"])
         self.tracker_error_tag = self.settings["tracker_error_tag"]
         self.nohardlinks_tag = self.settings["nohardlinks_tag"]
         self.stalled_tag = self.settings["stalled_tag"]
@@ -844,6 +857,7 @@ class Config:
                 raise Failed(err)
 
         logger.trace(f"Share_limits config: {self.share_limits}")
+        self.share_limits_classifier = ShareLimitClassifier(self.share_limits) if self.share_limits is not None else None
 
     def processs_config_recyclebin(self):
         """
@@ -903,6 +917,10 @@ class Config:
                     )
             if not self.remote_dir:
                 self.remote_dir = self.root_dir
+            # The watcher lives in the process running the scheduled runs, runs requested through the web API
+            # (a separate process) walk the directories instead of starting a second watcher
+            if self.args.get("fs_watcher") and not self.web_api_enabled and self.remote_dir and os.path.isdir(self.remote_dir):
+                self.fs_inventory.watcher = fs_watcher.get_watcher(self.remote_dir, self.settings["max_concurrent_dir_scans"])
             if self.commands["rem_orphaned"]:
                 if "orphaned_dir" in self.data["directory"] and self.data["directory"]["orphaned_dir"] is not None:
                     default_orphaned = os.path.join(
@@ -968,6 +986,8 @@ class Config:
             default=50,
             min_int=-1,
         )
+        # Files of torrents deleted during this run, excluded since deleting files can be slow in certain environments
+        self.orphaned["exclude_files"] = set()
         self.orphaned["min_file_age_minutes"] = self.util.check_for_attribute(
             self.data,
             "min_file_age_minutes",
@@ -1019,6 +1039,7 @@ class Config:
     def cleanup_dirs(self, location):
         num_del = 0
         files = []
+        deleted_files = []  # full paths of the deleted files
         size_bytes = 0
         skip = self.commands["skip_cleanup"]
         if location == "Recycle Bin":
@@ -1056,87 +1077,74 @@ class Config:
                         location_path_list = [location_path]
                 else:
                     location_path_list = [location_path]
-                location_files = []
+                # Files found in each location, mapped to the location they were found in
+                location_files = {}
                 for r_path in location_path_list:
+                    folder = r_path.rstrip(os.sep)
                     try:
-                        for path, subdirs, files in os.walk(r_path):
-                            for name in files:
-                                location_files.append(os.path.join(path, name))
+                        for path, names in self.fs_inventory.walk(r_path):
+                            for name in names:
+                                location_files.setdefault(os.path.join(path, name), folder)
                     except PermissionError as e:
                         logger.warning(f"Permission denied accessing directory {r_path}: {e}. Skipping this directory.")
                         continue
                     except OSError as e:
                         logger.warning(f"Error accessing directory {r_path}: {e}. Skipping this directory.")
                         continue
-                location_files = list(set(location_files))  # remove duplicates
-                location_files = sorted(location_files)
-                logger.trace(f"location_files: {location_files}")
-                if location_files:
+                sorted_files = sorted(location_files)
+                logger.trace(f"location_files: {sorted_files}")
+                if sorted_files:
                     body = []
                     logger.separator(f"Emptying {location} (Files > {empty_after_x_days} days)", space=True, border=True)
+                    now = time.time()  # in seconds
+                    results = util.map_concurrently(
+                        lambda file: self.expire_file(file, empty_after_x_days, now), sorted_files, self.fs_inventory.workers
+                    )
                     prevfolder = ""
-                    for file in location_files:
-                        folder = re.search(f".*{os.path.basename(location_path.rstrip(os.sep))}", file).group(0)
+                    for file, (file_stat, days, error) in zip(sorted_files, results):
+                        folder = location_files[file]
                         if folder != prevfolder:
                             body += logger.separator(f"Searching: {folder}", space=False, border=False)
-                        try:
-                            fileStats = os.stat(file)
-                            filename = os.path.basename(file)
-                            # in seconds (last modified time)
-                            last_modified = fileStats[stat.ST_MTIME]
-                        except FileNotFoundError:
-                            ex = logger.print_line(
-                                f"{location} Warning - FileNotFound: No such file or directory: {file} ", "WARNING"
-                            )
-                            self.notify(ex, "Cleanup Dirs", False)
+                            prevfolder = folder
+                        filename = os.path.basename(file)
+                        if file_stat is None:
+                            if isinstance(error, FileNotFoundError):
+                                ex = logger.print_line(
+                                    f"{location} Warning - FileNotFound: No such file or directory: {file} ", "WARNING"
+                                )
+                                self.notify(ex, "Cleanup Dirs", False)
+                            elif isinstance(error, PermissionError):
+                                logger.warning(f"Permission denied accessing file stats for {file}: {error}")
+                            else:
+                                logger.warning(f"Error accessing file stats for {file}: {error}")
                             continue
-                        except PermissionError as e:
-                            logger.warning(f"Permission denied accessing file stats for {file}: {e}")
+                        if empty_after_x_days > days:
                             continue
-                        except OSError as e:
-                            logger.warning(f"Error accessing file stats for {file}: {e}")
+                        if error is not None:
+                            # Not counted as a deletion since the file could not be deleted
+                            if isinstance(error, PermissionError):
+                                logger.warning(f"Permission denied deleting {file}: {error}. Skipping file.")
+                            else:
+                                logger.warning(f"Error deleting {file}: {error}. Skipping file.")
                             continue
-                        now = time.time()  # in seconds
-                        days = (now - last_modified) / (60 * 60 * 24)
-                        if empty_after_x_days <= days:
-                            num_del += 1
-                            body += logger.print_line(
-                                f"{'Did not delete' if self.dry_run else 'Deleted'} "
-                                f"{filename} from {folder} (Last modified {round(days)} days ago).",
-                                self.loglevel,
-                            )
-                            files += [str(filename)]
-                            try:
-                                size_bytes += os.path.getsize(file)
-                            except (PermissionError, OSError) as e:
-                                logger.warning(f"Could not get size for {file}: {e}")
-                                # Continue without size info
-
-                            if not self.dry_run:
-                                try:
-                                    os.remove(file)
-                                except PermissionError as e:
-                                    logger.warning(f"Permission denied deleting {file}: {e}. Skipping file.")
-                                    # Remove from files list since we couldn't delete it
-                                    if str(filename) in files:
-                                        files.remove(str(filename))
-                                    num_del -= 1  # Don't count this as a successful deletion
-                                    continue
-                                except OSError as e:
-                                    logger.warning(f"Error deleting {file}: {e}. Skipping file.")
-                                    # Remove from files list since we couldn't delete it
-                                    if str(filename) in files:
-                                        files.remove(str(filename))
-                                    num_del -= 1  # Don't count this as a successful deletion
-                                    continue
-                        prevfolder = re.search(f".*{os.path.basename(location_path.rstrip(os.sep))}", file).group(0)
+                        num_del += 1
+                        body += logger.print_line(
+                            f"{'Did not delete' if self.dry_run else 'Deleted'} "
+                            f"{filename} from {folder} (Last modified {round(days)} days ago).",
+                            self.loglevel,
+                        )
+                        files += [str(filename)]
+                        deleted_files.append(file)
+                        size_bytes += file_stat.st_size
                     if num_del > 0:
                         if not self.dry_run:
-                            for path in location_path_list:
-                                if path != location_path:
-                                    util.remove_empty_directories(path, self.qbt.get_category_save_paths())
-                            # Delete empty folders inside the location_path
-                            util.remove_empty_directories(location_path, [location_path])
+                            # Files were deleted, their directories are listed again by the next walk
+                            self.fs_inventory.invalidate(deleted_files)
+                            # Delete empty folders inside every location, keeping the location_path itself
+                            removed = util.remove_empty_directories(
+                                location_path_list, self.qbt.get_category_save_paths() + [location_path]
+                            )
+                            self.fs_inventory.invalidate(removed)
                         body += logger.print_line(
                             f"{'Did not delete' if self.dry_run else 'Deleted'} {num_del} files "
                             f"({util.human_readable_size(size_bytes)}) from the {location}.",
@@ -1156,6 +1164,23 @@ class Config:
                     logger.debug(f'No files found in "{(",".join(location_path_list))}"')
         return num_del
 
+    def expire_file(self, file, empty_after_x_days, now):
+        """
+        Delete a file last modified more than empty_after_x_days ago (unless in dry run).
+        Returns (stat result, age in days, error), the stat result is None if the file could not be stat'ed.
+        """
+        try:
+            file_stat = self.fs_inventory.stat(file)
+        except OSError as e:
+            return None, None, e
+        days = (now - file_stat.st_mtime) / (60 * 60 * 24)
+        if empty_after_x_days <= days and not self.dry_run:
+            try:
+                os.remove(file)
+            except OSError as e:
+                return file_stat, days, e
+        return file_stat, days, None
+
     def send_notifications(self, attr):
         try:
             function = attr["function"]
@@ -1,7 +1,6 @@
 import time
 
 from modules import util
-from modules.qbit_error_handler import handle_qbit_api_errors
 
 logger = util.logger
 
@@ -32,6 +31,7 @@ class Category:
         if not self.cat_update_all and not self.hashes:
             torrent_list_filter["category"] = ""
         torrent_list = self.qbt.get_torrents(torrent_list_filter)
+        self.qbt.prefetch_torrent_trackers(torrent_list)
         for torrent in torrent_list:
             torrent_category = torrent.category
             new_cat = []
@@ -75,6 +75,7 @@ class Category:
                 torrent_list_filter["torrent_hashes"] = self.hashes
 
             torrent_list = self.qbt.get_torrents(torrent_list_filter)
+            self.qbt.prefetch_torrent_trackers(torrent_list)
 
             for torrent in torrent_list:
                 self.update_cat(torrent, updated_cat, True)
@@ -84,41 +85,23 @@ class Category:
         logger.debug(f"Category change command completed in {duration:.2f} seconds")
 
     def get_tracker_cat(self, torrent):
-        tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(torrent.trackers))
+        tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(self.qbt.get_torrent_trackers(torrent)))
         return [tracker["cat"]] if tracker["cat"] else None
 
     def update_cat(self, torrent, new_cat, cat_change):
         """Update category based on the torrent information"""
-        tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(torrent.trackers))
+        tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(self.qbt.get_torrent_trackers(torrent)))
         t_name = torrent.name
         old_cat = torrent.category
         if not self.config.dry_run:
-
-            @handle_qbit_api_errors(context="set_category", retry_attempts=2)
-            def set_category_with_creation():
-                try:
-                    torrent.set_category(category=new_cat)
-                    if (
-                        torrent.auto_tmm is False
-                        and self.config.settings["force_auto_tmm"]
-                        and not any(tag in torrent.tags for tag in self.config.settings.get("force_auto_tmm_ignore_tags", []))
-                    ):
-                        torrent.set_auto_management(True)
-                except Exception as e:
-                    # Check if it's a category creation issue
-                    if "not found" in str(e).lower() or "409" in str(e):
-                        ex = logger.print_line(
-                            f'Existing category "{new_cat}" not found for save path '
-                            f"{torrent.save_path}, category will be created.",
-                            self.config.loglevel,
-                        )
-                        self.config.notify(ex, "Update Category", False)
-                        self.client.torrent_categories.create_category(name=new_cat, save_path=torrent.save_path)
-                        torrent.set_category(category=new_cat)
-                    else:
-                        raise
-
-            set_category_with_creation()
+            # Missing categories are created with the torrent's save path when the queue is flushed
+            self.qbt.write_queue.set_category(torrent, new_cat)
+            if (
+                torrent.auto_tmm is False
+                and self.config.settings["force_auto_tmm"]
+                and not any(tag in torrent.tags for tag in self.config.settings.get("force_auto_tmm_ignore_tags", []))
+            ):
+                self.qbt.write_queue.set_auto_management(torrent, True)
         body = []
         body += logger.print_line(logger.insert_space(f"Torrent Name: {t_name}", 3), self.config.loglevel)
         if cat_change:
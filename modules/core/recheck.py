@@ -37,7 +37,7 @@ class ReCheck:
             torrent_list = self.qbt.get_torrents(torrent_list_filter)
             if torrent_list:
                 for torrent in torrent_list:
-                    tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(torrent.trackers))
+                    tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(self.qbt.get_torrent_trackers(torrent)))
                     t_name = torrent.name
                     t_category = torrent.category
                     # Resume torrent if completed
@@ -61,7 +61,7 @@ class ReCheck:
                             self.torrents_updated_resume.append(t_name)
                             self.notify_attr_resume.append(attr)
                             if not self.config.dry_run:
-                                torrent.resume()
+                                self.qbt.write_queue.resume(torrent)
                         else:
                             # Check to see if torrent meets AutoTorrentManagement criteria
                             logger.debug("DEBUG: Torrent to see if torrent meets AutoTorrentManagement Criteria")
@@ -112,7 +112,7 @@ class ReCheck:
                                 self.torrents_updated_resume.append(t_name)
                                 self.notify_attr_resume.append(attr)
                                 if not self.config.dry_run:
-                                    torrent.resume()
+                                    self.qbt.write_queue.resume(torrent)
                     # Recheck
                     elif (
                         torrent.progress == 0
@@ -137,7 +137,7 @@ class ReCheck:
                         self.torrents_updated_recheck.append(t_name)
                         self.notify_attr_recheck.append(attr)
                         if not self.config.dry_run:
-                            torrent.recheck()
+                            self.qbt.write_queue.recheck(torrent)
 
         end_time = time.time()
         duration = end_time - start_time
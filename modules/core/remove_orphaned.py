@@ -1,9 +1,11 @@
 import os
 import time
 from concurrent.futures import ThreadPoolExecutor
-from fnmatch import fnmatch
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 from modules import util
+from modules.persistent_cache import CACHE_ERRORS
+from modules.persistent_cache import DirectoryIndex
 
 logger = util.logger
 
@@ -18,6 +20,14 @@ class RemoveOrphaned:
         self.remote_dir = qbit_manager.config.remote_dir
         self.root_dir = qbit_manager.config.root_dir
         self.orphaned_dir = qbit_manager.config.orphaned_dir
+        # Exclude patterns and the files of torrents deleted during this run, in root_dir representation
+        self.exclude_matcher = util.ExcludeMatcher(
+            [
+                util.path_replace(exclude_pattern, self.remote_dir, self.root_dir)
+                for exclude_pattern in self.config.orphaned["exclude_patterns"] or []
+            ],
+            self.config.orphaned["exclude_files"],
+        )
 
         # Try to use ThreadPoolExecutor, but fall back to synchronous if thread creation fails
         try:
@@ -47,36 +57,25 @@ class RemoveOrphaned:
         # Fetch torrents and root files (parallel if executor available, synchronous otherwise)
         if self.executor:
             torrent_list_future = self.executor.submit(self.qbt.get_torrents, {"sort": "added_on"})
-            root_files_future = self.executor.submit(util.get_root_files, self.root_dir, self.remote_dir, self.orphaned_dir)
+            root_files_future = self.executor.submit(self.get_root_files)
             torrent_list = torrent_list_future.result()
-            root_files = set(root_files_future.result())
+            root_files = root_files_future.result()
         else:
             torrent_list = self.qbt.get_torrents({"sort": "added_on"})
-            root_files = set(util.get_root_files(self.root_dir, self.remote_dir, self.orphaned_dir))
-
-        # Process torrent files (parallel if executor available, synchronous otherwise)
-        torrent_files = set()
-        if self.executor:
-            for fullpath_list in self.executor.map(self.get_full_path_of_torrent_files, torrent_list):
-                torrent_files.update(fullpath_list)
-        else:
-            for torrent in torrent_list:
-                torrent_files.update(self.get_full_path_of_torrent_files(torrent))
+            root_files = self.get_root_files()
 
-        # Find orphaned files efficiently
-        orphaned_files = root_files - torrent_files
+        orphaned_files = self.find_orphaned_files(torrent_list, root_files)
+        # File lists read from the persistent cache miss files renamed inside a torrent since they were cached,
+        # so the lists of the torrents containing an orphan candidate are fetched again before anything is removed
+        owners = self.get_cached_owners(torrent_list, orphaned_files)
+        if owners and self.qbt.refresh_torrent_files(owners):
+            orphaned_files = self.find_orphaned_files(torrent_list, root_files)
+        del root_files
 
         # Process exclude patterns efficiently
-        if self.config.orphaned["exclude_patterns"]:
+        if self.config.orphaned["exclude_patterns"] or self.config.orphaned["exclude_files"]:
             logger.print_line("Processing orphan exclude patterns")
-            exclude_patterns = [
-                util.path_replace(exclude_pattern, self.remote_dir, self.root_dir)
-                for exclude_pattern in self.config.orphaned["exclude_patterns"]
-            ]
-
-            # Use set comprehension for efficient filtering
-            excluded_files = {file for file in orphaned_files if any(fnmatch(file, pattern) for pattern in exclude_patterns)}
-            orphaned_files -= excluded_files
+            orphaned_files = {file for file in orphaned_files if not self.exclude_matcher.match(file)}
 
         # === AGE PROTECTION: Don't touch files that are "too new" (likely being created/uploaded) ===
         min_file_age_minutes = self.config.orphaned.get("min_file_age_minutes", 0)
@@ -87,7 +86,7 @@ class RemoveOrphaned:
 
             def check_file_age(file):
                 try:
-                    file_mtime = os.path.getmtime(file)
+                    file_mtime = self.config.fs_inventory.stat(util.path_replace(file, self.root_dir, self.remote_dir)).st_mtime
                     file_age_minutes = (now - file_mtime) / 60
                     return file, file_mtime, file_age_minutes
                 except PermissionError as e:
@@ -110,7 +109,7 @@ class RemoveOrphaned:
                                 f"(age {file_age_minutes:.1f} mins < {min_file_age_minutes} mins)",
                                 self.config.loglevel,
                             )
-                    except TimeoutError:
+                    except FutureTimeoutError:
                         logger.warning(f"Timeout checking file age (permission issue?): {file}")
                         continue
                     except Exception as e:
@@ -191,14 +190,11 @@ class RemoveOrphaned:
         if not self.config.dry_run:
             orphaned_parent_paths = set()
 
-            # Process files in batches to reduce I/O overhead
+            # Process files in batches, each batch is submitted to the shared I/O pool before any result is awaited
             batch_size = 100
             for i in range(0, len(orphaned_files), batch_size):
                 batch = orphaned_files[i : i + batch_size]
-                if self.executor:
-                    batch_results = self.executor.map(self.handle_orphaned_files, batch)
-                else:
-                    batch_results = [self.handle_orphaned_files(file) for file in batch]
+                batch_results = self.handle_orphaned_batch(batch)
                 # Filter out None values (skipped files due to permission errors)
                 valid_paths = [path for path in batch_results if path is not None]
                 orphaned_parent_paths.update(valid_paths)
@@ -206,61 +202,175 @@ class RemoveOrphaned:
             # Remove empty directories
             if orphaned_parent_paths:
                 logger.print_line("Removing newly empty directories", self.config.loglevel)
-                exclude_patterns = [
-                    util.path_replace(exclude_pattern, self.remote_dir, self.root_dir)
-                    for exclude_pattern in self.config.orphaned.get("exclude_patterns", [])
-                ]
-
-                # Process directories (parallel if executor available, synchronous otherwise)
-                if self.executor:
-                    self.executor.map(
-                        lambda directory: util.remove_empty_directories(
-                            directory, self.qbt.get_category_save_paths(), exclude_patterns
-                        ),
-                        orphaned_parent_paths,
-                    )
-                else:
-                    for directory in orphaned_parent_paths:
-                        util.remove_empty_directories(directory, self.qbt.get_category_save_paths(), exclude_patterns)
+                # The parent paths are in remote_dir representation, like the configured exclude patterns
+                removed = util.remove_empty_directories(
+                    orphaned_parent_paths,
+                    self.qbt.get_category_save_paths(),
+                    self.config.orphaned.get("exclude_patterns") or [],
+                )
+                self.config.fs_inventory.invalidate(removed)
 
         end_time = time.time()
         duration = end_time - start_time
         logger.debug(f"Remove orphaned command completed in {duration:.2f} seconds")
 
-    def handle_orphaned_files(self, file):
-        """Handle orphaned file with improved error handling and batching"""
-        src = util.path_replace(file, self.root_dir, self.remote_dir)
-        dest = os.path.join(self.orphaned_dir, util.path_replace(file, self.root_dir, ""))
-        orphaned_parent_path = util.path_replace(os.path.dirname(file), self.root_dir, self.remote_dir)
+    def get_root_files(self):
+        """
+        Get {directory: file names} of root_dir, reading unchanged directories from the persistent directory index.
+        Directory paths are normalized to match the paths of the torrent files.
+        """
+        inventory = self.config.fs_inventory
+
+        def root_dirs(dir_index=None):
+            return {
+                os.path.normpath(path): files
+                for path, files in util.iter_root_dirs(
+                    self.root_dir,
+                    self.remote_dir,
+                    self.orphaned_dir,
+                    dir_index,
+                    inventory=inventory,
+                    exclude=self.exclude_matcher.excludes_dir,
+                )
+                if files
+            }
 
         try:
-            if self.config.orphaned["empty_after_x_days"] == 0:
-                util.delete_files(src)
+            dir_index = DirectoryIndex(self.config.default_dir)
+        except CACHE_ERRORS as ex:
+            logger.warning(f"Unable to use the directory index, walking the full root directory: {ex}")
+            return root_dirs()
+        try:
+            root_files = root_dirs(dir_index)
+            dir_index.save()
+        except CACHE_ERRORS as ex:
+            logger.warning(f"Unable to update the directory index: {ex}")
+            inventory.clear()
+            root_files = root_dirs()
+        finally:
+            dir_index.close()
+        return root_files
+
+    def handle_orphaned_batch(self, files):
+        """
+        Move or delete a batch of orphaned files on the shared I/O pool.
+        Returns the parent path of each file, or None for files skipped because of a permission error.
+        """
+        delete = self.config.orphaned["empty_after_x_days"] == 0
+        pending = []
+        for file in files:
+            src = util.path_replace(file, self.root_dir, self.remote_dir)
+            dest = os.path.join(self.orphaned_dir, util.path_replace(file, self.root_dir, ""))
+            try:
+                if delete:
+                    future = util.start_delete(src)
+                else:
+                    future = util.start_move(src, dest, True)
+            except Exception as e:
+                future = e
+            pending.append((file, src, dest, future))
+
+        results = []
+        for file, src, dest, future in pending:
+            try:
+                if isinstance(future, Exception):
+                    raise future
+                if delete:
+                    self.finish_orphaned_delete(future, src)
+                else:
+                    util.finish_move(future, src, dest)
+            except PermissionError as e:
+                logger.warning(f"Permission denied processing orphaned file {file}: {e}. Skipping file.")
+                # None indicates this file should not be counted in parent path processing
+                results.append(None)
+                continue
+            except Exception as e:
+                logger.error(f"Error processing orphaned file {file}: {e}")
+                if delete:
+                    # Fallback to move if delete fails
+                    try:
+                        util.finish_move(util.start_move(src, dest, True), src, dest)
+                    except PermissionError as move_e:
+                        logger.warning(f"Permission denied moving orphaned file {file}: {move_e}. Skipping file.")
+                        results.append(None)
+                        continue
+                    except Exception as move_e:
+                        logger.error(f"Error moving orphaned file {file}: {move_e}")
+            results.append(util.path_replace(os.path.dirname(file), self.root_dir, self.remote_dir))
+        # Orphans were moved or deleted, their directories are listed again by the next walk
+        self.config.fs_inventory.invalidate(path for _, src, dest, _ in pending for path in (src, dest))
+        return results
+
+    def finish_orphaned_delete(self, future, src):
+        """Wait for an orphaned file delete, raising the errors that skip the file or fall back to moving it"""
+        try:
+            future.result(timeout=util.FILE_OPERATION_TIMEOUT)
+        except FutureTimeoutError:
+            logger.warning(f"Timeout deleting file (permission issue?): {src}")
+        except FileNotFoundError as e:
+            logger.warning(f"File not found: {e.filename} - {e.strerror}.")
+
+    def find_orphaned_files(self, torrent_list, root_files):
+        """Return the files of root_files ({directory: file names}) that are not part of any torrent"""
+        # Process torrent files (parallel if executor available, synchronous otherwise)
+        # Files are grouped by directory so every directory path is stored once instead of once per file
+        torrent_files = {}
+        if self.executor:
+            fullpath_lists = self.executor.map(self.get_full_path_of_torrent_files, torrent_list)
+        else:
+            fullpath_lists = map(self.get_full_path_of_torrent_files, torrent_list)
+        for fullpath_list in fullpath_lists:
+            for fullpath in fullpath_list:
+                directory, name = os.path.split(fullpath)
+                names = torrent_files.get(directory)
+                if names is None:
+                    names = torrent_files[directory] = set()
+                names.add(name)
+
+        # Find orphaned files per directory, directories without any torrent file are orphaned as a whole
+        orphaned_files = set()
+        for directory, names in root_files.items():
+            known_names = torrent_files.get(directory)
+            if known_names is None:
+                orphaned_files.update(os.path.join(directory, name) for name in names)
             else:
-                util.move_files(src, dest, True)
-        except PermissionError as e:
-            logger.warning(f"Permission denied processing orphaned file {file}: {e}. Skipping file.")
-            # Return None to indicate this file should not be counted in parent path processing
-            return None
-        except Exception as e:
-            logger.error(f"Error processing orphaned file {file}: {e}")
-            if self.config.orphaned["empty_after_x_days"] == 0:
-                # Fallback to move if delete fails
-                try:
-                    util.move_files(src, dest, True)
-                except PermissionError as move_e:
-                    logger.warning(f"Permission denied moving orphaned file {file}: {move_e}. Skipping file.")
-                    return None
-                except Exception as move_e:
-                    logger.error(f"Error moving orphaned file {file}: {move_e}")
-
-        return orphaned_parent_path
+                orphaned_files.update(os.path.join(directory, name) for name in names if name not in known_names)
+        return orphaned_files
+
+    def get_cached_owners(self, torrent_list, orphaned_files):
+        """Return the torrents with a file list from the persistent cache whose root folder contains an orphaned file"""
+        if not orphaned_files or not self.qbt.cached_file_hashes:
+            return []
+        roots = {}  # folder holding the files of multi-file torrents -> {hash: torrent}
+        for torrent in torrent_list:
+            if torrent.hash not in self.qbt.cached_file_hashes:
+                continue
+            files = self.qbt.get_torrent_files(torrent)
+            # Renaming a single-file torrent changes its name and content_path, which the cache already checks
+            if len(files) < 2:
+                continue
+            for file in files:
+                parts = file.name.replace("\\", "/").split("/", 1)
+                root = os.path.normpath(os.path.join(torrent.save_path, parts[0] if len(parts) > 1 else ""))
+                roots.setdefault(root, {})[torrent.hash] = torrent
+        owners = {}
+        for file in orphaned_files:
+            directory = os.path.dirname(file)
+            while True:
+                owners.update(roots.get(directory, {}))
+                parent = os.path.dirname(directory)
+                if parent == directory:
+                    break
+                directory = parent
+        return list(owners.values())
 
     def get_full_path_of_torrent_files(self, torrent):
         """Get full paths for torrent files with improved path handling"""
         save_path = torrent.save_path
 
         # Use list comprehension for better performance with cross-platform path normalization
-        fullpath_torrent_files = [os.path.normpath(os.path.join(save_path, file.name)) for file in torrent.files]
+        fullpath_torrent_files = [
+            os.path.normpath(os.path.join(save_path, file.name)) for file in self.qbt.get_torrent_files(torrent)
+        ]
 
         return fullpath_torrent_files
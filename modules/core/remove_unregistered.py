@@ -52,11 +52,11 @@ class RemoveUnregistered:
         if self.hashes:
             torrent_valid_list = [t for t in torrent_valid_list if t.hash in self.hashes]
         for torrent in torrent_valid_list:
-            check_tags = util.get_list(torrent.tags)
+            check_tags = util.parse_tag_set(torrent.tags)
             t_name = torrent.name
             # Remove any error torrents Tags that are no longer unreachable.
             if self.tag_error in check_tags:
-                tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(torrent.trackers))
+                tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(self.qbt.get_torrent_trackers(torrent)))
                 self.stats_untagged += 1
                 body = []
                 body += logger.print_line(
@@ -66,7 +66,7 @@ class RemoveUnregistered:
                 body += logger.print_line(logger.insert_space(f"Removed Tag: {self.tag_error}", 4), self.config.loglevel)
                 body += logger.print_line(logger.insert_space(f"Tracker: {tracker['url']}", 8), self.config.loglevel)
                 if not self.config.dry_run:
-                    torrent.remove_tags(tags=self.tag_error)
+                    self.qbt.write_queue.remove_tags(torrent, self.tag_error)
                 attr = {
                     "function": "untag_tracker_error",
                     "title": "Untagging Tracker Error Torrent",
@@ -134,14 +134,14 @@ class RemoveUnregistered:
             self.t_cat = self.qbt.torrentinfo[self.t_name]["Category"]
             self.t_msg = self.qbt.torrentinfo[self.t_name]["msg"]
             self.t_status = self.qbt.torrentinfo[self.t_name]["status"]
-            check_tags = util.get_list(torrent.tags)
+            check_tags = util.parse_tag_set(torrent.tags)
 
             @handle_qbit_api_errors(context="process_torrent_issues", retry_attempts=1)
             def process_single_torrent():
                 if self.filter_completed and not torrent.state_enum.is_complete:
                     return
                 tracker_working = False
-                for trk in torrent.trackers:
+                for trk in self.qbt.get_torrent_trackers(torrent):
                     if (
                         trk.url.split(":")[0] in ["http", "https", "udp", "ws", "wss"]
                         and TrackerStatus(trk.status) == TrackerStatus.WORKING
@@ -208,6 +208,7 @@ class RemoveUnregistered:
         start_time = time.time()
         self.remove_previous_errors()
         self.process_torrent_issues()
+        self.qbt.remove_empty_directories()
 
         self.config.webhooks_factory.notify(self.torrents_updated_issue, self.notify_attr_issue, group_by="status")
         self.config.webhooks_factory.notify(self.torrents_updated_unreg, self.notify_attr_unreg, group_by="status")
@@ -270,7 +271,7 @@ class RemoveUnregistered:
         self.torrents_updated_issue.append(self.t_name)
         self.notify_attr_issue.append(attr)
         if not self.config.dry_run:
-            torrent.add_tags(tags=self.tag_error)
+            self.qbt.write_queue.add_tags(torrent, self.tag_error)
 
     def del_unregistered(self, msg, tracker, torrent):
         """Deletes unregistered torrents"""
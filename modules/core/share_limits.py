@@ -1,7 +1,10 @@
 import os
+from dataclasses import dataclass
 from datetime import timedelta
 from time import time
 
+from qbittorrentapi import TorrentDictionary
+
 from modules import util
 from modules.util import is_tag_in_torrent
 from modules.webhooks import GROUP_NOTIFICATION_LIMIT
@@ -9,6 +12,88 @@ from modules.webhooks import GROUP_NOTIFICATION_LIMIT
 logger = util.logger
 
 
+@dataclass(frozen=True)
+class ShareLimitRule:
+    """Matching conditions of a share limit group"""
+
+    priority: int
+    name: str
+    include_all_tags: frozenset
+    include_any_tags: frozenset
+    exclude_all_tags: frozenset
+    exclude_any_tags: frozenset
+    min_size: int = None
+    max_size: int = None
+
+    def matches_tags(self, tags):
+        """Check if the torrent has the required tags"""
+        if self.include_all_tags and not self.include_all_tags <= tags:
+            return False
+        if self.include_any_tags and self.include_any_tags.isdisjoint(tags):
+            return False
+        if self.exclude_all_tags and self.exclude_all_tags <= tags:
+            return False
+        if self.exclude_any_tags and not self.exclude_any_tags.isdisjoint(tags):
+            return False
+        return True
+
+
+class ShareLimitClassifier:
+    """
+    Share limit groups compiled once per config load to assign torrents to their group.
+    Groups are bucketed by category in priority order, so a torrent is only checked against the groups its category can match,
+    and its size is only looked up when a group with size thresholds is reached.
+    """
+
+    def __init__(self, share_limits):
+        self.any_category = []  # groups without categories, matching every torrent
+        self.by_category = {}  # category -> groups limited to or matching the category, in priority order
+        for priority, (group_name, group_config) in enumerate(share_limits.items()):
+            min_size = group_config.get("min_torrent_size")
+            max_size = group_config.get("max_torrent_size")
+            rule = ShareLimitRule(
+                priority,
+                group_name,
+                frozenset(group_config["include_all_tags"] or ()),
+                frozenset(group_config["include_any_tags"] or ()),
+                frozenset(group_config["exclude_all_tags"] or ()),
+                frozenset(group_config["exclude_any_tags"] or ()),
+                None if min_size is None else int(min_size),
+                None if max_size is None else int(max_size),
+            )
+            if group_config["categories"]:
+                for category in group_config["categories"]:
+                    self.by_category.setdefault(category, []).append(rule)
+            else:
+                self.any_category.append(rule)
+        for category, rules in self.by_category.items():
+            self.by_category[category] = sorted(rules + self.any_category, key=lambda rule: rule.priority)
+
+    def get_group(self, tags, category, torrent, get_size):
+        """Return the name of the first group by priority matching the torrent, get_size(torrent) returns its size in bytes"""
+        tags = frozenset(tags)
+        size = None
+        size_checked = False
+        for rule in self.by_category.get(category, self.any_category):
+            if not rule.matches_tags(tags):
+                continue
+            if rule.min_size is not None or rule.max_size is not None:
+                if not size_checked:
+                    size = get_size(torrent)
+                    size_checked = True
+                if size is None:
+                    logger.trace(f"Unable to determine size for torrent: {torrent.name}. Excluding from size-filtered groups.")
+                    continue
+                if rule.min_size is not None and size < rule.min_size:
+                    logger.trace(f"Torrent '{torrent.name}' size {size} < min_torrent_size {rule.min_size}")
+                    continue
+                if rule.max_size is not None and size > rule.max_size:
+                    logger.trace(f"Torrent '{torrent.name}' size {size} > max_torrent_size {rule.max_size}")
+                    continue
+            return rule.name
+        return None
+
+
 class ShareLimits:
     def __init__(self, qbit_manager, hashes: list[str] = None):
         self.qbt = qbit_manager
@@ -43,6 +128,7 @@ class ShareLimits:
         self.group_tag = None  # tag for the share limit group
 
         self.update_share_limits()
+        self.qbt.remove_empty_directories()
         self.delete_share_limits_suffix_tag()
 
     def update_share_limits(self):
@@ -111,7 +197,7 @@ class ShareLimits:
             t_status = self.qbt.torrentinfo[t_name]["status"]
             # Double check that the content path is the same before we delete anything
             if util.path_replace(torrent["content_path"], self.root_dir, self.remote_dir) == torrent_dict["content_path"]:
-                tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(torrent.trackers))
+                tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(self.qbt.get_torrent_trackers(torrent)))
                 body = []
                 body += logger.print_line(logger.insert_space(f"Torrent Name: {t_name}", 3), self.config.loglevel)
                 body += logger.print_line(logger.insert_space(f"Tracker: {tracker['url']}", 8), self.config.loglevel)
@@ -204,6 +290,8 @@ class ShareLimits:
         group_upload_speed = group_config["limit_upload_speed"]
 
         for torrent in torrents:
+            # Work on a local record so the changes queued below are reflected without fetching the torrent again
+            torrent = TorrentDictionary(data=dict(torrent), client=self.client)
             t_name = torrent.name
             t_hash = torrent.hash
             if group_config["add_group_to_tag"]:
@@ -213,7 +301,7 @@ class ShareLimits:
                     self.group_tag = f"{self.share_limits_tag}_{group_config['priority']}.{group_name}"
             else:
                 self.group_tag = None
-            tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(torrent.trackers))
+            tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(self.qbt.get_torrent_trackers(torrent)))
             check_max_ratio = group_config["max_ratio"] != torrent.ratio_limit
             check_max_seeding_time = group_config["max_seeding_time"] != torrent.seeding_time_limit
             # Treat upload limit as -1 if it is set to 0 (unlimited)
@@ -305,8 +393,6 @@ class ShareLimits:
                 tracker=tracker["url"],
                 reset_upload_speed_on_unmet_minimums=group_config["reset_upload_speed_on_unmet_minimums"],
             )
-            # Get updated torrent after checking if the torrent has reached seed limits
-            torrent = self.qbt.get_torrents({"torrent_hashes": t_hash})[0]
             if (
                 check_max_ratio
                 or check_max_seeding_time
@@ -363,24 +449,52 @@ class ShareLimits:
                         # Clear share limits to prevent qBittorrent from pausing again, then apply throttle
                         if not self.config.dry_run:
                             # Allow continued seeding by removing share limits
-                            torrent.set_share_limits(ratio_limit=-1, seeding_time_limit=-1, inactive_seeding_time_limit=-1)
-                            torrent.set_upload_limit(limit_val)
+                            self.set_share_limits(torrent, ratio_limit=-1, seeding_time_limit=-1, inactive_seeding_time_limit=-1)
+                            self.set_upload_limit(torrent, limit_val)
                             # Optionally resume if configured
                             if group_config["resume_torrent_after_change"] and torrent.state_enum.is_complete:
-                                torrent.resume()
+                                self.resume(torrent)
             self.torrent_hash_checked.append(t_hash)
 
+    def add_tags(self, torrent, tags):
+        """Queue tags to add to a torrent and apply them to the local torrent record"""
+        self.qbt.write_queue.add_tags(torrent, tags)
+        torrent_tags = [tag for tag in util.get_list(torrent.tags) if tag]
+        torrent["tags"] = ", ".join(torrent_tags + [tag for tag in util.get_list(tags) if tag not in torrent_tags])
+
+    def remove_tags(self, torrent, tags):
+        """Queue tags to remove from a torrent and apply the removal to the local torrent record"""
+        self.qbt.write_queue.remove_tags(torrent, tags)
+        removed_tags = util.get_list(tags)
+        torrent["tags"] = ", ".join(tag for tag in util.get_list(torrent.tags) if tag and tag not in removed_tags)
+
+    def set_share_limits(self, torrent, ratio_limit, seeding_time_limit, inactive_seeding_time_limit):
+        """Queue new share limits for a torrent and apply them to the local torrent record"""
+        self.qbt.write_queue.set_share_limits(torrent, ratio_limit, seeding_time_limit, inactive_seeding_time_limit)
+        torrent["ratio_limit"] = ratio_limit
+        torrent["seeding_time_limit"] = seeding_time_limit
+        torrent["inactive_seeding_time_limit"] = inactive_seeding_time_limit
+
+    def set_upload_limit(self, torrent, limit):
+        """Queue a new upload limit for a torrent and apply it to the local torrent record"""
+        self.qbt.write_queue.set_upload_limit(torrent, limit)
+        torrent["up_limit"] = limit
+
+    def resume(self, torrent):
+        """Queue resuming a torrent"""
+        self.qbt.write_queue.resume(torrent)
+
     def tag_and_update_share_limits_for_torrent(self, torrent, group_config):
         """Removes previous share limits tag, updates tag and share limits for a torrent, and resumes the torrent"""
         # Remove previous share_limits tag
         if not self.config.dry_run:
             tag = is_tag_in_torrent(self.share_limits_tag, torrent.tags, exact=False)
             if tag:
-                torrent.remove_tags(tag)
+                self.remove_tags(torrent, tag)
             # Check if any of the previous share limits custom tags are there
             for custom_tag in self.share_limits_custom_tags:
                 if is_tag_in_torrent(custom_tag, torrent.tags):
-                    torrent.remove_tags(custom_tag)
+                    self.remove_tags(torrent, custom_tag)
 
         # Will tag the torrent with the group name if add_group_to_tag is True and set the share limits
         self.set_tags_and_limits(
@@ -393,13 +507,13 @@ class ShareLimits:
         # Resume torrent if it was paused now that the share limit has changed
         if torrent.state_enum.is_complete and group_config["resume_torrent_after_change"]:
             if not self.config.dry_run:
-                torrent.resume()
+                self.resume(torrent)
 
     def assign_torrents_to_group(self, torrent_list):
         """Assign torrents to a share limit group based on its tags and category"""
         logger.info("Assigning torrents to share limit groups...")
         for torrent in torrent_list:
-            tags = util.get_list(torrent.tags)
+            tags = util.parse_tag_set(torrent.tags)
             category = torrent.category or ""
             grouping = self.get_share_limit_group(tags, category, torrent)
             logger.trace(f"Torrent: {torrent.name} [Hash: {torrent.hash}] - Share Limit Group: {grouping}")
@@ -408,67 +522,9 @@ class ShareLimits:
 
     def get_share_limit_group(self, tags, category, torrent):
         """Get the share limit group based on tags, category, and optional size thresholds of the torrent"""
-        for group_name, group_config in self.share_limits_config.items():
-            check_tags = self.check_tags(
-                tags=tags,
-                include_all_tags=group_config["include_all_tags"],
-                include_any_tags=group_config["include_any_tags"],
-                exclude_all_tags=group_config["exclude_all_tags"],
-                exclude_any_tags=group_config["exclude_any_tags"],
-            )
-            check_category = self.check_category(category, group_config["categories"])
-            check_size = self.check_size(
-                torrent,
-                group_config.get("min_torrent_size"),
-                group_config.get("max_torrent_size"),
-            )
-
-            if check_tags and check_category and check_size:
-                return group_name
-        return None
-
-    def check_tags(self, tags, include_all_tags=set(), include_any_tags=set(), exclude_all_tags=set(), exclude_any_tags=set()):
-        """Check if the torrent has the required tags"""
-        tags_set = set(tags)
-        if include_all_tags:
-            if not set(include_all_tags).issubset(tags_set):
-                return False
-        if include_any_tags:
-            if not set(include_any_tags).intersection(tags_set):
-                return False
-        if exclude_all_tags:
-            if set(exclude_all_tags).issubset(tags_set):
-                return False
-        if exclude_any_tags:
-            if set(exclude_any_tags).intersection(tags_set):
-                return False
-        return True
-
-    def check_category(self, category, categories):
-        """Check if the torrent has the required category"""
-        if categories:
-            if category not in categories:
-                return False
-        return True
-
-    def check_size(self, torrent, min_size, max_size):
-        """Check if the torrent's total size (in bytes) is within [min_size, max_size]."""
-        # If neither threshold is set, always pass
-        if min_size is None and max_size is None:
-            return True
-
-        size = self._get_torrent_size_bytes(torrent)
-        if size is None:
-            logger.trace(f"Unable to determine size for torrent: {torrent.name}. Excluding from size-filtered groups.")
-            return False
-
-        if min_size is not None and size < int(min_size):
-            logger.trace(f"Torrent '{torrent.name}' size {size} < min_torrent_size {min_size}")
-            return False
-        if max_size is not None and size > int(max_size):
-            logger.trace(f"Torrent '{torrent.name}' size {size} > max_torrent_size {max_size}")
-            return False
-        return True
+        if self.config.share_limits_classifier is None:
+            return None
+        return self.config.share_limits_classifier.get_group(tags, category, torrent, self._get_torrent_size_bytes)
 
     def _get_torrent_size_bytes(self, torrent):
         """
@@ -487,7 +543,7 @@ class ShareLimits:
         # Fallback: sum file sizes if available
         try:
             total = 0
-            for f in torrent.files:
+            for f in self.qbt.get_torrent_files(torrent):
                 try:
                     fsz = getattr(f, "size", None)
                     if fsz is not None:
@@ -530,13 +586,13 @@ class ShareLimits:
         # Update Torrents
         if not self.config.dry_run:
             if tags:
-                torrent.add_tags(tags)
+                self.add_tags(torrent, tags)
             torrent_upload_limit = -1 if round(torrent.up_limit / 1024) == 0 else round(torrent.up_limit / 1024)
             if limit_upload_speed is not None and limit_upload_speed != torrent_upload_limit:
                 if limit_upload_speed == -1:
-                    torrent.set_upload_limit(-1)
+                    self.set_upload_limit(torrent, -1)
                 else:
-                    torrent.set_upload_limit(limit_upload_speed * 1024)
+                    self.set_upload_limit(torrent, limit_upload_speed * 1024)
             if max_ratio is None:
                 max_ratio = torrent.ratio_limit
             if max_seeding_time is None:
@@ -547,7 +603,9 @@ class ShareLimits:
                 return []
             if is_tag_in_torrent(self.last_active_tag, torrent.tags):
                 return []
-            torrent.set_share_limits(ratio_limit=max_ratio, seeding_time_limit=max_seeding_time, inactive_seeding_time_limit=-2)
+            self.set_share_limits(
+                torrent, ratio_limit=max_ratio, seeding_time_limit=max_seeding_time, inactive_seeding_time_limit=-2
+            )
         [logger.print_line(msg, self.config.loglevel) for msg in body if do_print]
         return body
 
@@ -572,7 +630,7 @@ class ShareLimits:
             nonlocal torrent_tags
             if is_tag_in_torrent(self.min_seeding_time_tag, torrent_tags):
                 if not self.config.dry_run:
-                    torrent.remove_tags(tags=self.min_seeding_time_tag)
+                    self.remove_tags(torrent, self.min_seeding_time_tag)
 
         def _has_reached_min_seeding_time_limit():
             nonlocal torrent_tags
@@ -597,13 +655,13 @@ class ShareLimits:
                         logger.insert_space(f"Adding Tag: {self.min_seeding_time_tag}", 8), self.config.loglevel
                     )
                     if not self.config.dry_run:
-                        torrent.add_tags(self.min_seeding_time_tag)
+                        self.add_tags(torrent, self.min_seeding_time_tag)
                         torrent_tags += f", {self.min_seeding_time_tag}"
-                        torrent.set_share_limits(ratio_limit=-1, seeding_time_limit=-1, inactive_seeding_time_limit=-1)
+                        self.set_share_limits(torrent, ratio_limit=-1, seeding_time_limit=-1, inactive_seeding_time_limit=-1)
                         if reset_upload_speed_on_unmet_minimums:
-                            torrent.set_upload_limit(-1)
+                            self.set_upload_limit(torrent, -1)
                         if resume_torrent:
-                            torrent.resume()
+                            self.resume(torrent)
             return False
 
         def _is_less_than_min_num_seeds():
@@ -612,7 +670,7 @@ class ShareLimits:
             if min_num_seeds == 0 or torrent.num_complete >= min_num_seeds:
                 if is_tag_in_torrent(self.min_num_seeds_tag, torrent_tags):
                     if not self.config.dry_run:
-                        torrent.remove_tags(tags=self.min_num_seeds_tag)
+                        self.remove_tags(torrent, self.min_num_seeds_tag)
                 return False
             else:
                 if not is_tag_in_torrent(self.min_num_seeds_tag, torrent_tags):
@@ -631,13 +689,13 @@ class ShareLimits:
                         logger.insert_space(f"Adding Tag: {self.min_num_seeds_tag}", 8), self.config.loglevel
                     )
                     if not self.config.dry_run:
-                        torrent.add_tags(self.min_num_seeds_tag)
+                        self.add_tags(torrent, self.min_num_seeds_tag)
                         torrent_tags += f", {self.min_num_seeds_tag}"
-                        torrent.set_share_limits(ratio_limit=-1, seeding_time_limit=-1, inactive_seeding_time_limit=-1)
+                        self.set_share_limits(torrent, ratio_limit=-1, seeding_time_limit=-1, inactive_seeding_time_limit=-1)
                         if reset_upload_speed_on_unmet_minimums:
-                            torrent.set_upload_limit(-1)
+                            self.set_upload_limit(torrent, -1)
                         if resume_torrent:
-                            torrent.resume()
+                            self.resume(torrent)
             return True
 
         def _has_reached_min_last_active_time_limit():
@@ -648,7 +706,7 @@ class ShareLimits:
             if inactive_time_minutes >= min_last_active:
                 if is_tag_in_torrent(self.last_active_tag, torrent_tags):
                     if not self.config.dry_run:
-                        torrent.remove_tags(tags=self.last_active_tag)
+                        self.remove_tags(torrent, self.last_active_tag)
                 return True
             else:
                 if not is_tag_in_torrent(self.last_active_tag, torrent_tags):
@@ -667,13 +725,13 @@ class ShareLimits:
                         logger.insert_space(f"Adding Tag: {self.last_active_tag}", 8), self.config.loglevel
                     )
                     if not self.config.dry_run:
-                        torrent.add_tags(self.last_active_tag)
+                        self.add_tags(torrent, self.last_active_tag)
                         torrent_tags += f", {self.last_active_tag}"
-                        torrent.set_share_limits(ratio_limit=-1, seeding_time_limit=-1, inactive_seeding_time_limit=-1)
+                        self.set_share_limits(torrent, ratio_limit=-1, seeding_time_limit=-1, inactive_seeding_time_limit=-1)
                         if reset_upload_speed_on_unmet_minimums:
-                            torrent.set_upload_limit(-1)
+                            self.set_upload_limit(torrent, -1)
                         if resume_torrent:
-                            torrent.resume()
+                            self.resume(torrent)
             return False
 
         def _has_reached_seeding_time_limit():
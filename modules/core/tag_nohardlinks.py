@@ -1,6 +1,8 @@
 import time
 
 from modules import util
+from modules.persistent_cache import CACHE_ERRORS
+from modules.persistent_cache import HardlinkVerdictCache
 
 logger = util.logger
 
@@ -42,7 +44,7 @@ class TagNoHardLinks:
         title = "Tagging Torrents with No Hardlinks"
         body.append(logger.insert_space(f"Tracker: {tracker['url']}", 8))
         if not self.config.dry_run:
-            torrent.add_tags(self.nohardlinks_tag)
+            self.qbt.write_queue.add_tags(torrent, self.nohardlinks_tag)
         self.stats_tagged += 1
         for rcd in body:
             logger.print_line(rcd, self.config.loglevel)
@@ -74,7 +76,7 @@ class TagNoHardLinks:
             body += logger.print_line(logger.insert_space(f"Removed Tag: {self.nohardlinks_tag}", 6), self.config.loglevel)
             body += logger.print_line(logger.insert_space(f"Tracker: {tracker['url']}", 8), self.config.loglevel)
             if not self.config.dry_run:
-                torrent.remove_tags(tags=self.nohardlinks_tag)
+                self.qbt.write_queue.remove_tags(torrent, self.nohardlinks_tag)
             attr = {
                 "function": "untag_nohardlinks",
                 "title": "Untagging Previous Torrents that now have hardlinks",
@@ -90,7 +92,7 @@ class TagNoHardLinks:
 
     def _process_torrent_for_nohardlinks(self, torrent, check_hardlinks, ignore_root_dir, exclude_tags, category):
         """Helper method to process a single torrent for nohardlinks tagging."""
-        tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(torrent.trackers))
+        tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(self.qbt.get_torrent_trackers(torrent)))
         has_nohardlinks = check_hardlinks.nohardlink(
             util.path_replace(torrent["content_path"], self.root_dir, self.remote_dir),
             self.config.notify,
@@ -117,7 +119,8 @@ class TagNoHardLinks:
         start_time = time.time()
         logger.separator("Tagging Torrents with No Hardlinks", space=False, border=False)
         nohardlinks = self.nohardlinks
-        check_hardlinks = util.CheckHardLinks(self.config)
+        verdict_cache = self.open_verdict_cache()
+        check_hardlinks = util.CheckHardLinks(self.config, verdict_cache)
 
         if self.hashes:
             torrent_list = self.qbt.get_torrents({"torrent_hashes": self.hashes, "status_filter": self.status_filter})
@@ -165,6 +168,23 @@ class TagNoHardLinks:
                 self.config.loglevel,
             )
 
+        if verdict_cache is not None:
+            try:
+                # Only a full run checks every configured torrent, so only a full run drops the unused verdicts
+                verdict_cache.save(evict=not self.hashes)
+            except CACHE_ERRORS as ex:
+                logger.warning(f"Unable to update the hardlink verdict cache: {ex}")
+            finally:
+                verdict_cache.close()
+
         end_time = time.time()
         duration = end_time - start_time
         logger.debug(f"Tag nohardlinks command completed in {duration:.2f} seconds")
+
+    def open_verdict_cache(self):
+        """Open the persistent hardlink verdict cache"""
+        try:
+            return HardlinkVerdictCache(self.config.default_dir)
+        except CACHE_ERRORS as ex:
+            logger.warning(f"Unable to use the hardlink verdict cache, every torrent will be checked: {ex}")
+            return None
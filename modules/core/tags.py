@@ -29,8 +29,9 @@ class Tags:
         torrent_list = self.qbt.torrent_list
         if self.hashes:
             torrent_list = self.qbt.get_torrents({"torrent_hashes": self.hashes})
+        self.qbt.prefetch_torrent_trackers(torrent_list)
         for torrent in torrent_list:
-            tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(torrent.trackers))
+            tracker = self.qbt.get_tags(self.qbt.get_tracker_urls(self.qbt.get_torrent_trackers(torrent)))
 
             # Remove stalled_tag if torrent is no longer stalled
             if (
@@ -44,7 +45,7 @@ class Tags:
                 body += logger.print_line(logger.insert_space(f"Removing Tag: {self.stalled_tag}", 3), self.config.loglevel)
                 body += logger.print_line(logger.insert_space(f"Tracker: {tracker['url']}", 8), self.config.loglevel)
                 if not self.config.dry_run:
-                    torrent.remove_tags(self.stalled_tag)
+                    self.qbt.write_queue.remove_tags(torrent, self.stalled_tag)
             if (
                 torrent.tags == ""
                 or not util.is_tag_in_torrent(tracker["tag"], torrent.tags)
@@ -69,7 +70,7 @@ class Tags:
                     )
                     body += logger.print_line(logger.insert_space(f"Tracker: {tracker['url']}", 8), self.config.loglevel)
                     if not self.config.dry_run:
-                        torrent.add_tags(tracker["tag"])
+                        self.qbt.write_queue.add_tags(torrent, tracker["tag"])
                     category = self.qbt.get_category(torrent.save_path)[0] if torrent.category == "" else torrent.category
                     attr = {
                         "function": "tag_update",
@@ -0,0 +1,253 @@
+"""Live listing of directory trees kept up to date with Linux inotify between scheduled runs"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+
+from modules import util
+
+logger = util.logger
+
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW
+# struct inotify_event: int wd, uint32_t mask, uint32_t cookie, uint32_t len, char name[len]
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+# Watched base directory -> DirectoryWatcher (or None if it could not be started), kept for the lifetime of the process
+WATCHERS = {}
+WATCHERS_LOCK = threading.Lock()
+
+
+class WatchLimitReached(Exception):
+    """Raised when the inotify watch limit (fs.inotify.max_user_watches) is exhausted"""
+
+
+def load_libc():
+    """Load the C library and check that it provides inotify"""
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError(errno.ENOSYS, "inotify is not available")
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    return libc
+
+
+def get_watcher(base_dir, workers=util.DEFAULT_DIR_SCAN_WORKERS):
+    """
+    Return the watcher of base_dir, starting it on the first call.
+    Returns None on platforms without inotify or if the watcher could not be started.
+    """
+    base_dir = os.path.normpath(base_dir)
+    with WATCHERS_LOCK:
+        if base_dir not in WATCHERS:
+            try:
+                WATCHERS[base_dir] = DirectoryWatcher(base_dir, workers)
+                logger.info(f"Filesystem watcher started for {base_dir}")
+            except (OSError, AttributeError) as ex:
+                logger.warning(f"Unable to start the filesystem watcher for {base_dir}, directories will be walked: {ex}")
+                WATCHERS[base_dir] = None
+        return WATCHERS[base_dir]
+
+
+class DirectoryWatcher:
+    """
+    Listing of a directory tree kept up to date from inotify events by a background thread.
+    The listing is only served while it is in sync: a queue overflow makes the thread walk the tree again, and
+    reaching the inotify watch limit stops the watcher so runs go back to walking the tree themselves.
+    inotify only reports changes made through the local kernel, so changes made by other NFS/SMB clients are not seen.
+    """
+
+    def __init__(self, base_dir, workers):
+        self.base_dir = base_dir
+        self.workers = workers
+        self.libc = load_libc()
+        self.lock = threading.RLock()
+        self.fd = -1
+        self.tree = {}  # directory path -> set of file names
+        self.wd_paths = {}  # watch descriptor -> directory path
+        self.path_wds = {}  # directory path -> watch descriptor
+        self.in_sync = False
+        self.resync_needed = True
+        self.stopped = False
+        self.open_inotify()
+        self.thread = threading.Thread(target=self.run, name="fs_watcher", daemon=True)
+        self.thread.start()
+
+    def open_inotify(self):
+        """Open a new inotify instance, dropping the watches of the previous one"""
+        if self.fd >= 0:
+            os.close(self.fd)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.wd_paths = {}
+        self.path_wds = {}
+
+    def add_watch(self, path):
+        """Watch a directory, returning its watch descriptor or None if it cannot be watched"""
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise WatchLimitReached(f"inotify watch limit reached while watching {path}")
+            return None
+        # Called from the walk workers while the thread applying events holds the lock
+        self.wd_paths[wd] = path
+        self.path_wds[path] = wd
+        return wd
+
+    def watch_and_list(self, path):
+        """Lister for walk_tree that watches each directory before listing it, so no change is missed"""
+        self.add_watch(path)
+        return util.list_directory(path)
+
+    def add_subtree(self, path):
+        """Watch and list a directory and everything below it"""
+        for dir_path, files in util.walk_tree(path, self.workers, self.watch_and_list):
+            with self.lock:
+                self.tree.setdefault(dir_path, set()).update(files)
+
+    def remove_subtree(self, path):
+        """Forget a directory and everything below it"""
+        prefix = os.path.join(path, "")
+        for dir_path in [p for p in self.tree if p == path or p.startswith(prefix)]:
+            del self.tree[dir_path]
+        for dir_path in [p for p in self.path_wds if p == path or p.startswith(prefix)]:
+            wd = self.path_wds.pop(dir_path)
+            if self.wd_paths.get(wd) == dir_path:
+                del self.wd_paths[wd]
+                # Moved directories keep their watch, deleted ones were already removed by the kernel
+                self.libc.inotify_rm_watch(self.fd, wd)
+
+    def resync(self):
+        """Walk the whole tree again with fresh watches"""
+        self.in_sync = False
+        with self.lock:
+            self.resync_needed = False
+            self.open_inotify()
+            self.tree = {}
+            self.add_subtree(self.base_dir)
+            self.in_sync = True
+        logger.debug(f"Filesystem watcher: watching {len(self.path_wds)} directories in {self.base_dir}")
+
+    def run(self):
+        """Watcher thread: keep the tree in sync until the watcher is stopped"""
+        try:
+            while not self.stopped:
+                if self.resync_needed:
+                    self.resync()
+                readable, _, _ = select.select([self.fd], [], [], 1.0)
+                if readable:
+                    with self.lock:
+                        self.process_pending()
+        except WatchLimitReached as ex:
+            logger.warning(
+                f"Filesystem watcher stopped: {ex}. Raise fs.inotify.max_user_watches to watch {self.base_dir}, "
+                "directories will be walked on every run."
+            )
+            self.stop()
+        except Exception as ex:
+            if not self.stopped:
+                logger.stacktrace()
+                logger.error(f"Filesystem watcher stopped: {ex}")
+                self.stop()
+
+    def stop(self):
+        """Stop watching, the tree is no longer served"""
+        self.stopped = True
+        self.in_sync = False
+        with self.lock:
+            if self.fd >= 0:
+                os.close(self.fd)
+                self.fd = -1
+
+    def process_pending(self):
+        """Apply all queued events to the tree, must be called with the lock held"""
+        while self.in_sync:
+            try:
+                data = os.read(self.fd, READ_SIZE)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset : offset + name_len].rstrip(b"\0"))
+                offset += name_len
+                self.apply_event(wd, mask, name)
+
+    def apply_event(self, wd, mask, name):
+        """Apply a single inotify event to the tree"""
+        if mask & IN_Q_OVERFLOW:
+            logger.debug(f"Filesystem watcher: event queue overflow, walking {self.base_dir} again")
+            self.in_sync = False
+            self.resync_needed = True
+            return
+        path = self.wd_paths.get(wd)
+        if path is None:
+            return
+        if mask & IN_IGNORED:
+            del self.wd_paths[wd]
+            if self.path_wds.get(path) == wd:
+                del self.path_wds[path]
+            return
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            if path == self.base_dir:
+                self.in_sync = False
+                self.resync_needed = True
+            return
+        child = os.path.join(path, name)
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                if not os.path.islink(child):
+                    self.add_subtree(child)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self.remove_subtree(child)
+        elif mask & (IN_CREATE | IN_MOVED_TO):
+            # Symlinks to directories are neither listed nor descended into, like util.list_directory
+            if not (os.path.islink(child) and os.path.isdir(child)):
+                self.tree.setdefault(path, set()).add(name)
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            files = self.tree.get(path)
+            if files is not None:
+                files.discard(name)
+
+    def snapshot(self, base_dir):
+        """
+        Return {directory path: file names} of the whole watched tree if it is in sync and contains base_dir, else None.
+        Queued events are applied first, so changes made before the call are included.
+        """
+        base_dir = os.path.normpath(base_dir)
+        if base_dir != self.base_dir and not base_dir.startswith(os.path.join(self.base_dir, "")):
+            return None
+        if not self.in_sync:
+            return None
+        with self.lock:
+            try:
+                self.process_pending()
+            except WatchLimitReached as ex:
+                logger.warning(f"Filesystem watcher stopped: {ex}, directories will be walked on every run.")
+                self.stop()
+            if not self.in_sync:
+                return None
+            return {path: list(files) for path, files in self.tree.items()}
@@ -0,0 +1,258 @@
+"""Persistent caches stored as SQLite databases in the config directory"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from qbittorrentapi import TorrentFilesList
+
+from modules import util
+
+logger = util.logger
+
+CACHE_DIR = "cache"
+# Errors raised while opening or using a cache, callers fall back to querying the source directly
+CACHE_ERRORS = (OSError, sqlite3.Error)
+
+
+class SQLiteCache:
+    """
+    Base class for the SQLite caches kept under <config dir>/cache.
+    The connection is shared between threads and guarded by a lock.
+    """
+
+    FILENAME = None
+    SCHEMA = ""
+
+    def __init__(self, default_dir):
+        cache_dir = os.path.join(default_dir, CACHE_DIR)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, self.FILENAME)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL allows the web server and the scheduler to use the cache at the same time
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.executescript(self.SCHEMA)
+
+    def close(self):
+        """Close the database connection"""
+        with self.lock:
+            self.connection.close()
+
+
+class TorrentFileCache(SQLiteCache):
+    """
+    File lists of torrents keyed by qBittorrent instance and infohash.
+    An entry is reused as long as the name, content_path and total_size of the torrent still match the values stored
+    with it. Renaming a file inside a multi-file torrent changes none of them, so Qbt.refresh_torrent_files fetches
+    cached lists again before they are used to move or delete files.
+    Only the immutable fields of each file (index, name and size) are stored.
+    """
+
+    FILENAME = "torrent_files.db"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS torrent_files (
+            instance TEXT NOT NULL,
+            hash TEXT NOT NULL,
+            name TEXT NOT NULL,
+            content_path TEXT NOT NULL,
+            total_size INTEGER NOT NULL,
+            files TEXT NOT NULL,
+            PRIMARY KEY (instance, hash)
+        );
+    """
+    FILE_FIELDS = ("index", "name", "size")
+
+    def __init__(self, default_dir, instance):
+        super().__init__(default_dir)
+        self.instance = instance
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT hash, name, content_path, total_size, files FROM torrent_files WHERE instance = ?", (instance,)
+            ).fetchall()
+        # torrent hash -> (signature, serialized file list)
+        self.entries = {row[0]: (tuple(row[1:4]), row[4]) for row in rows}
+
+    @staticmethod
+    def signature(torrent):
+        """Torrent fields that change when the file list of a torrent is renamed"""
+        return (torrent.get("name", ""), torrent.get("content_path", ""), torrent.get("total_size", -1))
+
+    def get(self, torrent):
+        """Return the cached file list of a torrent or None if it is missing or out of date"""
+        entry = self.entries.get(torrent.hash)
+        if entry is None or entry[0] != self.signature(torrent):
+            return None
+        return TorrentFilesList(json.loads(entry[1]))
+
+    def set(self, torrent_files):
+        """Store the file lists of a list of (torrent, files) pairs in a single transaction"""
+        rows = []
+        for torrent, files in torrent_files:
+            serialized = json.dumps([{field: file.get(field) for field in self.FILE_FIELDS} for file in files])
+            signature = self.signature(torrent)
+            self.entries[torrent.hash] = (signature, serialized)
+            rows.append((self.instance, torrent.hash, *signature, serialized))
+        if not rows:
+            return
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO torrent_files VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def evict(self, current_hashes):
+        """Remove the entries of torrents that no longer exist in qBittorrent"""
+        stale = [t_hash for t_hash in self.entries if t_hash not in current_hashes]
+        if not stale:
+            return
+        for t_hash in stale:
+            del self.entries[t_hash]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "DELETE FROM torrent_files WHERE instance = ? AND hash = ?", [(self.instance, t_hash) for t_hash in stale]
+            )
+        logger.debug(f"Removed {len(stale)} deleted torrents from the torrent file cache")
+
+
+class DirectoryIndex(SQLiteCache):
+    """
+    Listing of every directory walked by the orphan scan keyed by path, together with the directory mtime.
+    Adding, removing or renaming an entry updates the mtime of its parent directory, so a directory whose mtime
+    did not change since the last scan is served from the index and only changed directories are listed again.
+    """
+
+    FILENAME = "directory_index.db"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS directories (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            files TEXT NOT NULL,
+            subdirs TEXT NOT NULL
+        );
+    """
+    # Directories modified this close to the start of a scan may change again within the same mtime tick,
+    # so their listing is stored without an mtime and listed again on the next scan
+    RACY_WINDOW_NS = 2_000_000_000
+
+    def __init__(self, default_dir):
+        super().__init__(default_dir)
+        self.entries = {}
+        self.updates = {}
+        self.seen = set()
+        self.racy_limit = 0
+
+    def load(self, base_dir):
+        """Load the stored listings of base_dir and its subdirectories before walking it"""
+        prefix = os.path.join(base_dir, "")
+        with self.lock:
+            rows = self.connection.execute("SELECT path, mtime_ns, files, subdirs FROM directories").fetchall()
+        # directory path -> (mtime_ns, serialized file names, serialized subdirectory names)
+        self.entries = {row[0]: tuple(row[1:]) for row in rows if row[0] == base_dir or row[0].startswith(prefix)}
+        self.updates = {}
+        self.seen = set()
+        self.racy_limit = time.time_ns() - self.RACY_WINDOW_NS
+
+    def list_directory(self, path):
+        """Return (file names, subdirectory names) of a directory, listing it again only if its mtime changed"""
+        mtime_ns = os.stat(path).st_mtime_ns
+        self.seen.add(path)
+        entry = self.entries.get(path)
+        if entry is not None and entry[0] == mtime_ns:
+            return json.loads(entry[1]), json.loads(entry[2])
+        files, subdirs = util.list_directory(path)
+        stored_mtime = mtime_ns if mtime_ns < self.racy_limit else -1
+        self.updates[path] = (stored_mtime, json.dumps(files), json.dumps(subdirs))
+        return files, subdirs
+
+    def save(self):
+        """Store the directories listed during the last walk and drop the ones that no longer exist"""
+        if not self.seen:
+            # Nothing was walked, the tree was served from the run's filesystem inventory
+            return
+        stale = [path for path in self.entries if path not in self.seen]
+        logger.debug(f"Directory index: listed {len(self.updates)} of {len(self.seen)} directories")
+        if not self.updates and not stale:
+            return
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?)",
+                [(path, *entry) for path, entry in self.updates.items()],
+            )
+            self.connection.executemany("DELETE FROM directories WHERE path = ?", [(path,) for path in stale])
+        self.entries.update(self.updates)
+        for path in stale:
+            self.entries.pop(path, None)
+        self.updates = {}
+
+
+class HardlinkVerdictCache(SQLiteCache):
+    """
+    Results of the hardlink check keyed by content path and ignore_root_dir, stored with the device, inode,
+    link count, mtime and ctime of every file and folder the check read. Creating, removing or moving a hardlink
+    changes the link count or ctime of the file, so a stored verdict is reused while all of them are unchanged.
+    """
+
+    FILENAME = "hardlink_verdicts.db"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS hardlink_verdicts (
+            path TEXT NOT NULL,
+            ignore_root_dir INTEGER NOT NULL,
+            nohardlinks INTEGER NOT NULL,
+            members TEXT NOT NULL,
+            PRIMARY KEY (path, ignore_root_dir)
+        );
+    """
+
+    def __init__(self, default_dir):
+        super().__init__(default_dir)
+        with self.lock:
+            rows = self.connection.execute("SELECT path, ignore_root_dir, nohardlinks, members FROM hardlink_verdicts").fetchall()
+        # (path, ignore_root_dir) -> (verdict, serialized [path, *signature] members)
+        self.entries = {(row[0], bool(row[1])): (bool(row[2]), row[3]) for row in rows}
+        self.updates = {}
+        self.used = set()
+
+    @staticmethod
+    def signature(file_stat):
+        """Stat fields that change when the file or its hardlinks change"""
+        return [file_stat.st_dev, file_stat.st_ino, file_stat.st_nlink, file_stat.st_mtime_ns, file_stat.st_ctime_ns]
+
+    def get(self, path, ignore_root_dir, stat):
+        """Return the stored verdict of a path or None if it is missing or one of its members changed"""
+        key = (path, bool(ignore_root_dir))
+        self.used.add(key)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        for member_path, *signature in json.loads(entry[1]):
+            try:
+                if self.signature(stat(member_path)) != signature:
+                    return None
+            except OSError:
+                return None
+        return entry[0]
+
+    def set(self, path, ignore_root_dir, verdict, members):
+        """Store the verdict of a path together with the (path, stat result) pairs it was computed from"""
+        key = (path, bool(ignore_root_dir))
+        entry = (bool(verdict), json.dumps([[member_path, *self.signature(member_stat)] for member_path, member_stat in members]))
+        self.entries[key] = entry
+        self.updates[key] = entry
+
+    def save(self, evict=False):
+        """Store the verdicts computed during this run, evict also drops the paths that were not checked"""
+        stale = [key for key in self.entries if key not in self.used] if evict else []
+        if not self.updates and not stale:
+            return
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO hardlink_verdicts VALUES (?, ?, ?, ?)",
+                [(*key, *entry) for key, entry in self.updates.items()],
+            )
+            self.connection.executemany("DELETE FROM hardlink_verdicts WHERE path = ? AND ignore_root_dir = ?", stale)
+        logger.debug(f"Hardlink verdict cache: stored {len(self.updates)} verdicts, removed {len(stale)}")
+        for key in stale:
+            del self.entries[key]
+        self.updates = {}
@@ -1,18 +1,30 @@
 """Qbittorrent Module"""
 
 import os
+import re
 import sys
-from fnmatch import fnmatch
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from fnmatch import translate
 from functools import cache
+from functools import partial
 
 from qbittorrentapi import APIConnectionError
 from qbittorrentapi import Client
+from qbittorrentapi import Conflict409Error
 from qbittorrentapi import LoginFailed
+from qbittorrentapi import TorrentDictionary
+from qbittorrentapi import TorrentState
 from qbittorrentapi import TrackerStatus
 from qbittorrentapi import Version
 from ruamel.yaml import CommentedSeq
 
 from modules import util
+from modules.persistent_cache import CACHE_ERRORS
+from modules.persistent_cache import TorrentFileCache
 from modules.qbit_error_handler import handle_qbit_api_errors
 from modules.util import Failed
 from modules.util import TorrentMessages
@@ -21,6 +33,520 @@ from modules.util import list_in_text
 logger = util.logger
 
 
+def get_torrent_state(state):
+    """Convert a raw torrent state string into a TorrentState"""
+    try:
+        return TorrentState(state)
+    except ValueError:
+        return TorrentState.UNKNOWN
+
+
+class TorrentSyncStore:
+    """
+    In-memory mirror of the qBittorrent torrent list kept up to date through the /api/v2/sync/maindata endpoint.
+    The first sync downloads the full list, every following sync only transfers the fields that changed since the
+    last response id (rid). Stores are kept per qBittorrent instance and survive between scheduled runs.
+    """
+
+    # status_filter values that can be evaluated locally, anything else is delegated to torrents/info
+    STATUS_FILTERS = {
+        "all": lambda state: True,
+        "completed": lambda state: state.is_complete,
+        "paused": lambda state: state.is_stopped,
+        "stopped": lambda state: state.is_stopped,
+        "downloading": lambda state: state.is_downloading,
+        "errored": lambda state: state.is_errored,
+    }
+    SUPPORTED_PARAMS = {"status_filter", "category", "torrent_hashes", "sort", "reverse"}
+
+    def __init__(self):
+        self.rid = 0
+        self.torrents = {}  # torrent hash -> raw torrent fields
+        self.lock = threading.Lock()
+
+    def supports(self, params):
+        """Check if the torrents/info parameters can be answered from the local mirror"""
+        if not set(params).issubset(self.SUPPORTED_PARAMS):
+            return False
+        return params.get("status_filter", "all") in self.STATUS_FILTERS
+
+    def sync(self, client):
+        """Apply the changes since the last sync to the local mirror"""
+        with self.lock:
+            maindata = client.sync_maindata(rid=self.rid)
+            if maindata.get("full_update"):
+                self.torrents = {}
+            for torrent_hash, fields in (maindata.get("torrents") or {}).items():
+                self.torrents.setdefault(torrent_hash, {"hash": torrent_hash}).update(fields)
+            for torrent_hash in maindata.get("torrents_removed") or []:
+                self.torrents.pop(torrent_hash, None)
+            self.rid = maindata.get("rid", 0)
+
+    def reset(self):
+        """Drop the mirror so the next sync requests a full update"""
+        with self.lock:
+            self.rid = 0
+            self.torrents = {}
+
+    def get_torrents(self, client, status_filter="all", category=None, torrent_hashes=None, sort=None, reverse=False):
+        """Return TorrentDictionary objects from the local mirror using the same filters as torrents/info"""
+        status_check = self.STATUS_FILTERS[status_filter or "all"]
+        if isinstance(torrent_hashes, str):
+            torrent_hashes = torrent_hashes.split("|")
+        if torrent_hashes is not None:
+            # torrents/info matches hashes case-insensitively, qBittorrent reports them in lowercase
+            torrent_hashes = [t_hash.lower() for t_hash in torrent_hashes]
+        with self.lock:
+            if torrent_hashes is not None:
+                candidates = [self.torrents[t_hash] for t_hash in torrent_hashes if t_hash in self.torrents]
+            else:
+                candidates = list(self.torrents.values())
+        torrent_list = []
+        for fields in candidates:
+            if category is not None and fields.get("category", "") != category:
+                continue
+            if not status_check(get_torrent_state(fields.get("state"))):
+                continue
+            torrent_list.append(TorrentDictionary(data=dict(fields), client=client))
+        if sort:
+            torrent_list.sort(key=lambda torrent: torrent.get(sort, 0), reverse=bool(reverse))
+        return torrent_list
+
+
+# Torrent mirrors keyed by (host, username) so they outlive a single run of the same config
+SYNC_STORES = {}
+
+
+class TorrentSnapshot:
+    """
+    Run-scoped view of the torrent list indexed by hash, category, state and tag.
+    Core commands filter the snapshot locally instead of requesting the torrent list again,
+    it is only rebuilt after a command has mutated torrents (see Qbt.invalidate_snapshot).
+    """
+
+    SUPPORTED_PARAMS = TorrentSyncStore.SUPPORTED_PARAMS | {"tag"}
+
+    def __init__(self, torrent_list):
+        self.by_hash = {}  # torrent hash -> TorrentDictionary
+        self.by_category = {}  # category -> set of torrent hashes
+        self.by_state = {}  # state -> set of torrent hashes
+        self.by_tag = {}  # tag -> set of torrent hashes ("" for untagged torrents)
+        self.order = {}  # torrent hash -> position in the original torrent list
+        self.update(torrent_list)
+
+    @classmethod
+    def supports(cls, params):
+        """Check if the torrents/info parameters can be answered from the snapshot"""
+        if not set(params).issubset(cls.SUPPORTED_PARAMS):
+            return False
+        return (params.get("status_filter") or "all") in TorrentSyncStore.STATUS_FILTERS
+
+    def _add_to_indexes(self, torrent):
+        t_hash = torrent.hash
+        self.by_category.setdefault(torrent.category, set()).add(t_hash)
+        self.by_state.setdefault(torrent.state, set()).add(t_hash)
+        for tag in util.parse_tags(torrent.tags):
+            self.by_tag.setdefault(tag, set()).add(t_hash)
+
+    def _remove_from_indexes(self, torrent):
+        t_hash = torrent.hash
+        self.by_category.get(torrent.category, set()).discard(t_hash)
+        self.by_state.get(torrent.state, set()).discard(t_hash)
+        for tag in util.parse_tags(torrent.tags):
+            self.by_tag.get(tag, set()).discard(t_hash)
+
+    def update(self, torrent_list):
+        """Add or replace torrents in the snapshot with fresher copies"""
+        for torrent in torrent_list:
+            previous = self.by_hash.get(torrent.hash)
+            if previous is not None:
+                self._remove_from_indexes(previous)
+            else:
+                self.order[torrent.hash] = len(self.order)
+            self.by_hash[torrent.hash] = torrent
+            self._add_to_indexes(torrent)
+
+    def remove(self, torrent_hash):
+        """Remove a deleted torrent from the snapshot"""
+        torrent = self.by_hash.pop(torrent_hash, None)
+        if torrent is not None:
+            self._remove_from_indexes(torrent)
+
+    def get_torrents(self, status_filter="all", category=None, torrent_hashes=None, tag=None, sort=None, reverse=False):
+        """Return torrents from the snapshot using the same filters as torrents/info"""
+        candidates = None
+        if torrent_hashes is not None:
+            if isinstance(torrent_hashes, str):
+                torrent_hashes = torrent_hashes.split("|")
+            # torrents/info matches hashes case-insensitively, qBittorrent reports them in lowercase
+            candidates = {t_hash.lower() for t_hash in torrent_hashes}
+        if category is not None:
+            in_category = self.by_category.get(category, set())
+            candidates = in_category if candidates is None else candidates & in_category
+        if tag is not None:
+            with_tag = self.by_tag.get(tag, set())
+            candidates = with_tag if candidates is None else candidates & with_tag
+        status_check = TorrentSyncStore.STATUS_FILTERS[status_filter or "all"]
+        if status_filter and status_filter != "all":
+            in_state = set()
+            for state, hashes in self.by_state.items():
+                if status_check(get_torrent_state(state)):
+                    in_state |= hashes
+            candidates = in_state if candidates is None else candidates & in_state
+        if candidates is None:
+            torrent_list = list(self.by_hash.values())
+        else:
+            torrent_list = [self.by_hash[t_hash] for t_hash in sorted(candidates & self.by_hash.keys(), key=self.order.get)]
+        if sort:
+            torrent_list.sort(key=lambda torrent: torrent.get(sort, 0), reverse=bool(reverse))
+        return torrent_list
+
+
+class CrossSeedIndex:
+    """
+    Index of the files of all torrents used to detect cross-seeds.
+    Every full file path is interned once and mapped to an integer file id. Per file id the index keeps the hash of
+    the original torrent (the first torrent seen with that file) and an insertion ordered set of cross-seeding
+    hashes, while each torrent hash maps to a compact array of its file ids.
+    """
+
+    def __init__(self):
+        self.file_ids = {}  # full path -> file id
+        self.paths = []  # file id -> full path
+        self.originals = []  # file id -> hash of the original torrent, None once it and all its cross-seeds are removed
+        self.cross_seeds = {}  # file id -> {cross-seed torrent hash: None}, only for files that have been cross-seeded
+        self.torrent_file_ids = {}  # torrent hash -> array of file ids
+
+    def add_torrent(self, torrent_hash, save_path, torrent_files):
+        """Add the files of a torrent to the index"""
+        file_ids = array("I")
+        for file in torrent_files:
+            full_path = os.path.join(save_path, file.name)
+            file_id = self.file_ids.get(full_path)
+            if file_id is None:
+                file_id = len(self.paths)
+                self.file_ids[full_path] = file_id
+                self.paths.append(full_path)
+                self.originals.append(torrent_hash)
+            else:
+                self.cross_seeds.setdefault(file_id, {})[torrent_hash] = None
+            file_ids.append(file_id)
+        self.torrent_file_ids[torrent_hash] = file_ids
+
+    def is_cross_seed(self, torrent_hash):
+        """Check if every file of the torrent is a cross-seed of another torrent"""
+        file_ids = self.torrent_file_ids.get(torrent_hash)
+        if not file_ids:
+            return False
+        for file_id in file_ids:
+            if self.originals[file_id] == torrent_hash or torrent_hash not in self.cross_seeds.get(file_id, ()):
+                logger.trace(f"File: [{self.paths[file_id]}] is found in Torrent Hash: {torrent_hash} as the original torrent")
+                return False
+            if self.originals[file_id] is None:
+                return False
+        return True
+
+    def has_cross_seed(self, torrent_hash):
+        """Check if any file of the torrent is cross-seeded"""
+        for file_id in self.torrent_file_ids.get(torrent_hash, ()):
+            if self.cross_seeds.get(file_id):
+                logger.trace(f"{self.paths[file_id]} has cross seeds: {list(self.cross_seeds[file_id])}")
+                return True
+        return False
+
+    def remove_torrent(self, torrent_hash):
+        """Remove a deleted torrent, promoting the oldest cross-seed of its files to original"""
+        for file_id in self.torrent_file_ids.pop(torrent_hash, ()):
+            cross_seeds = self.cross_seeds.get(file_id)
+            if self.originals[file_id] == torrent_hash:
+                if cross_seeds:
+                    new_original = next(iter(cross_seeds))
+                    del cross_seeds[new_original]
+                    self.originals[file_id] = new_original
+                    logger.trace(f"Updated {self.paths[file_id]} original to {new_original}")
+                else:
+                    self.originals[file_id] = None
+            elif cross_seeds and torrent_hash in cross_seeds:
+                del cross_seeds[torrent_hash]
+                logger.trace(f"Removed {torrent_hash} from {self.paths[file_id]} cross seeds")
+
+
+class CategoryResolver:
+    """
+    Save paths of the "cat" config section compiled for Qbt.get_category.
+    Literal save paths are looked up in dicts and glob save paths are tested with one combined regular expression,
+    so resolving the category of a save path no longer runs fnmatch against every category of the config.
+    """
+
+    WILDCARDS = ("*", "?", "[")
+
+    def __init__(self, categories):
+        self.categories = []  # category names in config order
+        self.exact = {}  # save path with trailing separator -> positions of its categories
+        self.folded = {}  # save path as compared by fnmatch -> positions of its categories
+        self.globs = []  # (position, compiled pattern) of the save paths with wildcards
+        self._glob_regex = None
+        for cat, save_path in categories.items():
+            if cat == "Uncategorized" and isinstance(save_path, CommentedSeq):
+                self.add(cat, list(save_path))
+            else:
+                self.add(cat, [save_path])
+
+    def add(self, cat, save_paths):
+        """Add the save paths of a category, raises TypeError for save paths that are not strings"""
+        position = len(self.categories)
+        self.categories.append(cat)
+        for save_path in save_paths:
+            if not isinstance(save_path, str):
+                raise TypeError(f"Invalid configuration for category {cat}. Check your config.yml file.")
+            self.exact.setdefault(os.path.join(save_path, ""), []).append(position)
+            pattern = os.path.normcase(save_path)
+            if any(wildcard in pattern for wildcard in self.WILDCARDS):
+                self.globs.append((position, re.compile(translate(pattern))))
+                self._glob_regex = None
+            else:
+                # fnmatch of a pattern without wildcards is a comparison of the normalized case paths
+                self.folded.setdefault(pattern, []).append(position)
+
+    def resolve(self, path):
+        """Return the categories whose save path matches the path (with trailing separator), in config order"""
+        folded_path = os.path.normcase(path)
+        positions = set(self.exact.get(path, ()))
+        positions.update(self.folded.get(folded_path, ()))
+        if self.globs:
+            if self._glob_regex is None:
+                self._glob_regex = re.compile("|".join(f"(?:{glob.pattern})" for _, glob in self.globs))
+            # The combined expression rejects most paths at once, only a match needs to know which globs matched
+            if self._glob_regex.match(folded_path):
+                positions.update(position for position, glob in self.globs if glob.match(folded_path))
+        return [self.categories[position] for position in sorted(positions)]
+
+
+class TrackerMatcher:
+    """
+    Tracker keywords of the config compiled for Qbt.get_tags.
+    All keywords are searched in an announce URL with one regular expression and the result is cached per URL,
+    so resolving the tracker of a torrent no longer scans every keyword of the config.
+    """
+
+    def __init__(self, keywords=()):
+        self.keywords = []  # keywords in config order
+        self.indexes = {}  # keyword -> position in the config
+        self.url_matches = {}  # announce URL -> position of the first keyword found in it, or None
+        self._regex = None
+        for keyword in keywords:
+            self.add(keyword)
+
+    def add(self, keyword):
+        """Add a keyword after the existing ones"""
+        if keyword in self.indexes:
+            return
+        self.indexes[keyword] = len(self.keywords)
+        self.keywords.append(keyword)
+        self.url_matches = {}
+        self._regex = None
+
+    def match_url(self, url):
+        """Return the position of the first keyword in config order contained in the URL, or None"""
+        try:
+            return self.url_matches[url]
+        except KeyError:
+            pass
+        if self._regex is None and self.keywords:
+            # At each position of the URL the lookahead captures the first keyword in config order starting there
+            self._regex = re.compile("(?=(" + "|".join(re.escape(keyword) for keyword in self.keywords) + "))")
+        index = None
+        if self._regex is not None:
+            for found in self._regex.finditer(url):
+                position = self.indexes[found.group(1)]
+                if index is None or position < index:
+                    index = position
+        self.url_matches[url] = index
+        return index
+
+    def match(self, urls):
+        """
+        Return (keyword, url) of the first keyword in config order contained in one of the URLs, and the first URL containing it.
+        Returns (None, None) if no keyword matches.
+        """
+        best = None
+        for url in urls:
+            index = self.match_url(url)
+            if index is not None and (best is None or index < best[0]):
+                best = (index, url)
+        if best is None:
+            return None, None
+        return self.keywords[best[0]], best[1]
+
+
+class TorrentWriteQueue:
+    """
+    Coalesces torrent writes queued by the core commands into multi-hash requests.
+    Tag changes are merged per torrent, the other operations keep the last value queued for a torrent.
+    Torrents sharing the same (operation, value) are sent together in chunks of CHUNK_SIZE hashes when flushed.
+    """
+
+    CHUNK_SIZE = 500
+    # operations applied by flush(), in the order they are sent to qBittorrent
+    OPERATIONS = ("category", "auto_management", "remove_tags", "add_tags", "share_limits", "upload_limit", "resume", "recheck")
+
+    def __init__(self, qbt):
+        self.qbt = qbt
+        self.config = qbt.config
+        self.client = qbt.client
+        self.clear()
+
+    def clear(self):
+        """Drop all queued writes"""
+        self.pending = {operation: {} for operation in self.OPERATIONS}  # operation -> {torrent hash: value}
+        self.category_save_paths = {}  # category -> save path used when the category has to be created
+
+    def __len__(self):
+        return sum(len(values) for values in self.pending.values())
+
+    def add_tags(self, torrent, tags):
+        """Queue tags to add to a torrent"""
+        tags = set(util.get_list(tags))
+        self.pending["add_tags"].setdefault(torrent.hash, set()).update(tags)
+        if torrent.hash in self.pending["remove_tags"]:
+            self.pending["remove_tags"][torrent.hash] -= tags
+
+    def remove_tags(self, torrent, tags):
+        """Queue tags to remove from a torrent"""
+        tags = set(util.get_list(tags))
+        self.pending["remove_tags"].setdefault(torrent.hash, set()).update(tags)
+        if torrent.hash in self.pending["add_tags"]:
+            self.pending["add_tags"][torrent.hash] -= tags
+
+    def set_category(self, torrent, category):
+        """Queue a category change, the category is created with the torrent's save path if it does not exist"""
+        self.pending["category"][torrent.hash] = category
+        self.category_save_paths.setdefault(category, torrent.save_path)
+
+    def set_auto_management(self, torrent, enable):
+        """Queue enabling or disabling Automatic Torrent Management"""
+        self.pending["auto_management"][torrent.hash] = enable
+
+    def set_share_limits(self, torrent, ratio_limit, seeding_time_limit, inactive_seeding_time_limit):
+        """Queue new share limits for a torrent"""
+        self.pending["share_limits"][torrent.hash] = (ratio_limit, seeding_time_limit, inactive_seeding_time_limit)
+
+    def set_upload_limit(self, torrent, limit):
+        """Queue a new upload limit (bytes/s) for a torrent"""
+        self.pending["upload_limit"][torrent.hash] = limit
+
+    def resume(self, torrent):
+        """Queue resuming a torrent"""
+        self.pending["resume"][torrent.hash] = True
+
+    def recheck(self, torrent):
+        """Queue rechecking a torrent"""
+        self.pending["recheck"][torrent.hash] = True
+
+    def _set_category(self, category, hashes):
+        try:
+            self.client.torrents_set_category(category=category, torrent_hashes=hashes)
+        except Conflict409Error:
+            save_path = self.category_save_paths.get(category)
+            ex = logger.print_line(
+                f'Existing category "{category}" not found for save path {save_path}, category will be created.',
+                self.config.loglevel,
+            )
+            self.config.notify(ex, "Update Category", False)
+            try:
+                self.client.torrent_categories.create_category(name=category, save_path=save_path)
+            except Conflict409Error:
+                # Created in the meantime by a concurrent chunk of the same category
+                pass
+            self.client.torrents_set_category(category=category, torrent_hashes=hashes)
+
+    def _send(self, operation, request):
+        value, hashes = request
+        if operation == "category":
+            self._set_category(value, hashes)
+        elif operation == "auto_management":
+            self.client.torrents_set_auto_management(enable=value, torrent_hashes=hashes)
+        elif operation == "remove_tags":
+            self.client.torrents_remove_tags(tags=sorted(value), torrent_hashes=hashes)
+        elif operation == "add_tags":
+            self.client.torrents_add_tags(tags=sorted(value), torrent_hashes=hashes)
+        elif operation == "share_limits":
+            ratio_limit, seeding_time_limit, inactive_seeding_time_limit = value
+            self.client.torrents_set_share_limits(
+                ratio_limit=ratio_limit,
+                seeding_time_limit=seeding_time_limit,
+                inactive_seeding_time_limit=inactive_seeding_time_limit,
+                torrent_hashes=hashes,
+            )
+        elif operation == "upload_limit":
+            self.client.torrents_set_upload_limit(limit=value, torrent_hashes=hashes)
+        elif operation == "resume":
+            self.client.torrents_start(torrent_hashes=hashes)
+        elif operation == "recheck":
+            self.client.torrents_recheck(torrent_hashes=hashes)
+
+    def flush(self):
+        """
+        Send the queued writes to qBittorrent and clear the queue.
+        Returns the set of torrent hashes whose writes failed.
+        """
+        failed_hashes = set()
+        if not len(self):
+            return failed_hashes
+        start_time = time.time()
+        request_count = 0
+        pending = self.pending
+        self.pending = {operation: {} for operation in self.OPERATIONS}
+        for operation in self.OPERATIONS:
+            groups = {}  # value -> list of hashes in the order they were queued
+            for t_hash, value in pending[operation].items():
+                if isinstance(value, set):
+                    if not value:
+                        continue
+                    value = frozenset(value)
+                groups.setdefault(value, []).append(t_hash)
+            requests = [
+                (value, hashes[idx : idx + self.CHUNK_SIZE])
+                for value, hashes in groups.items()
+                for idx in range(0, len(hashes), self.CHUNK_SIZE)
+            ]
+            request_count += len(requests)
+            for (_, hashes), _, ex in self.qbt.execute_concurrently(partial(self._send, operation), requests):
+                if ex is not None:
+                    failed_hashes.update(hashes)
+                    err = f"Qbittorrent Error: Unable to apply {operation} to {len(hashes)} torrents: {ex}"
+                    self.config.notify(err, "Torrent Update", False)
+                    logger.error(err)
+        self.category_save_paths = {}
+        logger.debug(f"Flushed queued torrent writes in {request_count} requests in {time.time() - start_time:.2f} seconds")
+        return failed_hashes
+
+
+class QbtSession:
+    """
+    qBittorrent client kept alive between runs for the same host and credentials.
+    Reusing it keeps the auth cookie and the pooled HTTP connections, qbittorrent-api logs in again by itself
+    when qBittorrent answers 403. The Web API version is cached per application version.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.app_version = None
+        self.web_api_version = None
+
+    def get_versions(self):
+        """Return the application and Web API versions of qBittorrent"""
+        app_version = self.client.app_version()
+        if app_version != self.app_version:
+            self.app_version = app_version
+            self.web_api_version = self.client.app_web_api_version()
+        return self.app_version, self.web_api_version
+
+
+# Warm qBittorrent sessions keyed by (host, username, password) so scheduled runs skip the login
+CLIENT_SESSIONS = {}
+
+
 class Qbt:
     """
     Qbittorrent Class
@@ -35,22 +561,34 @@ class Qbt:
         self.host = params["host"]
         self.username = params["username"]
         self.password = params["password"]
+        self.max_concurrent_requests = self.config.settings["max_concurrent_api_requests"]
         logger.secret(self.username)
         logger.secret(self.password)
         logger.debug(f"Host: {self.host}")
         ex = ""
+        session_key = (self.host, self.username, self.password)
         try:
-            self.client = Client(
-                host=self.host,
-                username=self.username,
-                password=self.password,
-                VERIFY_WEBUI_CERTIFICATE=False,
-                REQUESTS_ARGS={"timeout": (45, 60)},
-            )
-            self.client.auth_log_in()
-            self.current_version = self.client.app.version
+            self.session = CLIENT_SESSIONS.get(session_key)
+            if self.session is None:
+                client = Client(
+                    host=self.host,
+                    username=self.username,
+                    password=self.password,
+                    VERIFY_WEBUI_CERTIFICATE=False,
+                    REQUESTS_ARGS={"timeout": (45, 60)},
+                    HTTPADAPTER_ARGS={
+                        "pool_connections": self.max_concurrent_requests,
+                        "pool_maxsize": self.max_concurrent_requests,
+                    },
+                )
+                client.auth_log_in()
+                self.session = QbtSession(client)
+            else:
+                logger.debug("Reusing existing qBittorrent session")
+            self.client = self.session.client
+            self.current_version, web_api_version = self.session.get_versions()
             logger.info(f"qBittorrent: {self.current_version}")
-            logger.info(f"qBittorrent Web API: {self.client.app.web_api_version}")
+            logger.info(f"qBittorrent Web API: {web_api_version}")
             logger.info(f"qbit_manage supported versions: {self.MIN_SUPPORTED_VERSION} - {self.SUPPORTED_VERSION}")
             if self.current_version < self.MIN_SUPPORTED_VERSION:
                 ex = (
@@ -75,39 +613,38 @@ class Qbt:
                     logger.print_line(ex, "CRITICAL")
                     sys.exit(1)
             logger.info("Qbt Connection Successful")
+            CLIENT_SESSIONS[session_key] = self.session
+            self.sync_store = SYNC_STORES.setdefault((self.host, self.username), TorrentSyncStore())
+            self.write_queue = TorrentWriteQueue(self)
         except LoginFailed:
+            CLIENT_SESSIONS.pop(session_key, None)
             ex = "Qbittorrent Error: Failed to login. Invalid username/password."
             self.config.notify(ex, "Qbittorrent")
             raise Failed(ex)
         except APIConnectionError as exc:
+            CLIENT_SESSIONS.pop(session_key, None)
             self.config.notify(exc, "Qbittorrent")
             raise Failed(exc) from ConnectionError(exc)
         except Exception as exc:
+            CLIENT_SESSIONS.pop(session_key, None)
             self.config.notify(exc, "Qbittorrent")
             raise Failed(exc)
-        self.torrent_list = self.get_torrents({"sort": "added_on"})
-        self.torrentfiles = {}  # a map of torrent files to track cross-seeds
+        self.snapshot = None
+        self.torrent_list = self.fetch_torrents({"sort": "added_on"})
+        self.snapshot = TorrentSnapshot(self.torrent_list)
+        self.cross_seed_index = CrossSeedIndex()  # files of all torrents to track cross-seeds
+        self.torrent_trackers = {}  # torrent hash -> prefetched trackers
+        self.torrent_files = {}  # torrent hash -> prefetched files
+        # Hashes whose files were read from the persistent file cache and not yet checked against qBittorrent this run
+        self.cached_file_hashes = set()
+        self.file_cache = self.open_file_cache()
 
-        if (
-            self.config.commands["share_limits"]
-            and self.config.settings["disable_qbt_default_share_limits"]
-            and self.client.app.preferences.max_ratio_act != 0
-        ):
-            logger.info("Disabling qBittorrent default share limits to allow qbm to manage share limits.")
-            # max_ratio_act: 0 = Pause Torrent, 1 = Remove Torrent, 2 = superseeding, 3 = Remove Torrent and Files
-            self.client.app_set_preferences(
-                {
-                    "max_ratio_act": 0,
-                    "max_seeding_time_enabled": False,
-                    "max_ratio_enabled": False,
-                    "max_inactive_seeding_time_enabled": False,
-                }
-            )
+        self.read_preferences()
 
-        self.global_max_ratio_enabled = self.client.app.preferences.max_ratio_enabled
-        self.global_max_ratio = self.client.app.preferences.max_ratio
-        self.global_max_seeding_time_enabled = self.client.app.preferences.max_seeding_time_enabled
-        self.global_max_seeding_time = self.client.app.preferences.max_seeding_time
+        self.tracker_matcher = TrackerMatcher(config.data.get("tracker") or ())
+        self.tracker_rules = {}  # tracker keyword -> (tags, cat, notifiarr) read from the config
+        self.tracker_other = None  # (tags, notifiarr) of the "other" tracker keyword
+        self.category_resolver = None  # built on the first get_category call
 
         if any(config.commands.get(command, False) for command in self.TORRENT_DICT_COMMANDS):
             # Get an updated torrent dictionary information of the torrents
@@ -116,9 +653,9 @@ class Qbt:
             self.torrentinfo = None
             self.torrentissue = None
             self.torrentvalid = None
-        self.get_tags = cache(self.get_tags)
-        self.get_category = cache(self.get_category)
         self.get_category_save_paths = cache(self.get_category_save_paths)
+        # Save paths of torrents deleted with their contents, pruned of empty directories once the command is done
+        self.empty_dir_candidates = set()
 
     def get_torrent_info(self):
         """
@@ -151,7 +688,15 @@ class Qbt:
                 self.config.loglevel,
             )
         logger.separator("Gathering Torrent Information", space=True, border=True)
-        for torrent in self.torrent_list:
+        auto_tmm_forced = False
+        torrent_list = self.torrent_list
+        hashes = self.config.args.get("hashes")
+        # Orphan detection needs the files of every torrent, other commands only look at the requested torrents
+        if hashes and not self.config.commands.get("rem_orphaned"):
+            torrent_list = self.get_related_torrents(hashes)
+            logger.info(f"Gathering information for {len(torrent_list)} torrents related to the {len(hashes)} requested hashes")
+        self.prefetch_torrent_details(torrent_list)
+        for torrent in torrent_list:
             is_complete = False
             msg = None
             status = None
@@ -165,15 +710,16 @@ class Qbt:
                 # check whether the torrent has a matching tag to ignore force_auto_tmm.
                 and not any(tag in torrent.tags for tag in self.config.settings.get("force_auto_tmm_ignore_tags", []))
             ):
-                torrent.set_auto_management(True)
+                self.write_queue.set_auto_management(torrent, True)
+                auto_tmm_forced = True
             try:
                 torrent_name = torrent.name
                 torrent_hash = torrent.hash
                 torrent_is_complete = torrent.state_enum.is_complete
                 save_path = torrent.save_path
                 category = torrent.category
-                torrent_trackers = torrent.trackers
-                self.add_torrent_files(torrent_hash, torrent.files, save_path)
+                torrent_trackers = self.get_torrent_trackers(torrent)
+                self.add_torrent_files(torrent_hash, self.get_torrent_files(torrent), save_path)
             except Exception as ex:
                 self.config.notify(ex, "Get Torrent Info", False)
                 logger.warning(ex)
@@ -222,22 +768,251 @@ class Qbt:
                 "is_complete": is_complete,
             }
             self.torrentinfo[torrent_name] = torrentattr
+        if auto_tmm_forced:
+            # Enable Auto Torrent Management in multi-hash requests before the commands run
+            self.write_queue.flush()
+            self.invalidate_snapshot()
 
-    def add_torrent_files(self, torrent_hash, torrent_files, save_path):
-        """Process torrent files by adding the hash to the appropriate torrent_files list.
-        Example structure:
-        torrent_files = {
-            "folder1/file1.txt": {"original": torrent_hash1, "cross_seed": ["torrent_hash2", "torrent_hash3"]},
-            "folder1/file2.txt": {"original": torrent_hash1, "cross_seed": ["torrent_hash2"]},
-            "folder2/file1.txt": {"original": torrent_hash2, "cross_seed": []},
-        }
+    def read_preferences(self):
         """
-        for file in torrent_files:
-            full_path = os.path.join(save_path, file.name)
-            if full_path not in self.torrentfiles:
-                self.torrentfiles[full_path] = {"original": torrent_hash, "cross_seed": []}
+        Read the global share limits from the application preferences, disabling qBittorrent's default share limits
+        if configured. The preferences are read once per run so changes made in qBittorrent are picked up by the next run.
+        """
+        preferences = self.client.app_preferences()
+        if (
+            self.config.commands["share_limits"]
+            and self.config.settings["disable_qbt_default_share_limits"]
+            and preferences.max_ratio_act != 0
+        ):
+            logger.info("Disabling qBittorrent default share limits to allow qbm to manage share limits.")
+            # max_ratio_act: 0 = Pause Torrent, 1 = Remove Torrent, 2 = superseeding, 3 = Remove Torrent and Files
+            self.client.app_set_preferences(
+                {
+                    "max_ratio_act": 0,
+                    "max_seeding_time_enabled": False,
+                    "max_ratio_enabled": False,
+                    "max_inactive_seeding_time_enabled": False,
+                }
+            )
+            preferences = self.client.app_preferences()
+        self.global_max_ratio_enabled = preferences.max_ratio_enabled
+        self.global_max_ratio = preferences.max_ratio
+        self.global_max_seeding_time_enabled = preferences.max_seeding_time_enabled
+        self.global_max_seeding_time = preferences.max_seeding_time
+
+    def open_file_cache(self):
+        """Open the persistent torrent file cache and drop the entries of deleted torrents"""
+        try:
+            file_cache = TorrentFileCache(self.config.default_dir, self.host)
+            file_cache.evict({torrent.hash for torrent in self.torrent_list})
+            return file_cache
+        except CACHE_ERRORS as ex:
+            logger.warning(f"Unable to use the torrent file cache, torrent files will be requested from qBittorrent: {ex}")
+            return None
+
+    def get_related_torrents(self, hashes):
+        """
+        Get the requested torrents together with the torrents that can share files with them:
+        torrents with the same name or a content path equal to, inside or containing one of the requested torrents.
+        """
+        hashes = {t_hash.lower() for t_hash in hashes}
+        requested = [torrent for torrent in self.torrent_list if torrent.hash in hashes]
+        names = {torrent.name for torrent in requested}
+        content_paths = {os.path.normpath(torrent.content_path) for torrent in requested}
+
+        def is_related(torrent):
+            if torrent.hash in hashes or torrent.name in names:
+                return True
+            content_path = os.path.normpath(torrent.content_path)
+            return any(
+                content_path == path or content_path.startswith(path + os.sep) or path.startswith(content_path + os.sep)
+                for path in content_paths
+            )
+
+        return [torrent for torrent in self.torrent_list if is_related(torrent)]
+
+    def prefetch_torrent_details(self, torrent_list):
+        """
+        Fetch the trackers and files of every torrent concurrently over a bounded worker pool.
+        qbittorrent-api issues one request per torrent for each of these, so fetching them in parallel
+        (reusing the pooled connections of the client session) removes the sequential N+1 request pattern.
+        File lists found in the persistent file cache are not requested again.
+        """
+        pending = [torrent for torrent in torrent_list if torrent.hash not in self.torrent_trackers]
+        if not pending:
+            return
+        start_time = time.time()
+        cached_files = {}
+        if self.file_cache is not None:
+            for torrent in pending:
+                files = self.file_cache.get(torrent)
+                if files is not None:
+                    cached_files[torrent.hash] = files
+        new_files = []  # (torrent, files) pairs to add to the file cache
+
+        def fetch_details(torrent):
+            trackers = self.client.torrents_trackers(torrent_hash=torrent.hash)
+            files = cached_files.get(torrent.hash)
+            if files is None:
+                files = self.client.torrents_files(torrent_hash=torrent.hash)
+                new_files.append((torrent, files))
+            return trackers, files
+
+        for torrent, result, ex in self.execute_concurrently(fetch_details, pending):
+            if ex is not None:
+                # Torrents that fail here are fetched again on demand by get_torrent_trackers/get_torrent_files
+                logger.debug(f"Unable to prefetch torrent details: {ex}")
+                continue
+            self.torrent_trackers[torrent.hash], self.torrent_files[torrent.hash] = result
+            if torrent.hash in cached_files:
+                self.cached_file_hashes.add(torrent.hash)
+        self.update_file_cache(new_files)
+        logger.debug(
+            f"Fetched trackers and files for {len(pending)} torrents ({len(cached_files)} file lists from cache) "
+            f"in {time.time() - start_time:.2f} seconds"
+        )
+
+    def prefetch_torrent_trackers(self, torrent_list):
+        """
+        Fetch the trackers of the torrents not prefetched yet concurrently, like prefetch_torrent_details.
+        Used by the commands that only need the trackers of their torrents, such as cat_update and tag_update.
+        """
+        pending = [torrent for torrent in torrent_list if torrent.hash not in self.torrent_trackers]
+        if not pending:
+            return
+        start_time = time.time()
+        for torrent, trackers, ex in self.execute_concurrently(
+            lambda torrent: self.client.torrents_trackers(torrent_hash=torrent.hash), pending
+        ):
+            if ex is not None:
+                # Torrents that fail here are fetched again on demand by get_torrent_trackers
+                logger.debug(f"Unable to prefetch torrent trackers: {ex}")
+                continue
+            self.torrent_trackers[torrent.hash] = trackers
+        logger.debug(f"Fetched trackers for {len(pending)} torrents in {time.time() - start_time:.2f} seconds")
+
+    def execute_concurrently(self, func, items):
+        """
+        Call func for every item over a worker pool bounded by the max_concurrent_api_requests setting.
+        Yields (item, result, exception) tuples as the calls complete and calls the remaining items sequentially
+        when no more worker threads can be started. Every item is called exactly once.
+        """
+        items = list(items)
+        lock = threading.Lock()
+        claimed = set()
+        outcomes = {}  # item index -> (result, exception)
+        yielded = set()
+
+        def run(idx):
+            # A work item whose submit failed may still be picked up by a running worker, so items are claimed first
+            with lock:
+                if idx in claimed:
+                    return
+                claimed.add(idx)
+            try:
+                outcomes[idx] = (func(items[idx]), None)
+            except Exception as ex:
+                outcomes[idx] = (None, ex)
+
+        def outcome(idx):
+            yielded.add(idx)
+            result, ex = outcomes[idx]
+            return items[idx], result, ex
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+            futures = {}
+            try:
+                for idx in range(len(items)):
+                    futures[executor.submit(run, idx)] = idx
+            except RuntimeError as e:
+                if "can't start new thread" not in str(e):
+                    raise
+                logger.warning("Thread creation failed, falling back to sequential qBittorrent requests")
+            for future in as_completed(futures):
+                idx = futures[future]
+                if idx in outcomes:
+                    yield outcome(idx)
+            for idx in range(len(items)):
+                run(idx)
+                if idx in outcomes and idx not in yielded:
+                    yield outcome(idx)
+        # Items taken by a worker after their submit failed have finished once the pool is shut down
+        for idx in range(len(items)):
+            if idx in outcomes and idx not in yielded:
+                yield outcome(idx)
+
+    def get_torrent_trackers(self, torrent):
+        """Get the trackers of a torrent, using the prefetched result when available"""
+        if torrent.hash not in self.torrent_trackers:
+            self.torrent_trackers[torrent.hash] = torrent.trackers
+        return self.torrent_trackers[torrent.hash]
+
+    def get_torrent_files(self, torrent):
+        """Get the files of a torrent from the prefetched result, the persistent file cache or qBittorrent"""
+        files = self.torrent_files.get(torrent.hash)
+        if files is None:
+            files = self.file_cache.get(torrent) if self.file_cache is not None else None
+            if files is None:
+                files = torrent.files
+                self.update_file_cache([(torrent, files)])
             else:
-                self.torrentfiles[full_path]["cross_seed"].append(torrent_hash)
+                self.cached_file_hashes.add(torrent.hash)
+            self.torrent_files[torrent.hash] = files
+        return files
+
+    def refresh_torrent_files(self, torrent_list):
+        """
+        Fetch the files of the torrents whose file list was read from the persistent file cache again.
+        Renaming a file inside a multi-file torrent does not change any field of the torrent, so cached file lists
+        are checked against qBittorrent before files are moved or deleted based on them.
+        Returns the hashes of the torrents whose file list changed.
+        """
+        pending = [torrent for torrent in torrent_list if torrent.hash in self.cached_file_hashes]
+        if not pending:
+            return set()
+        changed = set()
+        fresh_files = []
+        for torrent, files, ex in self.execute_concurrently(
+            lambda torrent: self.client.torrents_files(torrent_hash=torrent.hash), pending
+        ):
+            if ex is not None:
+                logger.debug(f"Unable to refresh the files of {torrent.name}: {ex}")
+                continue
+            self.cached_file_hashes.discard(torrent.hash)
+            cached = self.torrent_files.get(torrent.hash)
+            if cached is None or [file.name for file in cached] != [file.name for file in files]:
+                changed.add(torrent.hash)
+                fresh_files.append((torrent, files))
+            self.torrent_files[torrent.hash] = files
+        self.update_file_cache(fresh_files)
+        if changed:
+            logger.debug(f"File lists of {len(changed)} torrents changed since they were cached")
+            self.rebuild_cross_seed_index()
+        return changed
+
+    def rebuild_cross_seed_index(self):
+        """Rebuild the cross-seed index of the indexed torrents from their current file lists"""
+        indexed = self.cross_seed_index.torrent_file_ids
+        if not indexed:
+            return
+        cross_seed_index = CrossSeedIndex()
+        for torrent in self.torrent_list:
+            if torrent.hash in indexed:
+                cross_seed_index.add_torrent(torrent.hash, torrent.save_path, self.get_torrent_files(torrent))
+        self.cross_seed_index = cross_seed_index
+
+    def update_file_cache(self, torrent_files):
+        """Store newly fetched file lists in the persistent file cache"""
+        if self.file_cache is None or not torrent_files:
+            return
+        try:
+            self.file_cache.set(torrent_files)
+        except CACHE_ERRORS as ex:
+            logger.warning(f"Unable to update the torrent file cache: {ex}")
+
+    def add_torrent_files(self, torrent_hash, torrent_files, save_path):
+        """Add the files of a torrent to the cross-seed index"""
+        self.cross_seed_index.add_torrent(torrent_hash, save_path, torrent_files)
 
     def is_cross_seed(self, torrent):
         """Check if the torrent is a cross seed if it has one or more files that are cross seeded."""
@@ -246,59 +1021,114 @@ class Qbt:
         if torrent.downloaded != 0:
             logger.trace(f"Torrent: {t_name} [Hash: {t_hash}] is not a cross seeded torrent. Download is > 0.")
             return False
-        cross_seed = True
-        for file in torrent.files:
-            full_path = os.path.join(torrent.save_path, file.name)
-            if self.torrentfiles[full_path]["original"] == t_hash or t_hash not in self.torrentfiles[full_path]["cross_seed"]:
-                logger.trace(f"File: [{full_path}] is found in Torrent: {t_name} [Hash: {t_hash}] as the original torrent")
-                cross_seed = False
-                break
-            elif self.torrentfiles[full_path]["original"] is None:
-                cross_seed = False
-                break
+        cross_seed = self.cross_seed_index.is_cross_seed(t_hash)
         logger.trace(f"Torrent: {t_name} [Hash: {t_hash}] {'is' if cross_seed else 'is not'} a cross seed torrent.")
         return cross_seed
 
     def has_cross_seed(self, torrent):
         """Check if the torrent has a cross seed"""
-        cross_seed = False
-        t_hash = torrent.hash
-        t_name = torrent.name
-        for file in torrent.files:
-            full_path = os.path.join(torrent.save_path, file.name)
-            if len(self.torrentfiles[full_path]["cross_seed"]) > 0:
-                logger.trace(f"{full_path} has cross seeds: {self.torrentfiles[full_path]['cross_seed']}")
-                cross_seed = True
-                break
-        logger.trace(f"Torrent: {t_name} [Hash: {t_hash}] {'has' if cross_seed else 'has no'} cross seeds.")
+        # Decides whether the content files are deleted, so cached file lists of the torrents sharing files are checked
+        if self.cached_file_hashes:
+            self.refresh_torrent_files(self.get_related_torrents([torrent.hash]))
+        cross_seed = self.cross_seed_index.has_cross_seed(torrent.hash)
+        logger.trace(f"Torrent: {torrent.name} [Hash: {torrent.hash}] {'has' if cross_seed else 'has no'} cross seeds.")
         return cross_seed
 
     def remove_torrent_files(self, torrent):
-        """Update the torrent_files list after a torrent is deleted"""
-        torrent_hash = torrent.hash
-        for file in torrent.files:
-            full_path = os.path.join(torrent.save_path, file.name)
-            if self.torrentfiles[full_path]["original"] == torrent_hash:
-                if len(self.torrentfiles[full_path]["cross_seed"]) > 0:
-                    self.torrentfiles[full_path]["original"] = self.torrentfiles[full_path]["cross_seed"].pop(0)
-                    logger.trace(f"Updated {full_path} original to {self.torrentfiles[full_path]['original']}")
-                else:
-                    self.torrentfiles[full_path]["original"] = None
-            else:
-                if torrent_hash in self.torrentfiles[full_path]["cross_seed"]:
-                    self.torrentfiles[full_path]["cross_seed"].remove(torrent_hash)
-                    logger.trace(f"Removed {torrent_hash} from {full_path} cross seeds")
-                    logger.trace(f"{full_path} original: {self.torrentfiles[full_path]['original']}")
-                    logger.trace(f"{full_path} cross seeds: {self.torrentfiles[full_path]['cross_seed']}")
+        """Update the cross-seed index after a torrent is deleted"""
+        self.cross_seed_index.remove_torrent(torrent.hash)
 
     def get_torrents(self, params):
-        """Get torrents from qBittorrent"""
+        """
+        Get torrents for the current run.
+        Filters supported by TorrentSnapshot are answered from the run-scoped snapshot, which is fetched again
+        only after invalidate_snapshot(). Other filters are requested from qBittorrent and update the snapshot.
+        """
+        if TorrentSnapshot.supports(params):
+            if self.snapshot is None:
+                self.snapshot = TorrentSnapshot(self.fetch_torrents({"sort": "added_on"}))
+            return self.snapshot.get_torrents(**params)
+        torrent_list = self.fetch_torrents(params)
+        if self.snapshot is not None:
+            self.snapshot.update(torrent_list)
+        return torrent_list
+
+    def invalidate_snapshot(self):
+        """Drop the torrent snapshot so the next get_torrents call fetches the current state"""
+        self.snapshot = None
+
+    def fetch_torrents(self, params):
+        """
+        Get torrents from qBittorrent.
+        Filters supported by TorrentSyncStore are answered from the maindata mirror after applying the latest delta,
+        any other filter falls back to a full torrents/info request.
+        """
+        if self.sync_store.supports(params):
+            try:
+                self.sync_store.sync(self.client)
+                return self.sync_store.get_torrents(self.client, **params)
+            except Exception as ex:
+                logger.debug(f"Unable to use sync/maindata, falling back to torrents/info: {ex}")
+                self.sync_store.reset()
         return self.client.torrents.info(**params)
 
     def get_tracker_urls(self, trackers):
         """Get tracker urls from torrent"""
         return tuple(x.url for x in trackers if x.url.startswith(("http", "udp", "ws")))
 
+    def get_tracker_rule(self, tag_url):
+        """Get the tags, category and notifiarr indexer of a tracker keyword, read from the config on first use"""
+        rule = self.tracker_rules.get(tag_url)
+        if rule is None:
+            tags = self.config.util.check_for_attribute(
+                self.config.data, "tag", parent="tracker", subparent=tag_url, default=tag_url, var_type="list"
+            )
+            cat = self.config.util.check_for_attribute(
+                self.config.data,
+                "cat",
+                parent="tracker",
+                subparent=tag_url,
+                default_is_none=True,
+                var_type="str",
+                save=False,
+                do_print=False,
+            )
+            if tags == [tag_url]:
+                self.config.data["tracker"][tag_url]["tag"] = [tag_url]
+            if isinstance(tags, str):
+                tags = [tags]
+            notifiarr = self.config.util.check_for_attribute(
+                self.config.data,
+                "notifiarr",
+                parent="tracker",
+                subparent=tag_url,
+                default_is_none=True,
+                do_print=False,
+                save=False,
+            )
+            rule = self.tracker_rules[tag_url] = (tags, cat, notifiarr)
+        return rule
+
+    def get_tracker_other(self):
+        """Get the tags and notifiarr indexer of the "other" tracker keyword, read from the config on first use"""
+        if self.tracker_other is None:
+            tags = self.config.util.check_for_attribute(
+                self.config.data, "tag", parent="tracker", subparent="other", default_is_none=True, var_type="list", save=False
+            )
+            notifiarr = None
+            if tags:
+                notifiarr = self.config.util.check_for_attribute(
+                    self.config.data,
+                    "notifiarr",
+                    parent="tracker",
+                    subparent="other",
+                    default_is_none=True,
+                    do_print=False,
+                    save=False,
+                )
+            self.tracker_other = (tags, notifiarr)
+        return self.tracker_other
+
     def get_tags(self, urls):
         """Get tags from config file based on keyword"""
         urls = list(urls)
@@ -307,9 +1137,9 @@ class Qbt:
         tracker["cat"] = None
         tracker["notifiarr"] = None
         tracker["url"] = None
-        tracker_other_tag = self.config.util.check_for_attribute(
-            self.config.data, "tag", parent="tracker", subparent="other", default_is_none=True, var_type="list", save=False
-        )
+        tracker_other_tag, tracker_other_notifiarr = self.get_tracker_other()
+        # Lists are copied, the config values are shared by every torrent
+        tracker_other_tag = list(tracker_other_tag) if tracker_other_tag else tracker_other_tag
         try:
             tracker["url"] = util.trunc_val(urls[0], "/")
         except IndexError as e:
@@ -323,57 +1153,16 @@ class Qbt:
                 logger.debug(f"Tracker Url:{urls}")
                 logger.debug(e)
         if "tracker" in self.config.data and self.config.data["tracker"] is not None:
-            tag_values = self.config.data["tracker"]
-            for tag_url, tag_details in tag_values.items():
-                for url in urls:
-                    if tag_url in url:
-                        if tracker["url"] is None:
-                            default_tag = tracker_other_tag
-                        else:
-                            try:
-                                tracker["url"] = util.trunc_val(url, "/")
-                                default_tag = tracker["url"].split("/")[2].split(":")[0]
-                            except IndexError as e:
-                                logger.debug(f"Tracker Url:{url}")
-                                logger.debug(e)
-                        tracker["tag"] = self.config.util.check_for_attribute(
-                            self.config.data, "tag", parent="tracker", subparent=tag_url, default=tag_url, var_type="list"
-                        )
-                        tracker["cat"] = self.config.util.check_for_attribute(
-                            self.config.data,
-                            "cat",
-                            parent="tracker",
-                            subparent=tag_url,
-                            default_is_none=True,
-                            var_type="str",
-                            save=False,
-                            do_print=False,
-                        )
-                        if tracker["tag"] == [tag_url]:
-                            self.config.data["tracker"][tag_url]["tag"] = [tag_url]
-                        if isinstance(tracker["tag"], str):
-                            tracker["tag"] = [tracker["tag"]]
-                        tracker["notifiarr"] = self.config.util.check_for_attribute(
-                            self.config.data,
-                            "notifiarr",
-                            parent="tracker",
-                            subparent=tag_url,
-                            default_is_none=True,
-                            do_print=False,
-                            save=False,
-                        )
-                        return tracker
+            tag_url, url = self.tracker_matcher.match(urls)
+            if tag_url is not None:
+                if tracker["url"] is not None:
+                    tracker["url"] = util.trunc_val(url, "/")
+                tags, tracker["cat"], tracker["notifiarr"] = self.get_tracker_rule(tag_url)
+                tracker["tag"] = list(tags) if isinstance(tags, list) else tags
+                return tracker
             if tracker_other_tag:
                 tracker["tag"] = tracker_other_tag
-                tracker["notifiarr"] = self.config.util.check_for_attribute(
-                    self.config.data,
-                    "notifiarr",
-                    parent="tracker",
-                    subparent="other",
-                    default_is_none=True,
-                    do_print=False,
-                    save=False,
-                )
+                tracker["notifiarr"] = tracker_other_notifiarr
                 return tracker
         if tracker["url"]:
             logger.trace(f"tracker url: {tracker['url']}")
@@ -390,6 +1179,8 @@ class Qbt:
                 self.config.data["tracker"][default_tag]["tag"] = [default_tag]
             except Exception:
                 self.config.data["tracker"][default_tag] = {"tag": [default_tag]}
+            # Later torrents of this tracker match the keyword added to the config
+            self.tracker_matcher.add(default_tag)
             e = f"No tags matched for {tracker['url']}. Please check your config.yml file. Setting tag to {default_tag}"
             self.config.notify(e, "Tag", False)
             logger.warning(e)
@@ -400,25 +1191,23 @@ class Qbt:
         category = []
         path = os.path.join(path, "")
         if "cat" in self.config.data and self.config.data["cat"] is not None:
-            cat_path = self.config.data["cat"]
-            for cat, save_path in cat_path.items():
+            if self.category_resolver is None:
                 try:
-                    if cat == "Uncategorized" and isinstance(save_path, CommentedSeq):
-                        if any(os.path.join(p, "") == path or fnmatch(path, p) for p in save_path):
-                            category.append(cat)
-                    elif os.path.join(save_path, "") == path or fnmatch(path, save_path):
-                        category.append(cat)
-                except TypeError:
-                    e = f"Invalid configuration for category {cat}. Check your config.yml file."
+                    self.category_resolver = CategoryResolver(self.config.data["cat"])
+                except TypeError as ex:
+                    e = str(ex)
                     self.config.notify(e, "Category", True)
                     logger.print_line(e, "CRITICAL")
                     sys.exit(1)
+            category = self.category_resolver.resolve(path)
 
         if not category:
             default_cat = path.split(os.sep)[-2]
             category = [default_cat]
             self.config.util.check_for_attribute(self.config.data, default_cat, parent="cat", default=path)
             self.config.data["cat"][str(default_cat)] = path
+            # Rebuilt on the next call, so later torrents in this save path match the category added to the config
+            self.category_resolver = None
             e = f"No categories matched for the save path {path}. Check your config.yml file. - Setting category to {default_cat}"
             self.config.notify(e, "Category", False)
             logger.warning(e)
@@ -436,12 +1225,17 @@ class Qbt:
         save_paths.add(self.config.remote_dir)
         return list(save_paths)
 
+    def remove_empty_directories(self):
+        """Remove the empty directories left in the save paths of the torrents deleted by tor_delete_recycle"""
+        if self.empty_dir_candidates:
+            removed = util.remove_empty_directories(self.empty_dir_candidates, self.get_category_save_paths())
+            self.config.fs_inventory.invalidate(removed)
+            self.empty_dir_candidates.clear()
+
     def tor_delete_recycle(self, torrent, info):
         """Move torrent to recycle bin"""
-        try:
-            self.remove_torrent_files(torrent)
-        except ValueError:
-            logger.debug(f"Torrent {torrent.name} has already been removed from torrent files.")
+        self.refresh_torrent_files([torrent])
+        self.remove_torrent_files(torrent)
 
         tor_files = []
 
@@ -450,7 +1244,7 @@ class Qbt:
             info_hash = torrent.hash
             save_path = util.path_replace(torrent.save_path, self.config.root_dir, self.config.remote_dir)
             # Define torrent files/folders
-            for file in torrent.files:
+            for file in self.get_torrent_files(torrent):
                 tor_files.append(os.path.join(save_path, file.name))
             return info_hash, save_path
 
@@ -458,6 +1252,8 @@ class Qbt:
         if result is None:  # Error occurred and was handled
             return
         info_hash, save_path = result
+        # The torrent's files are moved or deleted, their directories are listed again by the next walk
+        self.config.fs_inventory.invalidate(tor_files)
 
         if self.config.recyclebin["enabled"]:
             if self.config.recyclebin["split_by_category"]:
@@ -481,6 +1277,7 @@ class Qbt:
                 if torrent_exportable and os.path.isdir(torrent_export_path) is False:
                     os.makedirs(torrent_export_path)
                 torrent_json_file = os.path.join(torrents_json_path, f"{torrent_name}.json")
+                recycled_files = [torrent_json_file]
                 torrent_json = util.load_json(torrent_json_file)
                 if not torrent_json:
                     logger.info(f"Saving Torrent JSON file to {torrent_json_file}")
@@ -503,12 +1300,14 @@ class Qbt:
                         self.config.notify(ex, "Deleting Torrent", False)
                         logger.warning(f"RecycleBin Warning: {ex}")
                     dot_torrent_files.append(os.path.basename(truncated_torrent_export_file))
+                    recycled_files.append(truncated_torrent_export_file)
                 # Exporting torrent via torrent directory (backwards compatibility)
                 for file in os.listdir(self.config.torrents_dir):
                     if file.startswith(info_hash):
                         dot_torrent_files.append(file)
                         try:
                             util.copy_files(os.path.join(self.config.torrents_dir, file), os.path.join(torrent_path, file))
+                            recycled_files.append(os.path.join(torrent_path, file))
                         except Exception as ex:
                             logger.stacktrace()
                             self.config.notify(ex, "Deleting Torrent", False)
@@ -539,6 +1338,7 @@ class Qbt:
                 logger.debug("")
                 logger.debug(f"JSON: {torrent_json}")
                 util.save_json(torrent_json, torrent_json_file)
+                self.config.fs_inventory.invalidate(recycled_files)
             if info["torrents_deleted_and_contents"] is True:
                 logger.separator(f"Moving {len(tor_files)} files to RecycleBin", space=False, border=False, loglevel="DEBUG")
                 if len(tor_files) == 1:
@@ -550,36 +1350,42 @@ class Qbt:
                     f"{util.path_replace(recycle_path, self.config.remote_dir, self.config.root_dir)}"
                 )
 
-                # Move files from torrent contents to Recycle bin
+                # Move files from torrent contents to Recycle bin, all moves are started before any is awaited
+                pending_moves = []
                 for file in tor_files:
                     src = file
                     dest = os.path.join(recycle_path, util.path_replace(file, self.config.remote_dir, ""))
                     # Move files and change date modified
                     try:
-                        to_delete = util.move_files(src, dest, True)
+                        pending_moves.append((util.start_move(src, dest, True), src, dest))
                     except FileNotFoundError:
                         ex = logger.print_line(f"RecycleBin Warning - FileNotFound: No such file or directory: {src} ", "WARNING")
                         self.config.notify(ex, "Deleting Torrent", False)
                     # Add src file to orphan exclusion since sometimes deleting files are slow in certain environments
-                    exclude_file = util.path_replace(src, self.config.remote_dir, self.config.root_dir)
-                    if exclude_file not in self.config.orphaned["exclude_patterns"]:
-                        self.config.orphaned["exclude_patterns"].append(exclude_file)
+                    self.config.orphaned["exclude_files"].add(
+                        util.path_replace(src, self.config.remote_dir, self.config.root_dir)
+                    )
+                for future, src, dest in pending_moves:
+                    to_delete = util.finish_move(future, src, dest)
+                self.config.fs_inventory.invalidate(dest for _, _, dest in pending_moves)
                 # Delete torrent and files
                 torrent.delete(delete_files=to_delete)
-                # Remove any empty directories
-                util.remove_empty_directories(save_path, self.get_category_save_paths())
+                # Empty directories are removed by remove_empty_directories once every torrent was deleted
+                self.empty_dir_candidates.add(save_path)
             else:
                 torrent.delete(delete_files=False)
         else:
             if info["torrents_deleted_and_contents"] is True:
                 for file in tor_files:
                     # Add src file to orphan exclusion since sometimes deleting files are slow in certain environments
-                    exclude_file = util.path_replace(file, self.config.remote_dir, self.config.root_dir)
-                    if exclude_file not in self.config.orphaned["exclude_patterns"]:
-                        self.config.orphaned["exclude_patterns"].append(exclude_file)
+                    self.config.orphaned["exclude_files"].add(
+                        util.path_replace(file, self.config.remote_dir, self.config.root_dir)
+                    )
                 torrent.delete(delete_files=True)
             else:
                 torrent.delete(delete_files=False)
+        if self.snapshot is not None:
+            self.snapshot.remove(torrent.hash)
         try:
             if torrent in self.torrent_list:
                 self.torrent_list.remove(torrent)
@@ -1,5 +1,6 @@
 """Utility functions for qBit Manage."""
 
+import errno
 import glob
 import json
 import logging
@@ -8,10 +9,17 @@ import platform
 import re
 import shutil
 import signal
+import stat
 import sys
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
 from concurrent.futures import ThreadPoolExecutor
-from fnmatch import fnmatch
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
+from fnmatch import translate
+from functools import lru_cache
 from pathlib import Path
 
 import requests
@@ -71,9 +79,40 @@ def get_list(data, lower=False, split=True, int_list=False, upper=False):
         return [d.strip() for d in str(data).split(",")]
 
 
+# Distinct tag strings seen by a run, the same strings repeat across torrents and tag checks
+TAG_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=TAG_CACHE_SIZE)
+def parse_tags(torrent_tags):
+    """Return the tags of a comma separated torrent tags string, in order"""
+    return tuple(tag.strip() for tag in torrent_tags.split(","))
+
+
+@lru_cache(maxsize=TAG_CACHE_SIZE)
+def parse_tag_set(torrent_tags):
+    """Return the set of tags of a comma separated torrent tags string"""
+    return frozenset(parse_tags(torrent_tags))
+
+
+@lru_cache(maxsize=TAG_CACHE_SIZE)
+def find_tags(check_tags, torrent_tags):
+    """Return the tags of a torrent tags string containing one of check_tags, once per matching check tag"""
+    return tuple(tag for tag in parse_tags(torrent_tags) for ctag in check_tags if ctag in tag)
+
+
 def is_tag_in_torrent(check_tag, torrent_tags, exact=True):
     """Check if tag is in torrent_tags"""
-    tags = get_list(torrent_tags)
+    if isinstance(torrent_tags, str):
+        # Torrent tags strings are split once, the results of later checks are served from the caches
+        if exact:
+            tags = parse_tag_set(torrent_tags)
+        elif isinstance(check_tag, (str, list)):
+            return list(find_tags((check_tag,) if isinstance(check_tag, str) else tuple(check_tag), torrent_tags))
+        else:
+            return None
+    else:
+        tags = get_list(torrent_tags)
     if isinstance(check_tag, str):
         if exact:
             return check_tag in tags
@@ -887,82 +926,113 @@ def trunc_val(stg, delm, num=3):
     return val
 
 
-def move_files(src, dest, mod=False):
-    """Move files from source to destination, mod variable is to change the date modified of the file being moved"""
+# Timeout of a single move, copy or delete, after which the operation is reported and left running in the background
+FILE_OPERATION_TIMEOUT = 300.0
+_io_workers = 8
+_io_executor = None
+_io_executor_lock = threading.Lock()
 
-    dest_path = os.path.dirname(dest)
-    to_delete = False
-    if os.path.isdir(dest_path) is False:
-        os.makedirs(dest_path, exist_ok=True)
 
-    # Use ThreadPoolExecutor for timeout protection without thread exhaustion
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        try:
-            # Submit move operation with timeout
-            future = executor.submit(_move_file_operation, src, dest, mod)
-            result = future.result(timeout=300.0)  # 5 minute timeout for file operations
-            to_delete = result
+def set_io_workers(workers):
+    """Set the size of the file operation pool, from the max_concurrent_file_operations setting"""
+    global _io_workers, _io_executor
+    with _io_executor_lock:
+        if workers == _io_workers:
+            return
+        _io_workers = workers
+        if _io_executor is not None:
+            # Operations already submitted finish on the previous pool
+            _io_executor.shutdown(wait=False)
+            _io_executor = None
 
-        except TimeoutError:
-            logger.warning(f"Timeout moving file (permission issue?): {src} -> {dest}")
-            return to_delete
 
-        except PermissionError as perm:
-            logger.warning(f"{perm} : Copying files instead.")
+def get_io_executor():
+    """Return the process-wide worker pool used for file moves and deletes"""
+    global _io_executor
+    with _io_executor_lock:
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(max_workers=_io_workers, thread_name_prefix="file_io")
+        return _io_executor
 
-            try:
-                # Use the existing copy_files function
-                copy_files(src, dest)
 
-            except Exception as ex:
-                logger.stacktrace()
-                logger.error(ex)
-                return to_delete
+def submit_file_operation(func, *args):
+    """Submit a file operation to the shared I/O pool, the returned future is awaited with FILE_OPERATION_TIMEOUT"""
+    return submit_or_run(get_io_executor(), func, *args)
 
-            if os.path.isfile(src):
-                logger.warning(f"Removing original file: {src}")
 
-                try:
-                    # Submit remove operation with timeout
-                    future = executor.submit(_remove_file_operation, src)
-                    future.result(timeout=300.0)
+def start_move(src, dest, mod=False):
+    """Create the destination folder and start moving a file on the I/O pool, see finish_move"""
+    dest_path = os.path.dirname(dest)
+    if os.path.isdir(dest_path) is False:
+        os.makedirs(dest_path, exist_ok=True)
+    return submit_file_operation(_move_file_operation, src, dest, mod)
+
+
+def finish_move(future, src, dest):
+    """Wait for a move started by start_move, copying the file instead if it cannot be moved"""
+    to_delete = False
+    try:
+        to_delete = future.result(timeout=FILE_OPERATION_TIMEOUT)
+
+    except FutureTimeoutError:
+        logger.warning(f"Timeout moving file (permission issue?): {src} -> {dest}")
+        return to_delete
 
-                except TimeoutError:
-                    logger.warning(f"Timeout removing original file (permission issue?): {src}")
-                except OSError as e:
-                    logger.warning(f"Error: {e.filename} - {e.strerror}.")
+    except PermissionError as perm:
+        logger.warning(f"{perm} : Copying files instead.")
 
-            to_delete = True
+        try:
+            # Use the existing copy_files function
+            copy_files(src, dest)
 
-        except FileNotFoundError as file:
-            logger.warning(f"{file} : source: {src} -> destination: {dest}")
         except Exception as ex:
             logger.stacktrace()
             logger.error(ex)
+            return to_delete
+
+        if os.path.isfile(src):
+            logger.warning(f"Removing original file: {src}")
+
+            try:
+                # Submit remove operation with timeout
+                submit_file_operation(_remove_file_operation, src).result(timeout=FILE_OPERATION_TIMEOUT)
+
+            except FutureTimeoutError:
+                logger.warning(f"Timeout removing original file (permission issue?): {src}")
+            except OSError as e:
+                logger.warning(f"Error: {e.filename} - {e.strerror}.")
+
+        to_delete = True
+
+    except FileNotFoundError as file:
+        logger.warning(f"{file} : source: {src} -> destination: {dest}")
+    except Exception as ex:
+        logger.stacktrace()
+        logger.error(ex)
 
     return to_delete
 
 
-def delete_files(file_path):
-    """Try to delete the file directly with timeout protection."""
+def start_delete(file_path):
+    """Start deleting a file on the I/O pool, see finish_delete"""
+    return submit_file_operation(_remove_file_operation, file_path)
 
-    # Use ThreadPoolExecutor for timeout protection without thread exhaustion
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        try:
-            # Submit delete operation with timeout
-            future = executor.submit(_remove_file_operation, file_path)
-            future.result(timeout=300.0)  # 5 minute timeout for file operations
 
-        except TimeoutError:
-            logger.warning(f"Timeout deleting file (permission issue?): {file_path}")
-            return
+def finish_delete(future, file_path):
+    """Wait for a delete submitted to the I/O pool"""
+    try:
+        future.result(timeout=FILE_OPERATION_TIMEOUT)
 
-        except FileNotFoundError as e:
-            logger.warning(f"File not found: {e.filename} - {e.strerror}.")
-        except PermissionError as e:
-            logger.warning(f"Permission denied: {e.filename} - {e.strerror}.")
-        except OSError as e:
-            logger.error(f"Error deleting file: {e.filename} - {e.strerror}.")
+    except FutureTimeoutError:
+        logger.warning(f"Timeout deleting file (permission issue?): {file_path}")
+        return
+
+    except FileNotFoundError as e:
+        logger.warning(f"File not found: {e.filename} - {e.strerror}.")
+    except PermissionError as e:
+        logger.warning(f"Permission denied: {e.filename} - {e.strerror}.")
+    except OSError as e:
+        logger.error(f"Error deleting file: {e.filename} - {e.strerror}.")
 
 
 def copy_files(src, dest):
@@ -977,12 +1047,48 @@ def copy_files(src, dest):
         logger.error(ex)
 
 
+def _copy_file_range(src, dest):
+    """
+    Copy a file inside the kernel with copy_file_range, falling back to shutil.copyfile (which uses sendfile on Linux)
+    where copy_file_range is unavailable or not supported between the two filesystems.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining <= 0:
+                return
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF):
+                raise
+    shutil.copyfile(src, dest)
+
+
 def _move_file_operation(src, dest, mod):
     """Internal function for move operation."""
     if mod is True:
         mod_time = time.time()
         os.utime(src, (mod_time, mod_time))
-    shutil.move(src, dest)
+    try:
+        # Same filesystem: a rename does not touch the file data
+        os.rename(src, dest)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            shutil.move(src, dest)
+            return True
+        if os.path.islink(src):
+            # Recreate the link like shutil.move instead of copying the data it points to
+            os.symlink(os.readlink(src), dest)
+            os.unlink(src)
+            return True
+        _copy_file_range(src, dest)
+        shutil.copystat(src, dest)
+        os.remove(src)
     return True
 
 
@@ -991,68 +1097,94 @@ def _remove_file_operation(src):
     os.remove(src)
 
 
-def remove_empty_directories(pathlib_root_dir, excluded_paths=None, exclude_patterns=[]):
-    """Remove empty directories recursively with optimized performance."""
-    pathlib_root_dir = Path(pathlib_root_dir)
-
-    # Early return for non-existent paths
-    if not pathlib_root_dir.exists():
-        return
-
-    # Optimize excluded paths handling
-    excluded_paths_set = set()
-    if excluded_paths is not None:
-        excluded_paths_set = {Path(p).resolve() for p in excluded_paths}
-
-    # Pre-compile exclude patterns for better performance
-    compiled_patterns = []
-    for pattern in exclude_patterns:
-        # Convert to regex for faster matching
-
-        regex_pattern = fnmatch.translate(pattern)
-        compiled_patterns.append(re.compile(regex_pattern))
-
-    # Cache directory checks to avoid redundant operations
-    directories_to_check = []
-
-    # Collect all directories in single pass
-    for root, dirs, files in os.walk(pathlib_root_dir, topdown=False):
-        root_path = Path(root).resolve()
+def remove_empty_directories(directories, protected_paths=None, exclude_patterns=()):
+    """
+    Remove the empty directories below each of the given directories, the directories included, in one bottom-up pass.
+    Directories below another given directory are covered by its walk, so every subtree is walked once.
+    Protected paths and directories matching an exclude pattern (matched with a trailing separator) are kept.
+    Returns the paths of the removed directories.
+    """
+    protected = {os.path.realpath(path) for path in protected_paths or ()}
+    exclude = ExcludeMatcher(exclude_patterns)
+    roots = {os.path.realpath(directory) for directory in directories}
+
+    def below_other_root(path):
+        parent = os.path.dirname(path)
+        while parent != path:
+            if parent in roots:
+                return True
+            path, parent = parent, os.path.dirname(parent)
+        return False
 
-        # Skip excluded paths efficiently
-        if excluded_paths_set and root_path in excluded_paths_set:
-            continue
+    top_roots = [root for root in sorted(roots) if not below_other_root(root)]
 
-        # Check exclude patterns efficiently
-        if compiled_patterns:
-            root_str = str(root_path) + os.sep
-            if any(pattern.match(root_str) for pattern in compiled_patterns):
+    removed = set()
+    for top_root in top_roots:
+        for dir_path, dir_names, file_names in os.walk(top_root, topdown=False):
+            # A directory is empty once all of its subdirectories were removed, symlinks to directories are never removed
+            if file_names or dir_path in protected or any(os.path.join(dir_path, name) not in removed for name in dir_names):
                 continue
+            if exclude.match(os.path.join(dir_path, "")):
+                continue
+            try:
+                os.rmdir(dir_path)
+                removed.add(dir_path)
+            except PermissionError as perm:
+                logger.warning(f"{perm} : Unable to delete folder {dir_path} as it has permission issues. Skipping...")
+            except OSError:
+                # Directory not empty - expected
+                pass
+    logger.debug(f"Removed {len(removed)} empty directories below {len(top_roots)} directories")
+    return removed
 
-        # Only add directories that might be empty (no files)
-        if not files:
-            directories_to_check.append(root_path)
 
-    # Remove empty directories in batch
-    removed_dirs = set()
-    for dir_path in directories_to_check:
-        try:
-            os.rmdir(dir_path)
-            removed_dirs.add(dir_path)
-        except PermissionError as perm:
-            logger.warning(f"{perm} : Unable to delete folder {dir_path} as it has permission issues. Skipping...")
-        except OSError:
-            # Directory not empty - expected
-            pass
+class ExcludeMatcher:
+    """
+    Orphan exclude patterns compiled into a single regular expression, with the same semantics as fnmatch.
+    Patterns without wildcards, like the files of deleted torrents, are kept in a set and matched by lookup.
+    """
 
-    # Attempt root directory removal if it's now empty
-    if not excluded_paths_set or pathlib_root_dir.resolve() not in excluded_paths_set:
-        try:
-            pathlib_root_dir.rmdir()
-        except PermissionError as perm:
-            logger.warning(f"{perm} : Unable to delete root folder {pathlib_root_dir} as it has permission issues. Skipping...")
-        except OSError:
-            pass
+    WILDCARDS = ("*", "?", "[")
+
+    def __init__(self, patterns=(), paths=()):
+        self.paths = {os.path.normcase(path) for path in paths}
+        self.globs = []
+        for pattern in patterns:
+            self.add(pattern)
+        self._compiled = False
+
+    def add(self, pattern):
+        """Add an exclude pattern"""
+        pattern = os.path.normcase(pattern)
+        if any(wildcard in pattern for wildcard in self.WILDCARDS):
+            if pattern not in self.globs:
+                self.globs.append(pattern)
+                self._compiled = False
+        else:
+            self.paths.add(pattern)
+
+    def compile(self):
+        """Compile the patterns, a directory is excluded when a pattern ending in * matches a prefix of its path"""
+        self._regex = re.compile("|".join(translate(pattern) for pattern in self.globs)) if self.globs else None
+        # translate() anchors the end with \Z, without it match() succeeds on any matching prefix
+        dir_patterns = [translate(pattern.rstrip("*")).removesuffix(r"\Z") for pattern in self.globs if pattern.endswith("*")]
+        self._dir_regex = re.compile("|".join(dir_patterns)) if dir_patterns else None
+        self._compiled = True
+
+    def match(self, path):
+        """Return True if the path is excluded"""
+        path = os.path.normcase(path)
+        if path in self.paths:
+            return True
+        if not self._compiled:
+            self.compile()
+        return self._regex is not None and self._regex.match(path) is not None
+
+    def excludes_dir(self, directory):
+        """Return True if every path below the directory is excluded"""
+        if not self._compiled:
+            self.compile()
+        return self._dir_regex is not None and self._dir_regex.match(os.path.join(os.path.normcase(directory), "")) is not None
 
 
 class CheckHardLinks:
@@ -1060,41 +1192,61 @@ class CheckHardLinks:
     Class to check for hardlinks
     """
 
-    def __init__(self, config):
+    def __init__(self, config, verdict_cache=None):
         self.root_dir = config.root_dir
         self.remote_dir = config.remote_dir
         self.orphaned_dir = config.orphaned_dir if config.orphaned_dir else ""
         self.recycle_dir = config.recycle_dir if config.recycle_dir else ""
-        self.root_files = set(
-            get_root_files(self.root_dir, self.remote_dir)
-            + get_root_files(self.orphaned_dir, "")
-            + get_root_files(self.recycle_dir, "")
-        )
-        self.get_inode_count()
+        self.inventory = config.fs_inventory
+        self.verdict_cache = verdict_cache
+        # Only built once a torrent has to be evaluated, runs served from the verdict cache never walk the directories
+        self.root_files = None
+        self.inode_count = None
 
     def get_inode_count(self):
+        """Count the links of every inode in the root, orphaned and recycle bin directories"""
+        self.root_files = set(iter_root_files(self.root_dir, self.remote_dir, inventory=self.inventory))
+        self.root_files.update(iter_root_files(self.orphaned_dir, "", inventory=self.inventory))
+        self.root_files.update(iter_root_files(self.recycle_dir, "", inventory=self.inventory))
         self.inode_count = {}
         for file in self.root_files:
-            # Only check hardlinks for files that are symlinks
-            if os.path.isfile(file) and os.path.islink(file):
+            try:
+                file_path = path_replace(file, self.root_dir, self.remote_dir)
+                # Symlinks do not share the inode of their target
+                if stat.S_ISLNK(self.inventory.lstat(file_path).st_mode):
+                    continue
+                file_stat = self.inventory.stat(file_path)
+            except PermissionError as perm:
+                logger.warning(f"{perm} : file {file} has permission issues. Skipping...")
+                continue
+            except FileNotFoundError as file_not_found_error:
+                logger.warning(f"{file_not_found_error} : File {file} not found. Skipping...")
                 continue
+            except Exception as ex:
+                logger.stacktrace()
+                logger.error(ex)
+                continue
+            inode_no = file_stat.st_ino
+            if inode_no in self.inode_count:
+                self.inode_count[inode_no] += 1
             else:
-                try:
-                    inode_no = os.stat(path_replace(file, self.root_dir, self.remote_dir)).st_ino
-                except PermissionError as perm:
-                    logger.warning(f"{perm} : file {file} has permission issues. Skipping...")
-                    continue
-                except FileNotFoundError as file_not_found_error:
-                    logger.warning(f"{file_not_found_error} : File {file} not found. Skipping...")
-                    continue
-                except Exception as ex:
-                    logger.stacktrace()
-                    logger.error(ex)
-                    continue
-                if inode_no in self.inode_count:
-                    self.inode_count[inode_no] += 1
-                else:
-                    self.inode_count[inode_no] = 1
+                self.inode_count[inode_no] = 1
+
+    def has_hardlinks(self, file_stat, ignore_root_dir):
+        """
+        Check if a file has hard links.
+
+        Args:
+            file_stat (os.stat_result): The stat result of the file.
+            ignore_root_dir (bool): Whether to ignore the hard links inside the root directory.
+
+        Returns:
+            bool: True if the file has hard links, False otherwise.
+        """
+        if ignore_root_dir:
+            return file_stat.st_nlink - self.inode_count.get(file_stat.st_ino, 1) > 0
+        else:
+            return file_stat.st_nlink > 1
 
     def nohardlink(self, file, notify, ignore_root_dir):
         """
@@ -1103,70 +1255,93 @@ class CheckHardLinks:
         If a folder is passed, it will take the largest file in that folder and only check for hardlinks
         of the remaining files where the file is greater size a percentage of the largest file
         This fixes the bug in #192
+        Every path is stat'ed once through the run's filesystem inventory and the check stops at the first hardlink.
+        Verdicts are reused from the verdict cache while none of the checked files and folders changed.
         """
-
-        def has_hardlinks(self, file, ignore_root_dir):
-            """
-            Check if a file has hard links.
-
-            Args:
-                file (str): The path to the file.
-                ignore_root_dir (bool): Whether to ignore the root directory.
-
-            Returns:
-                bool: True if the file has hard links, False otherwise.
-            """
-            if ignore_root_dir:
-                return os.stat(file).st_nlink - self.inode_count.get(os.stat(file).st_ino, 1) > 0
-            else:
-                return os.stat(file).st_nlink > 1
-
+        if self.verdict_cache is not None:
+            verdict = self.verdict_cache.get(file, ignore_root_dir, self.inventory.lstat)
+            if verdict is not None:
+                logger.trace(f"Using stored hardlink verdict for {file}: {verdict}")
+                return verdict
         check_for_hl = True
+        # (path, stat result) of every file and folder the verdict depends on
+        members = []
         try:
-            if os.path.isfile(file):
-                if os.path.islink(file):
+            if self.inode_count is None:
+                self.get_inode_count()
+            try:
+                file_stat = self.inventory.stat(file)
+            except FileNotFoundError:
+                file_stat = None
+            if file_stat is not None and not stat.S_ISDIR(file_stat.st_mode):
+                if stat.S_ISLNK(self.inventory.lstat(file).st_mode):
                     logger.warning(f"Symlink found in {file}, unable to determine hardlinks. Skipping...")
                     return False
+                members.append((file, file_stat))
                 logger.trace(f"Checking file: {file}")
-                logger.trace(f"Checking file inum: {os.stat(file).st_ino}")
-                logger.trace(f"Checking no of hard links: {os.stat(file).st_nlink}")
-                logger.trace(f"Checking inode_count dict: {self.inode_count.get(os.stat(file).st_ino)}")
+                logger.trace(f"Checking file inum: {file_stat.st_ino}")
+                logger.trace(f"Checking no of hard links: {file_stat.st_nlink}")
+                logger.trace(f"Checking inode_count dict: {self.inode_count.get(file_stat.st_ino)}")
                 logger.trace(f"ignore_root_dir: {ignore_root_dir}")
                 # https://github.com/StuffAnThings/qbit_manage/issues/291 for more details
-                if has_hardlinks(self, file, ignore_root_dir):
+                if self.has_hardlinks(file_stat, ignore_root_dir):
                     logger.trace(f"Hardlinks found in {file}.")
                     check_for_hl = False
             else:
-                sorted_files = sorted(Path(file).rglob("*"), key=lambda x: os.stat(x).st_size, reverse=True)
+                # Folders inside an already walked tree are read from the inventory, others are walked directly
+                if self.inventory.find_tree(file) is not None:
+                    walker = self.inventory.walk(file)
+                else:
+                    walker = walk_tree(file, self.inventory.workers)
+                folder_files = []
+                found_symlink = False
+                largest_file = None
+                largest_file_size = 0
+                for path, names in walker:
+                    members.append((path, self.inventory.lstat(path)))
+                    for name in names:
+                        path_name = os.path.join(path, name)
+                        # Symlinks are recorded as links, the verdict does not depend on their target
+                        file_stat = self.inventory.lstat(path_name)
+                        members.append((path_name, file_stat))
+                        if stat.S_ISLNK(file_stat.st_mode):
+                            logger.warning(f"Symlink found in {path_name}, unable to determine hardlinks. Skipping...")
+                            found_symlink = True
+                            continue
+                        if not stat.S_ISREG(file_stat.st_mode):
+                            continue
+                        folder_files.append((path_name, file_stat))
+                        if largest_file is None or file_stat.st_size > largest_file_size:
+                            largest_file = path_name
+                            largest_file_size = file_stat.st_size
                 logger.trace(f"Folder: {file}")
-                logger.trace(f"Files Sorted by size: {sorted_files}")
                 threshold = 0.1
-                if not sorted_files:
-                    msg = (
-                        f"Nohardlink Error: Unable to open the folder {file}. "
-                        "Please make sure folder exists and qbit_manage has access to this directory."
-                    )
-                    notify(msg, "nohardlink")
-                    logger.warning(msg)
+                if not folder_files:
+                    if not found_symlink:
+                        msg = (
+                            f"Nohardlink Error: Unable to open the folder {file}. "
+                            "Please make sure folder exists and qbit_manage has access to this directory."
+                        )
+                        notify(msg, "nohardlink")
+                        logger.warning(msg)
+                        members = []
                 else:
-                    largest_file_size = os.stat(sorted_files[0]).st_size
-                    logger.trace(f"Largest file: {sorted_files[0]}")
+                    logger.trace(f"Largest file: {largest_file}")
                     logger.trace(f"Largest file size: {largest_file_size}")
-                    for files in sorted_files:
-                        if os.path.islink(files):
-                            logger.warning(f"Symlink found in {files}, unable to determine hardlinks. Skipping...")
+                    min_file_size = largest_file_size * threshold
+                    for path_name, file_stat in folder_files:
+                        if file_stat.st_size < min_file_size:
                             continue
-                        file_size = os.stat(files).st_size
-                        file_no_hardlinks = os.stat(files).st_nlink
-                        logger.trace(f"Checking file: {files}")
-                        logger.trace(f"Checking file inum: {os.stat(files).st_ino}")
-                        logger.trace(f"Checking file size: {file_size}")
-                        logger.trace(f"Checking no of hard links: {file_no_hardlinks}")
-                        logger.trace(f"Checking inode_count dict: {self.inode_count.get(os.stat(files).st_ino)}")
+                        logger.trace(f"Checking file: {path_name}")
+                        logger.trace(f"Checking file inum: {file_stat.st_ino}")
+                        logger.trace(f"Checking file size: {file_stat.st_size}")
+                        logger.trace(f"Checking no of hard links: {file_stat.st_nlink}")
+                        logger.trace(f"Checking inode_count dict: {self.inode_count.get(file_stat.st_ino)}")
                         logger.trace(f"ignore_root_dir: {ignore_root_dir}")
-                        if has_hardlinks(self, files, ignore_root_dir) and file_size >= (largest_file_size * threshold):
-                            logger.trace(f"Hardlinks found in {files}.")
+                        if self.has_hardlinks(file_stat, ignore_root_dir):
+                            logger.trace(f"Hardlinks found in {path_name}.")
                             check_for_hl = False
+                            break
         except PermissionError as perm:
             logger.warning(f"{perm} : file {file} has permission issues. Skipping...")
             return False
@@ -1177,19 +1352,313 @@ class CheckHardLinks:
             logger.stacktrace()
             logger.error(ex)
             return False
+        if self.verdict_cache is not None and members:
+            self.verdict_cache.set(file, ignore_root_dir, check_for_hl, members)
         return check_for_hl
 
 
-def get_root_files(root_dir, remote_dir, exclude_dir=None):
+DEFAULT_DIR_SCAN_WORKERS = 8
+
+
+def list_directory(path):
+    """Return the file names in a directory and the names of the subdirectories to descend into (symlinks excluded)"""
+    files = []
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                files.append(entry.name)
+            elif not entry.is_symlink():
+                subdirs.append(entry.name)
+    return files, subdirs
+
+
+def submit_or_run(executor, func, *args):
+    """Submit func to the executor, running it in the calling thread if a worker thread cannot be started"""
+    try:
+        return executor.submit(func, *args)
+    except RuntimeError:
+        future = Future()
+        try:
+            future.set_result(func(*args))
+        except Exception as ex:
+            future.set_exception(ex)
+        return future
+
+
+def map_concurrently(func, items, workers=DEFAULT_DIR_SCAN_WORKERS):
+    """Return [func(item) for item in items], computed over a pool of at most workers threads"""
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    executor = ThreadPoolExecutor(max_workers=min(workers, len(items)), thread_name_prefix="map_concurrently")
+    try:
+        futures = [submit_or_run(executor, func, item) for item in items]
+        return [future.result() for future in futures]
+    finally:
+        executor.shutdown(wait=True)
+
+
+def walk_tree(base_dir, workers=DEFAULT_DIR_SCAN_WORKERS, lister=list_directory, skip=None):
+    """
+    Yield (path, file names) for base_dir and every directory below it, in no particular order.
+    Directories are listed by a pool of workers that all take from the same queue of pending directories,
+    so listings are yielded while the rest of the tree is still being read.
+    Directories that cannot be listed are skipped like os.walk does, and directories matching skip are not descended.
+
+    Args:
+        base_dir (str): Directory to walk.
+        workers (int): Number of directories listed at the same time, 1 walks sequentially.
+        lister (callable): Function returning (file names, subdirectory names) of a directory.
+        skip (callable): Optional predicate returning True for directories to prune.
+    """
+
+    def scan(path):
+        try:
+            files, subdirs = lister(path)
+        except OSError:
+            return None
+        return path, files, [os.path.join(path, subdir) for subdir in subdirs if not (skip and skip(os.path.join(path, subdir)))]
+
+    if skip and skip(base_dir):
+        return
+    if workers <= 1:
+        stack = [base_dir]
+        while stack:
+            result = scan(stack.pop())
+            if result is None:
+                continue
+            stack.extend(result[2])
+            yield result[0], result[1]
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="walk_tree")
+
+    def submit(path):
+        return submit_or_run(executor, scan, path)
+
+    try:
+        pending = {submit(base_dir)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result is None:
+                    continue
+                # Queue the subdirectories before handing the listing to the caller to keep the workers busy
+                pending.update(submit(subdir) for subdir in result[2])
+                yield result[0], result[1]
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class FileSystemInventory:
     """
-    Get all files in root directory with optimized path handling and filtering.
+    Directory listings and file metadata read during one run, shared by the orphan scan, the hardlink checks and
+    the recycle bin/orphaned data cleanup. Each directory is listed once and each file is stat'ed at most once.
+    Directories pruned from a walk are remembered and listed by the first later walk that needs them.
+    Commands that move or delete files pass the changed paths to invalidate(), so only their directories are read again.
+    """
+
+    def __init__(self, workers=DEFAULT_DIR_SCAN_WORKERS):
+        self.workers = workers
+        self.trees = {}  # normalized base directory -> {directory path: file names}
+        self.roots = {}  # normalized base directory -> base directory path as walked, the key of its listing
+        self.pruned = {}  # normalized base directory -> directories below it pruned from the walk, not listed yet
+        self.stale = set()  # directories of the trees to list again, their files changed since they were listed
+        self.stats = {}  # file path -> os.stat result
+        self.lstats = {}  # file path -> os.lstat result
+        self.watcher = None  # fs_watcher.DirectoryWatcher serving a live listing of root_dir, if enabled
+
+    def find_tree_dirs(self, base_dir):
+        """Return the normalized base directories of the walked trees containing base_dir"""
+        base_dir = os.path.normpath(base_dir)
+        return [tree_dir for tree_dir in self.trees if base_dir == tree_dir or base_dir.startswith(os.path.join(tree_dir, ""))]
+
+    def find_tree_dir(self, base_dir):
+        """Return the normalized base directory of the first walked tree containing base_dir or None"""
+        return next(iter(self.find_tree_dirs(base_dir)), None)
+
+    def find_tree(self, base_dir):
+        """Return the walked tree containing base_dir or None"""
+        tree_dir = self.find_tree_dir(base_dir)
+        return None if tree_dir is None else self.trees[tree_dir]
+
+    @staticmethod
+    def recording_skip(skip, pruned):
+        """Wrap skip to add the directories it prunes to the pruned set"""
+        if skip is None:
+            return None
+
+        def record(path):
+            if skip(path):
+                pruned.add(path)
+                return True
+            return False
+
+        return record
+
+    def walk(self, base_dir, lister=list_directory, skip=None):
+        """
+        Yield (path, file names) for base_dir and every directory below it like walk_tree.
+        A tree walked before (or the live tree of the watcher) is filtered with skip instead of being walked again,
+        dropping the whole subtree of a skipped directory like walk_tree does. Its stale directories are listed again
+        and its pruned directories below base_dir are walked first.
+        Otherwise the directories matching skip are pruned from the walk and recorded, the tree is kept in both cases.
+        """
+        tree_dir = self.find_tree_dir(base_dir)
+        if tree_dir is None and self.watcher is not None:
+            tree = self.watcher.snapshot(base_dir)
+            if tree is not None:
+                tree_dir = os.path.normpath(self.watcher.base_dir)
+                self.trees[tree_dir] = tree
+                self.roots[tree_dir] = self.watcher.base_dir
+                self.pruned[tree_dir] = set()
+        if tree_dir is None:
+            tree = {}
+            pruned = set()
+            for path, files in walk_tree(base_dir, self.workers, lister, self.recording_skip(skip, pruned)):
+                tree[path] = files
+                yield path, files
+            tree_dir = os.path.normpath(base_dir)
+            self.trees[tree_dir] = tree
+            self.roots[tree_dir] = base_dir
+            self.pruned[tree_dir] = pruned
+            return
+        self.update(tree_dir, base_dir, skip)
+        tree = self.trees[tree_dir]
+        base_dir = os.path.normpath(base_dir)
+        prefix = os.path.join(base_dir, "")
+        skipped = {}  # directory path -> True if it or one of its parents below base_dir matches skip
+
+        def is_skipped(path):
+            result = skipped.get(path)
+            if result is None:
+                parent = os.path.dirname(path)
+                result = skip(path) or (os.path.normpath(path) != base_dir and parent != path and is_skipped(parent))
+                skipped[path] = result
+            return result
+
+        for path, files in tree.items():
+            if (path.startswith(prefix) or os.path.normpath(path) == base_dir) and not (skip and is_skipped(path)):
+                yield path, files
+
+    def update(self, tree_dir, base_dir, skip=None):
+        """List the stale directories of a tree again and walk its pruned directories needed by a walk of base_dir"""
+        tree = self.trees[tree_dir]
+        pruned = self.pruned[tree_dir]
+        tree_prefix = os.path.join(tree_dir, "")
+        stale = [path for path in self.stale if os.path.normpath(path) == tree_dir or path.startswith(tree_prefix)]
+        self.stale.difference_update(stale)
+        subdirs_of = {}  # directory listed again -> paths of its subdirectories
+        removed = set()
+        for path in stale:
+            if path not in tree:
+                continue
+            try:
+                files, subdirs = list_directory(path)
+            except OSError:
+                removed.add(path)
+                continue
+            tree[path] = files
+            subdirs_of[os.path.normpath(path)] = {os.path.join(path, subdir) for subdir in subdirs}
+        if subdirs_of:
+            # Subdirectories that disappeared are dropped with their subtree, new ones are walked like pruned ones
+            for path in tree:
+                subdir_paths = subdirs_of.get(os.path.dirname(path))
+                if subdir_paths is not None and path not in subdir_paths and os.path.normpath(path) != tree_dir:
+                    removed.add(path)
+            for subdir_paths in subdirs_of.values():
+                pruned.update(subdir for subdir in subdir_paths if subdir not in tree)
+        if removed:
+            prefixes = tuple(os.path.join(path, "") for path in removed)
+            for path in [path for path in tree if path in removed or path.startswith(prefixes)]:
+                del tree[path]
+            pruned.difference_update([path for path in pruned if path in removed or path.startswith(prefixes)])
+        base_dir = os.path.normpath(base_dir)
+        base_prefix = os.path.join(base_dir, "")
+        needed = [
+            path
+            for path in pruned
+            if os.path.normpath(path) == base_dir or path.startswith(base_prefix) or base_dir.startswith(os.path.join(path, ""))
+        ]
+        for path in needed:
+            pruned.discard(path)
+            for sub_path, files in walk_tree(path, self.workers, list_directory, self.recording_skip(skip, pruned)):
+                tree[sub_path] = files
+
+    def invalidate(self, paths):
+        """Forget the stat results of moved, created or deleted paths and list their directories again on the next walk"""
+        for path in paths:
+            self.stats.pop(path, None)
+            self.lstats.pop(path, None)
+            parent_dir = os.path.dirname(os.path.normpath(path))
+            for tree_dir in self.find_tree_dirs(parent_dir):
+                if self.watcher is not None and tree_dir == os.path.normpath(self.watcher.base_dir):
+                    # The watcher follows the changes, the next walk takes a new snapshot
+                    del self.trees[tree_dir], self.roots[tree_dir], self.pruned[tree_dir]
+                    continue
+                tree = self.trees[tree_dir]
+                directory = parent_dir
+                # The closest directory of the tree containing the path, new directories are found when it is listed again
+                while True:
+                    key = self.roots[tree_dir] if directory == tree_dir else directory
+                    if key in tree:
+                        self.stale.add(key)
+                        break
+                    if directory == tree_dir or key in self.pruned[tree_dir]:
+                        break
+                    directory = os.path.dirname(directory)
+
+    def stat(self, path):
+        """Return the cached os.stat result of a path (following symlinks), raising OSError like os.stat"""
+        result = self.stats.get(path)
+        if result is None:
+            link_stat = self.lstats.get(path)
+            # The lstat result of anything but a symlink is also its stat result
+            if link_stat is not None and not stat.S_ISLNK(link_stat.st_mode):
+                result = self.stats[path] = link_stat
+            else:
+                result = self.stats[path] = os.stat(path)
+        return result
+
+    def lstat(self, path):
+        """Return the cached os.lstat result of a path (not following symlinks), raising OSError like os.lstat"""
+        result = self.lstats.get(path)
+        if result is None:
+            result = self.lstats[path] = os.lstat(path)
+        return result
+
+    def clear(self):
+        """Forget all listings and stat results"""
+        self.trees = {}
+        self.roots = {}
+        self.pruned = {}
+        self.stale = set()
+        self.stats = {}
+        self.lstats = {}
+
+
+def iter_root_dirs(
+    root_dir, remote_dir, exclude_dir=None, dir_index=None, workers=DEFAULT_DIR_SCAN_WORKERS, inventory=None, exclude=None
+):
+    """
+    Yield (directory, file names) for every directory in root directory with optimized path handling and filtering.
 
     Windows/UNC-safe:
     - If remote_dir is empty or effectively the same as root_dir, walk root_dir directly.
     - Otherwise, walk remote_dir (the accessible path) and map paths back to the root_dir representation.
+
+    When a DirectoryIndex is given, directories whose mtime did not change since the last walk are read from the index.
+    When a FileSystemInventory is given, trees it already walked during this run are not walked again.
+    exclude is an optional predicate on directories in root_dir representation whose whole subtree is skipped.
     """
     if not root_dir:
-        return []
+        return
 
     # Normalize for robust equality checks across platforms (handles UNC vs local, slashes, case on Windows)
     try:
@@ -1205,7 +1674,7 @@ def get_root_files(root_dir, remote_dir, exclude_dir=None):
     # Determine which base directory to walk and validate it exists
     base_to_walk = root_dir if is_same_path else remote_dir
     if not base_to_walk or not os.path.isdir(base_to_walk):
-        return []
+        return
 
     # Build an exclude path in the correct namespace
     local_exclude_dir = None
@@ -1219,25 +1688,40 @@ def get_root_files(root_dir, remote_dir, exclude_dir=None):
             except Exception:
                 local_exclude_dir = None
 
-    root_files = []
+    def to_root_path(path):
+        return path if is_same_path else path_replace(path, remote_dir, root_dir)
 
-    if is_same_path:
-        # Fast path when paths are the same or remote_dir not provided
-        for path, subdirs, files in os.walk(base_to_walk):
-            if local_exclude_dir and os.path.normcase(local_exclude_dir) in os.path.normcase(path):
-                continue
-            for name in files:
-                root_files.append(os.path.join(path, name))
+    skip = None
+    if local_exclude_dir or exclude:
+        # Everything below an excluded directory also contains its path, so the whole subtree is pruned
+        norm_exclude_dir = os.path.normcase(local_exclude_dir) if local_exclude_dir else None
+
+        def skip(path):
+            root_path = to_root_path(path)
+            if norm_exclude_dir and norm_exclude_dir in os.path.normcase(root_path):
+                return True
+            return exclude is not None and exclude(root_path)
+
+    lister = list_directory
+    if dir_index is not None:
+        dir_index.load(base_to_walk)
+        lister = dir_index.list_directory
+
+    if inventory is not None:
+        walker = inventory.walk(base_to_walk, lister, skip)
     else:
-        # Walk the accessible remote_dir and convert to root_dir representation once per directory
-        for path, subdirs, files in os.walk(base_to_walk):
-            replaced_path = path_replace(path, remote_dir, root_dir)
-            if local_exclude_dir and os.path.normcase(local_exclude_dir) in os.path.normcase(replaced_path):
-                continue
-            for name in files:
-                root_files.append(os.path.join(replaced_path, name))
+        walker = walk_tree(base_to_walk, workers, lister, skip)
+
+    # Convert to root_dir representation once per directory
+    for path, files in walker:
+        yield to_root_path(path), files
+
 
-    return root_files
+def iter_root_files(root_dir, remote_dir, exclude_dir=None, dir_index=None, workers=DEFAULT_DIR_SCAN_WORKERS, inventory=None):
+    """Yield all files in root directory, see iter_root_dirs"""
+    for path, files in iter_root_dirs(root_dir, remote_dir, exclude_dir, dir_index, workers, inventory):
+        for name in files:
+            yield os.path.join(path, name)
 
 
 def load_json(file):
@@ -1639,6 +2123,20 @@ def execute_qbit_commands(qbit_manager, commands, stats, hashes=None):
     if "executed_commands" not in stats:
         stats["executed_commands"] = []
 
+    def refresh_snapshot(previous_total):
+        """Send the writes queued by the last command and invalidate the torrent snapshot if it changed torrents"""
+        queued_writes = len(qbit_manager.write_queue)
+        failed_hashes = qbit_manager.write_queue.flush()
+        if failed_hashes:
+            logger.warning(f"{len(failed_hashes)} torrents could not be updated, reloading torrent information from qBittorrent")
+        total = sum(value for value in stats.values() if isinstance(value, int))
+        stats_changed = previous_total is not None and total != previous_total and not qbit_manager.config.dry_run
+        if queued_writes or stats_changed:
+            qbit_manager.invalidate_snapshot()
+        return total
+
+    stats_total = refresh_snapshot(None)
+
     # Set Category
     if commands.get("cat_update"):
         if hashes is not None:
@@ -1656,6 +2154,8 @@ def execute_qbit_commands(qbit_manager, commands, stats, hashes=None):
         else:
             logger.warning("Category Update operation skipped due to API errors")
 
+    stats_total = refresh_snapshot(stats_total)
+
     # Set Tags
     if commands.get("tag_update"):
         if hashes is not None:
@@ -1669,6 +2169,8 @@ def execute_qbit_commands(qbit_manager, commands, stats, hashes=None):
         else:
             logger.warning("Tags Update operation skipped due to API errors")
 
+    stats_total = refresh_snapshot(stats_total)
+
     # Remove Unregistered Torrents and tag errors
     if commands.get("rem_unregistered") or commands.get("tag_tracker_error"):
         if hashes is not None:
@@ -1696,6 +2198,8 @@ def execute_qbit_commands(qbit_manager, commands, stats, hashes=None):
         else:
             logger.warning("Remove Unregistered Torrents operation skipped due to API errors")
 
+    stats_total = refresh_snapshot(stats_total)
+
     # Recheck Torrents
     if commands.get("recheck"):
         if hashes is not None:
@@ -1716,6 +2220,8 @@ def execute_qbit_commands(qbit_manager, commands, stats, hashes=None):
         else:
             logger.warning("Recheck Torrents operation skipped due to API errors")
 
+    stats_total = refresh_snapshot(stats_total)
+
     # Remove Orphaned Files
     if commands.get("rem_orphaned"):
         result = safe_execute_with_qbit_error_handling(lambda: RemoveOrphaned(qbit_manager).stats, "Remove Orphaned Files")
@@ -1749,6 +2255,8 @@ def execute_qbit_commands(qbit_manager, commands, stats, hashes=None):
         else:
             logger.warning("Tag NoHardLinks operation skipped due to API errors")
 
+    stats_total = refresh_snapshot(stats_total)
+
     # Set Share Limits
     if commands.get("share_limits"):
         if hashes is not None:
@@ -1771,3 +2279,5 @@ def execute_qbit_commands(qbit_manager, commands, stats, hashes=None):
             stats["executed_commands"].append("share_limits")
         else:
             logger.warning("Share Limits operation skipped due to API errors")
+
+    refresh_snapshot(stats_total)
@@ -389,6 +389,10 @@ class WebAPI:
         # Note: Lifespan events are now handled in the lifespan context manager above
 
     async def execute_for_config(self, args: dict, hashes: list[str]) -> dict:
+        """Execute commands for a specific config file in a worker thread so the event loop stays responsive."""
+        return await asyncio.to_thread(self._execute_for_config, args, hashes)
+
+    def _execute_for_config(self, args: dict, hashes: list[str]) -> dict:
         """Execute commands for a specific config file."""
         try:
             cfg = Config(self.default_dir, args)
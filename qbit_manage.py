@@ -243,6 +243,15 @@ parser.add_argument(
     default=False,
     help="If you would like to see what is gonna happen but not actually move/delete or tag/categorize anything.",
 )
+parser.add_argument(
+    "-fw",
+    "--fs-watcher",
+    dest="fs_watcher",
+    action="store_true",
+    default=False,
+    help="Keep a live listing of root_dir with inotify between runs (Linux, local filesystems only) "
+    "so orphan and hardlink checks do not walk it on every run.",
+)
 parser.add_argument(
     "-ll", "--log-level", dest="log_level", action="store", default="INFO", type=str, help="Change your log level."
 )
@@ -298,6 +307,7 @@ share_limits = get_arg("QBT_SHARE_LIMITS", args.share_limits, arg_bool=True)
 skip_cleanup = get_arg("QBT_SKIP_CLEANUP", args.skip_cleanup, arg_bool=True)
 skip_qb_version_check = get_arg("QBT_SKIP_QB_VERSION_CHECK", args.skip_qb_version_check, arg_bool=True)
 dry_run = get_arg("QBT_DRY_RUN", args.dry_run, arg_bool=True)
+fs_watcher = get_arg("QBT_FS_WATCHER", args.fs_watcher, arg_bool=True)
 log_level = get_arg("QBT_LOG_LEVEL", args.log_level)
 log_size = get_arg("QBT_LOG_SIZE", args.log_size, arg_int=True)
 log_count = get_arg("QBT_LOG_COUNT", args.log_count, arg_int=True)
@@ -341,6 +351,7 @@ for v in [
     "skip_cleanup",
     "skip_qb_version_check",
     "dry_run",
+    "fs_watcher",
     "log_level",
     "log_size",
     "log_count",
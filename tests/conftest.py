@@ -0,0 +1,14 @@
+import pytest
+
+from modules import util
+from modules.logs import MyLogger
+
+
+@pytest.fixture(scope="session", autouse=True)
+def qbm_logger(tmp_path_factory):
+    """Route util.logger to a MyLogger like qbit_manage.py does, so print_line/trace/stacktrace are available"""
+    log_dir = tmp_path_factory.mktemp("config")
+    logger = MyLogger("qBit Manage", "qbit_manage.log", "TRACE", str(log_dir), 100, "=", False, 1, 1)
+    util.logger.set_logger(logger)
+    yield logger
+    util.logger.set_logger(None)
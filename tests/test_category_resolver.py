@@ -0,0 +1,73 @@
+import itertools
+import os
+from fnmatch import fnmatch
+
+import pytest
+from ruamel.yaml import CommentedSeq
+
+from modules.qbittorrent import CategoryResolver
+
+CATEGORIES = {
+    "movies": "/data/torrents/Movies",
+    "movies-4k": "/data/torrents/Movies/4K/",
+    "tv": "/data/torrents/TV/*",
+    "tv-any": "/data/torrents/TV*",
+    "anime": "/data/torrents/[Aa]nime/*",
+    "music": "/data/torrents/Music?",
+    "cross-seed": "/data/torrents/cross-seed",
+    "duplicate": "/data/torrents/Movies",
+    "Uncategorized": CommentedSeq(["/data/torrents/Uncategorized", "/data/torrents/manual/*"]),
+}
+PATHS = [
+    "/data/torrents/Movies",
+    "/data/torrents/Movies/4K",
+    "/data/torrents/Movies/4K/Film",
+    "/data/torrents/TV",
+    "/data/torrents/TV/Show/Season 1",
+    "/data/torrents/TVShows",
+    "/data/torrents/anime/Show",
+    "/data/torrents/Anime/Show",
+    "/data/torrents/Music1",
+    "/data/torrents/Music",
+    "/data/torrents/cross-seed",
+    "/data/torrents/Uncategorized",
+    "/data/torrents/manual/x",
+    "/data/torrents/other",
+]
+
+
+def reference_categories(categories, path):
+    """Qbt.get_category as it ran os.path.join and fnmatch for every category of the config"""
+    category = []
+    for cat, save_path in categories.items():
+        if cat == "Uncategorized" and isinstance(save_path, CommentedSeq):
+            if any(os.path.join(p, "") == path or fnmatch(path, p) for p in save_path):
+                category.append(cat)
+        elif os.path.join(save_path, "") == path or fnmatch(path, save_path):
+            category.append(cat)
+    return category
+
+
+def test_matches_checking_every_category():
+    items = list(CATEGORIES.items())
+    for count in range(len(items) + 1):
+        for selected in itertools.combinations(items, count) if count < 3 else [items[:count]]:
+            categories = dict(selected)
+            resolver = CategoryResolver(categories)
+            for path in PATHS:
+                path = os.path.join(path, "")
+                assert resolver.resolve(path) == reference_categories(categories, path), (categories, path)
+
+
+def test_added_categories_are_resolved():
+    resolver = CategoryResolver(CATEGORIES)
+    assert resolver.resolve("/data/torrents/other/") == []
+    resolver.add("other", ["/data/torrents/other/"])
+    assert resolver.resolve("/data/torrents/other/") == ["other"]
+    resolver.add("other-glob", ["/data/torrents/oth*"])
+    assert resolver.resolve("/data/torrents/other/") == ["other", "other-glob"]
+
+
+def test_invalid_save_paths_raise_type_error():
+    with pytest.raises(TypeError):
+        CategoryResolver({"broken": None})
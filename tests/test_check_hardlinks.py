@@ -0,0 +1,113 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from modules import util
+from modules.persistent_cache import HardlinkVerdictCache
+
+
+@pytest.fixture
+def root(tmp_path):
+    """A root directory with hardlinks to a media directory outside of it and cross-seed style symlinks"""
+    root, media = tmp_path / "root", tmp_path / "media"
+    for directory in (root / "Movie", root / "Cross", media):
+        directory.mkdir(parents=True)
+    (root / "Movie" / "movie.mkv").write_bytes(b"m" * 1000)
+    os.link(root / "Movie" / "movie.mkv", media / "movie.mkv")
+    (media / "big.mkv").write_bytes(b"b" * 1000)
+    os.link(media / "big.mkv", media / "big copy.mkv")
+    (tmp_path / "single.mkv").write_bytes(b"s" * 1000)
+    # Symlinks inside a torrent folder, to a file inside the root and to a hardlinked file outside of it
+    os.symlink(root / "Movie" / "movie.mkv", root / "Cross" / "movie.mkv")
+    os.symlink(media / "big.mkv", root / "Cross" / "big.mkv")
+    (root / "Cross" / "extra.nfo").write_bytes(b"n" * 10)
+    # A single file torrent that is a symlink to a file without hardlinks
+    os.symlink(tmp_path / "single.mkv", root / "single.mkv")
+    return root
+
+
+def make_checker(root):
+    config = SimpleNamespace(root_dir=os.path.join(root, ""), remote_dir=os.path.join(root, ""), orphaned_dir="", recycle_dir="")
+    config.fs_inventory = util.FileSystemInventory()
+    return util.CheckHardLinks(config)
+
+
+def noop_notify(msg, function):
+    pass
+
+
+def test_symlinks_are_not_counted_in_the_root_inodes(root):
+    checker = make_checker(root)
+    checker.get_inode_count()
+    assert checker.inode_count[os.stat(root / "Movie" / "movie.mkv").st_ino] == 1
+    # The symlink to a file outside of the root does not count its target
+    assert os.stat(root / "Cross" / "big.mkv").st_ino not in checker.inode_count
+    # The hardlink outside of the root is still found when the links inside the root are ignored
+    assert checker.nohardlink(str(root / "Movie" / "movie.mkv"), noop_notify, True) is False
+
+
+def test_symlinks_in_a_torrent_folder_are_skipped(root):
+    # Only the regular file is checked, the hardlinked target of the larger symlink is ignored
+    assert make_checker(root).nohardlink(str(root / "Cross"), noop_notify, False) is True
+
+
+def test_symlinked_single_file_torrents_are_skipped(root):
+    assert make_checker(root).nohardlink(str(root / "single.mkv"), noop_notify, False) is False
+
+
+def make_cached_checker(root, cache_dir):
+    checker = make_checker(root)
+    checker.verdict_cache = HardlinkVerdictCache(str(cache_dir))
+    return checker
+
+
+def check_next_run(root, cache_dir, path):
+    """Return (verdict, whether it was computed) of a hardlink check in a new run reading the stored verdicts"""
+    checker = make_cached_checker(root, cache_dir)
+    verdict = checker.nohardlink(path, noop_notify, False)
+    checker.verdict_cache.save()
+    checker.verdict_cache.close()
+    # Stored verdicts are returned before the inode counts of the root directory are built
+    return verdict, checker.inode_count is not None
+
+
+def test_stored_verdicts_are_reused_while_members_are_unchanged(root, tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    movie = root / "Movie" / "movie.mkv"
+    os.remove(tmp_path / "media" / "movie.mkv")
+    assert check_next_run(root, cache_dir, str(root / "Movie")) == (True, True)
+    assert check_next_run(root, cache_dir, str(root / "Movie")) == (True, False)
+    # A new hardlink changes the link count
+    os.link(movie, tmp_path / "media" / "movie.mkv")
+    assert check_next_run(root, cache_dir, str(root / "Movie")) == (False, True)
+    assert check_next_run(root, cache_dir, str(root / "Movie")) == (False, False)
+    # A changed ctime, like a hardlink created and removed again
+    os.chmod(movie, 0o600)
+    assert check_next_run(root, cache_dir, str(root / "Movie")) == (False, True)
+    # A file replaced by another inode
+    os.remove(tmp_path / "media" / "movie.mkv")
+    replacement = root / "Movie" / "movie.tmp"
+    replacement.write_bytes(movie.read_bytes())
+    os.replace(replacement, movie)
+    assert check_next_run(root, cache_dir, str(root / "Movie")) == (True, True)
+    assert check_next_run(root, cache_dir, str(root / "Movie")) == (True, False)
+
+
+def test_verdicts_of_unchecked_paths_are_evicted(root, tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    checker = make_cached_checker(root, cache_dir)
+    checker.nohardlink(str(root / "Movie"), noop_notify, False)
+    checker.nohardlink(str(root / "Cross"), noop_notify, False)
+    checker.verdict_cache.save()
+    checker.verdict_cache.close()
+
+    checker = make_cached_checker(root, cache_dir)
+    checker.nohardlink(str(root / "Movie"), noop_notify, False)
+    checker.verdict_cache.save(evict=True)
+    checker.verdict_cache.close()
+    cache = HardlinkVerdictCache(str(cache_dir))
+    assert set(cache.entries) == {(str(root / "Movie"), False)}
+    cache.close()
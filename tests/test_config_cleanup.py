@@ -0,0 +1,55 @@
+import os
+import time
+
+from modules import util
+from modules.config import Config
+
+DAY = 60 * 60 * 24
+
+
+def make_config(dry_run=False):
+    config = Config.__new__(Config)
+    config.dry_run = dry_run
+    config.fs_inventory = util.FileSystemInventory()
+    return config
+
+
+def make_file(path, age_days):
+    path.write_text(path.name)
+    mtime = time.time() - age_days * DAY
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_expire_file_removes_only_expired_files(tmp_path):
+    now = time.time()
+    old, recent = make_file(tmp_path / "old.mkv", 10), make_file(tmp_path / "recent.mkv", 1)
+    config = make_config()
+    file_stat, days, error = config.expire_file(old, 7, now)
+    assert error is None and round(days) == 10 and file_stat.st_size == len("old.mkv")
+    assert not os.path.exists(old)
+    assert config.expire_file(recent, 7, now)[2] is None
+    assert os.path.exists(recent)
+
+
+def test_expire_file_keeps_files_in_dry_run(tmp_path):
+    old = make_file(tmp_path / "old.mkv", 10)
+    assert make_config(dry_run=True).expire_file(old, 7, time.time())[2] is None
+    assert os.path.exists(old)
+
+
+def test_expire_file_uses_the_symlink_target_age(tmp_path):
+    # The age of a symlink is the mtime of its target, like os.stat/getmtime
+    recent_target = make_file(tmp_path / "recent.mkv", 1)
+    link = tmp_path / "link.mkv"
+    os.symlink(recent_target, link)
+    old = time.time() - 10 * DAY
+    os.utime(link, (old, old), follow_symlinks=False)
+    _, days, error = make_config().expire_file(str(link), 7, time.time())
+    assert error is None and round(days) == 1
+    assert os.path.lexists(link)
+
+
+def test_expire_file_reports_missing_files(tmp_path):
+    file_stat, days, error = make_config().expire_file(str(tmp_path / "missing.mkv"), 7, time.time())
+    assert file_stat is None and days is None and isinstance(error, FileNotFoundError)
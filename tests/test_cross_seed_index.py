@@ -0,0 +1,83 @@
+import os
+import random
+
+from qbittorrentapi import TorrentFilesList
+
+from modules.qbittorrent import CrossSeedIndex
+
+
+class ReferenceTorrentFiles:
+    """The full path -> {"original", "cross_seed"} map Qbt.torrentfiles kept before CrossSeedIndex"""
+
+    def __init__(self):
+        self.torrentfiles = {}
+        self.files = {}
+
+    def add_torrent(self, torrent_hash, save_path, torrent_files):
+        self.files[torrent_hash] = [os.path.join(save_path, file.name) for file in torrent_files]
+        for full_path in self.files[torrent_hash]:
+            if full_path not in self.torrentfiles:
+                self.torrentfiles[full_path] = {"original": torrent_hash, "cross_seed": []}
+            else:
+                self.torrentfiles[full_path]["cross_seed"].append(torrent_hash)
+
+    def is_cross_seed(self, t_hash):
+        for full_path in self.files[t_hash]:
+            entry = self.torrentfiles[full_path]
+            if entry["original"] == t_hash or t_hash not in entry["cross_seed"]:
+                return False
+            elif entry["original"] is None:
+                return False
+        return True
+
+    def has_cross_seed(self, t_hash):
+        return any(len(self.torrentfiles[full_path]["cross_seed"]) > 0 for full_path in self.files[t_hash])
+
+    def remove_torrent(self, torrent_hash):
+        for full_path in self.files.pop(torrent_hash):
+            entry = self.torrentfiles[full_path]
+            if entry["original"] == torrent_hash:
+                entry["original"] = entry["cross_seed"].pop(0) if entry["cross_seed"] else None
+            elif torrent_hash in entry["cross_seed"]:
+                entry["cross_seed"].remove(torrent_hash)
+
+
+def files_list(names):
+    return TorrentFilesList([{"index": idx, "name": name, "size": 1} for idx, name in enumerate(names)])
+
+
+def test_matches_the_torrent_files_map():
+    rng = random.Random(9)
+    names = [f"Release {idx}/file {part}.mkv" for idx in range(12) for part in range(3)]
+    index = CrossSeedIndex()
+    reference = ReferenceTorrentFiles()
+    hashes = []
+    for idx in range(80):
+        t_hash = f"{idx:040x}"
+        save_path = rng.choice(["/data/torrents", "/data/cross-seed"])
+        torrent_files = files_list(rng.sample(names, rng.randint(1, 4)))
+        index.add_torrent(t_hash, save_path, torrent_files)
+        reference.add_torrent(t_hash, save_path, torrent_files)
+        hashes.append(t_hash)
+    rng.shuffle(hashes)
+    while hashes:
+        for t_hash in hashes:
+            assert index.is_cross_seed(t_hash) == reference.is_cross_seed(t_hash), t_hash
+            assert index.has_cross_seed(t_hash) == reference.has_cross_seed(t_hash), t_hash
+        removed = hashes.pop()
+        index.remove_torrent(removed)
+        reference.remove_torrent(removed)
+
+
+def test_oldest_cross_seed_becomes_the_original():
+    index = CrossSeedIndex()
+    for t_hash in ("a", "b", "c"):
+        index.add_torrent(t_hash, "/data", files_list(["Movie/movie.mkv"]))
+    assert not index.is_cross_seed("a")
+    assert index.is_cross_seed("b") and index.is_cross_seed("c")
+    index.remove_torrent("a")
+    assert not index.is_cross_seed("b")
+    assert index.is_cross_seed("c")
+    assert index.has_cross_seed("b")
+    index.remove_torrent("c")
+    assert not index.has_cross_seed("b")
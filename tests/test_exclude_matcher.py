@@ -0,0 +1,64 @@
+import itertools
+from fnmatch import fnmatch
+
+from modules import util
+
+PATTERNS = [
+    "/data/torrents/**/*.!qB",
+    "/data/torrents/**/*.parts",
+    "/data/torrents/temp/**",
+    "/data/torrents/Movies/**/*.nfo",
+    "/data/torrents/cross-seed/*",
+    "/data/torrents/*/sample?.mkv",
+    "/data/torrents/[Tt]ools/*",
+    "/data/torrents/exact/file.txt",
+]
+PATHS = [
+    "/data/torrents/Movie/movie.mkv.!qB",
+    "/data/torrents/Movie/movie.mkv",
+    "/data/torrents/a/b/c.parts",
+    "/data/torrents/temp/x/y.mkv",
+    "/data/torrents/temp",
+    "/data/torrents/Movies/Film/film.nfo",
+    "/data/torrents/Movies/film.nfo",
+    "/data/torrents/cross-seed/file.mkv",
+    "/data/torrents/cross-seed/deep/file.mkv",
+    "/data/torrents/Show/sample1.mkv",
+    "/data/torrents/Show/sample12.mkv",
+    "/data/torrents/tools/a",
+    "/data/torrents/Tools/a",
+    "/data/torrents/exact/file.txt",
+    "/data/torrents/exact/file.txt2",
+    "/data/torrents/exact/file[1].txt",
+]
+
+
+def test_match_is_fnmatch_of_any_pattern():
+    for count in range(len(PATTERNS) + 1):
+        patterns = PATTERNS[:count]
+        matcher = util.ExcludeMatcher(patterns)
+        for path in PATHS:
+            assert matcher.match(path) == any(fnmatch(path, pattern) for pattern in patterns), (path, patterns)
+
+
+def test_paths_are_matched_literally():
+    deleted = ["/data/torrents/exact/file[1].txt", "/data/torrents/Movie/movie.mkv"]
+    matcher = util.ExcludeMatcher(PATTERNS, deleted)
+    for path in PATHS:
+        assert matcher.match(path) == (path in deleted or any(fnmatch(path, pattern) for pattern in PATTERNS))
+    # Patterns added after the first match are compiled on the next match
+    matcher.add("/data/torrents/Show/*")
+    assert matcher.match("/data/torrents/Show/sample12.mkv")
+
+
+def test_excluded_directories_exclude_everything_below():
+    matcher = util.ExcludeMatcher(PATTERNS)
+    directories = ["/data/torrents/temp", "/data/torrents/temp/x", "/data/torrents/cross-seed", "/data/torrents/Movies", "/data"]
+    names = ["file.mkv", "sub/file.nfo", "a/b/c.txt"]
+    for directory, name in itertools.product(directories, names):
+        if matcher.excludes_dir(directory):
+            assert matcher.match(f"{directory}/{name}"), (directory, name)
+    assert matcher.excludes_dir("/data/torrents/temp")
+    assert matcher.excludes_dir("/data/torrents/cross-seed")
+    assert not matcher.excludes_dir("/data/torrents/Movies")
+    assert not matcher.excludes_dir("/data")
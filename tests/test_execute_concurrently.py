@@ -0,0 +1,69 @@
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from modules.qbittorrent import Qbt
+
+
+def make_qbt(max_concurrent_requests):
+    qbt = Qbt.__new__(Qbt)
+    qbt.max_concurrent_requests = max_concurrent_requests
+    return qbt
+
+
+def test_every_item_is_called_once():
+    calls = Counter()
+    lock = threading.Lock()
+
+    def func(item):
+        with lock:
+            calls[item] += 1
+        if item % 5 == 0:
+            raise ValueError(item)
+        return item * 2
+
+    outcomes = list(make_qbt(4).execute_concurrently(func, range(50)))
+    assert sorted(item for item, _, _ in outcomes) == list(range(50))
+    assert calls == Counter(range(50))
+    for item, result, ex in outcomes:
+        if item % 5 == 0:
+            assert result is None and isinstance(ex, ValueError)
+        else:
+            assert result == item * 2 and ex is None
+
+
+def test_falls_back_to_sequential_calls_without_running_items_twice(monkeypatch):
+    calls = Counter()
+    lock = threading.Lock()
+    original_submit = ThreadPoolExecutor.submit
+    submitted = Counter()
+
+    def submit(self, fn, *args, **kwargs):
+        submitted[self] += 1
+        if submitted[self] > 3:
+            # Like a failed thread start, the work item is queued before the error is raised
+            original_submit(self, fn, *args, **kwargs)
+            raise RuntimeError("can't start new thread")
+        return original_submit(self, fn, *args, **kwargs)
+
+    monkeypatch.setattr(ThreadPoolExecutor, "submit", submit)
+
+    def func(item):
+        with lock:
+            calls[item] += 1
+        return item
+
+    outcomes = list(make_qbt(8).execute_concurrently(func, range(20)))
+    assert sorted(item for item, _, _ in outcomes) == list(range(20))
+    assert calls == Counter(range(20))
+
+
+def test_other_runtime_errors_are_raised(monkeypatch):
+    def submit(self, fn, *args, **kwargs):
+        raise RuntimeError("cannot schedule new futures after shutdown")
+
+    monkeypatch.setattr(ThreadPoolExecutor, "submit", submit)
+    with pytest.raises(RuntimeError, match="shutdown"):
+        list(make_qbt(2).execute_concurrently(lambda item: item, range(3)))
@@ -0,0 +1,71 @@
+import errno
+import os
+
+import pytest
+
+from modules import util
+
+
+@pytest.fixture
+def cross_device(monkeypatch):
+    """Make every rename fail like a move across filesystems"""
+
+    def rename(src, dest):
+        raise OSError(errno.EXDEV, "Invalid cross-device link", src)
+
+    monkeypatch.setattr(util.os, "rename", rename)
+
+
+def move(src, dest):
+    return util.finish_move(util.start_move(str(src), str(dest), True), str(src), str(dest))
+
+
+def test_move_creates_the_destination_folder(tmp_path):
+    src = tmp_path / "root" / "movie.mkv"
+    src.parent.mkdir()
+    src.write_text("movie")
+    dest = tmp_path / "orphaned" / "Movie" / "movie.mkv"
+    assert move(src, dest) is True
+    assert not src.exists()
+    assert dest.read_text() == "movie"
+
+
+def test_move_across_filesystems_copies_the_file(tmp_path, cross_device):
+    src = tmp_path / "movie.mkv"
+    src.write_bytes(os.urandom(256 * 1024))
+    data = src.read_bytes()
+    dest = tmp_path / "recycle" / "movie.mkv"
+    assert move(src, dest) is True
+    assert not src.exists()
+    assert dest.read_bytes() == data
+
+
+def test_move_across_filesystems_keeps_symlinks(tmp_path, cross_device):
+    target = tmp_path / "target.mkv"
+    target.write_text("target")
+    src = tmp_path / "link.mkv"
+    os.symlink(target, src)
+    dest = tmp_path / "recycle" / "link.mkv"
+    assert move(src, dest) is True
+    assert not os.path.lexists(src)
+    assert os.path.islink(dest) and os.readlink(dest) == str(target)
+    assert target.read_text() == "target"
+
+
+def test_delete(tmp_path):
+    file = tmp_path / "file.mkv"
+    file.write_text("file")
+    util.finish_delete(util.start_delete(str(file)), str(file))
+    assert not file.exists()
+    # A missing file is reported, not raised
+    util.finish_delete(util.start_delete(str(file)), str(file))
+
+
+def test_io_pool_size_follows_the_setting():
+    try:
+        util.set_io_workers(3)
+        assert util.get_io_executor()._max_workers == 3
+        util.set_io_workers(5)
+        assert util.get_io_executor()._max_workers == 5
+    finally:
+        util.set_io_workers(8)
@@ -0,0 +1,78 @@
+import os
+import shutil
+import time
+
+import pytest
+
+from modules import fs_watcher
+
+try:
+    fs_watcher.load_libc()
+except (OSError, AttributeError) as ex:
+    pytest.skip(f"inotify is not available: {ex}", allow_module_level=True)
+
+
+def os_walk_listing(base):
+    return {dir_path: sorted(files) for dir_path, _, files in os.walk(base)}
+
+
+def wait_for_listing(watcher, base, timeout=10.0):
+    """Return the watcher snapshot once it matches os.walk, or the last snapshot after timeout seconds"""
+    deadline = time.time() + timeout
+    while True:
+        snapshot = watcher.snapshot(str(base))
+        listing = None if snapshot is None else {path: sorted(files) for path, files in snapshot.items()}
+        if listing == os_walk_listing(str(base)) or time.time() > deadline:
+            return listing
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def watched(tmp_path):
+    root = tmp_path / "root"
+    (root / "Movie").mkdir(parents=True)
+    (root / "Movie" / "movie.mkv").write_text("movie")
+    (root / "Show" / "S01").mkdir(parents=True)
+    (root / "Show" / "S01" / "e01.mkv").write_text("e01")
+    watcher = fs_watcher.DirectoryWatcher(str(root), 2)
+    yield root, watcher
+    watcher.stop()
+
+
+def test_initial_listing_matches_os_walk(watched):
+    root, watcher = watched
+    assert wait_for_listing(watcher, root) == os_walk_listing(str(root))
+    # Only directories inside the watched tree are served
+    assert watcher.snapshot(str(root.parent)) is None
+
+
+def test_changes_are_applied(watched):
+    root, watcher = watched
+    wait_for_listing(watcher, root)
+    (root / "Movie" / "movie.nfo").write_text("nfo")
+    os.remove(root / "Show" / "S01" / "e01.mkv")
+    (root / "New" / "Sub").mkdir(parents=True)
+    (root / "New" / "Sub" / "file.mkv").write_text("file")
+    assert wait_for_listing(watcher, root) == os_walk_listing(str(root))
+
+    os.rename(root / "Show", root / "Show renamed")
+    (root / "Show renamed" / "S01" / "e02.mkv").write_text("e02")
+    shutil.rmtree(root / "Movie")
+    assert wait_for_listing(watcher, root) == os_walk_listing(str(root))
+
+
+def test_symlinks_to_directories_are_not_listed(watched):
+    root, watcher = watched
+    wait_for_listing(watcher, root)
+    os.symlink(root / "Show", root / "linked show")
+    os.symlink(root / "Movie" / "movie.mkv", root / "linked movie.mkv")
+    listing = wait_for_listing(watcher, root)
+    assert listing == os_walk_listing(str(root))
+    assert listing[str(root)] == ["linked movie.mkv"]
+
+
+def test_stopped_watcher_is_not_served(watched):
+    root, watcher = watched
+    wait_for_listing(watcher, root)
+    watcher.stop()
+    assert watcher.snapshot(str(root)) is None
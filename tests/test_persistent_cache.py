@@ -0,0 +1,212 @@
+import os
+import shutil
+import time
+
+from qbittorrentapi import TorrentDictionary
+from qbittorrentapi import TorrentFilesList
+
+from modules import util
+from modules.persistent_cache import DirectoryIndex
+from modules.persistent_cache import HardlinkVerdictCache
+from modules.persistent_cache import TorrentFileCache
+from modules.qbittorrent import CrossSeedIndex
+from modules.qbittorrent import Qbt
+
+
+def make_torrent(t_hash, name, total_size=100, save_path="/data/torrents"):
+    content_path = f"{save_path}/{name}"
+    data = {"hash": t_hash, "name": name, "content_path": content_path, "total_size": total_size, "save_path": save_path}
+    return TorrentDictionary(data=data, client=None)
+
+
+def make_files(*names):
+    files = [{"index": idx, "name": name, "size": 10, "progress": 1, "priority": 1} for idx, name in enumerate(names)]
+    return TorrentFilesList(files)
+
+
+def test_torrent_file_cache_round_trip(tmp_path):
+    torrent = make_torrent("a" * 40, "Show")
+    cache = TorrentFileCache(str(tmp_path), "localhost:8080")
+    cache.set([(torrent, make_files("Show/e01.mkv", "Show/e02.mkv"))])
+    cache.close()
+
+    cache = TorrentFileCache(str(tmp_path), "localhost:8080")
+    files = cache.get(torrent)
+    assert [(file.index, file.name, file.size) for file in files] == [(0, "Show/e01.mkv", 10), (1, "Show/e02.mkv", 10)]
+    # Only the immutable fields are stored
+    assert "progress" not in files[0]
+    # Entries are kept per qBittorrent instance
+    assert TorrentFileCache(str(tmp_path), "otherhost:8080").get(torrent) is None
+
+
+def test_torrent_file_cache_signature_mismatch(tmp_path):
+    cache = TorrentFileCache(str(tmp_path), "localhost:8080")
+    cache.set([(make_torrent("a" * 40, "Show"), make_files("Show/e01.mkv", "Show/e02.mkv"))])
+    assert cache.get(make_torrent("a" * 40, "Show renamed")) is None
+    assert cache.get(make_torrent("a" * 40, "Show", total_size=200)) is None
+    assert cache.get(make_torrent("b" * 40, "Show")) is None
+
+
+def test_torrent_file_cache_evict(tmp_path):
+    cache = TorrentFileCache(str(tmp_path), "localhost:8080")
+    kept, removed = make_torrent("a" * 40, "Kept"), make_torrent("b" * 40, "Removed")
+    cache.set([(kept, make_files("Kept/a.mkv")), (removed, make_files("Removed/b.mkv"))])
+    cache.evict({kept.hash})
+    cache.close()
+    cache = TorrentFileCache(str(tmp_path), "localhost:8080")
+    assert cache.get(kept) is not None
+    assert cache.get(removed) is None
+
+
+class FakeFilesClient:
+    def __init__(self, files):
+        self.files = files
+        self.requested = []
+
+    def torrents_files(self, torrent_hash):
+        self.requested.append(torrent_hash)
+        return self.files[torrent_hash]
+
+
+def make_qbt(tmp_path, torrent_list, client):
+    qbt = Qbt.__new__(Qbt)
+    qbt.client = client
+    qbt.max_concurrent_requests = 4
+    qbt.torrent_list = torrent_list
+    qbt.torrent_files = {}
+    qbt.cached_file_hashes = set()
+    qbt.cross_seed_index = CrossSeedIndex()
+    qbt.file_cache = TorrentFileCache(str(tmp_path), "localhost:8080")
+    return qbt
+
+
+def test_renamed_file_in_cached_torrent_is_refreshed(tmp_path):
+    renamed = make_torrent("a" * 40, "Show")
+    unchanged = make_torrent("b" * 40, "Movie")
+    TorrentFileCache(str(tmp_path), "localhost:8080").set(
+        [(renamed, make_files("Show/e01.mkv", "Show/e02.mkv")), (unchanged, make_files("Movie/movie.mkv", "Movie/movie.nfo"))]
+    )
+    # e02 was renamed in qBittorrent, which changes neither the name, content_path nor total_size of the torrent
+    client = FakeFilesClient(
+        {
+            renamed.hash: make_files("Show/e01.mkv", "Show/episode 02.mkv"),
+            unchanged.hash: make_files("Movie/movie.mkv", "Movie/movie.nfo"),
+        }
+    )
+    qbt = make_qbt(tmp_path, [renamed, unchanged], client)
+    for torrent in qbt.torrent_list:
+        qbt.add_torrent_files(torrent.hash, qbt.get_torrent_files(torrent), torrent.save_path)
+    assert client.requested == []
+    assert qbt.cached_file_hashes == {renamed.hash, unchanged.hash}
+
+    assert qbt.refresh_torrent_files(qbt.torrent_list) == {renamed.hash}
+    assert [file.name for file in qbt.get_torrent_files(renamed)] == ["Show/e01.mkv", "Show/episode 02.mkv"]
+    assert "/data/torrents/Show/episode 02.mkv" in qbt.cross_seed_index.file_ids
+    assert "/data/torrents/Show/e02.mkv" not in qbt.cross_seed_index.file_ids
+    # The refreshed list replaces the cached entry, and each torrent is only checked once per run
+    assert [file.name for file in TorrentFileCache(str(tmp_path), "localhost:8080").get(renamed)][1] == "Show/episode 02.mkv"
+    assert qbt.refresh_torrent_files(qbt.torrent_list) == set()
+    assert sorted(client.requested) == sorted([renamed.hash, unchanged.hash])
+
+
+def make_tree(base, layout):
+    for path in layout:
+        full_path = base / path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(path)
+
+
+def age_directories(base, seconds=3600):
+    old = time.time() - seconds
+    for dir_path, _, _ in os.walk(base):
+        os.utime(dir_path, (old, old))
+
+
+def os_walk_listing(base):
+    return {dir_path: sorted(files) for dir_path, _, files in os.walk(base)}
+
+
+def index_walk_listing(dir_index, base):
+    dir_index.load(str(base))
+    listing = {path: sorted(files) for path, files in util.walk_tree(str(base), 1, dir_index.list_directory)}
+    dir_index.save()
+    return listing
+
+
+def test_directory_index_serves_unchanged_directories(tmp_path, monkeypatch):
+    root = tmp_path / "root"
+    make_tree(root, ["Movie/movie.mkv", "Show/S01/e01.mkv", "Show/S01/e02.mkv", "Show/S02/e01.mkv", "loose.txt"])
+    age_directories(root)
+    listed = []
+    list_directory = util.list_directory
+    monkeypatch.setattr(util, "list_directory", lambda path: listed.append(path) or list_directory(path))
+
+    assert index_walk_listing(DirectoryIndex(str(tmp_path)), root) == os_walk_listing(root)
+    assert len(listed) == 5
+
+    # A new index reads the stored listings, only the modified directory is listed again
+    listed.clear()
+    (root / "Show" / "S01" / "e03.mkv").write_text("e03")
+    assert index_walk_listing(DirectoryIndex(str(tmp_path)), root) == os_walk_listing(root)
+    assert listed == [str(root / "Show" / "S01")]
+
+
+def test_directory_index_relists_racy_directories_and_drops_removed_ones(tmp_path, monkeypatch):
+    root = tmp_path / "root"
+    make_tree(root, ["Movie/movie.mkv", "Old/file.mkv"])
+    listed = []
+    list_directory = util.list_directory
+    monkeypatch.setattr(util, "list_directory", lambda path: listed.append(path) or list_directory(path))
+    dir_index = DirectoryIndex(str(tmp_path))
+    index_walk_listing(dir_index, root)
+
+    # Directories modified within RACY_WINDOW_NS of the walk may change again within the same mtime tick
+    listed.clear()
+    assert index_walk_listing(dir_index, root) == os_walk_listing(root)
+    assert sorted(listed) == sorted([str(root), str(root / "Movie"), str(root / "Old")])
+
+    shutil.rmtree(root / "Old")
+    age_directories(root)
+    index_walk_listing(dir_index, root)
+    stored = DirectoryIndex(str(tmp_path)).connection.execute("SELECT path FROM directories").fetchall()
+    assert sorted(path for (path,) in stored) == sorted([str(root), str(root / "Movie")])
+    listed.clear()
+    assert index_walk_listing(DirectoryIndex(str(tmp_path)), root) == os_walk_listing(root)
+    assert listed == []
+
+
+def test_hardlink_verdict_cache_tracks_member_changes(tmp_path):
+    content = tmp_path / "root" / "Movie"
+    content.mkdir(parents=True)
+    movie = content / "movie.mkv"
+    movie.write_text("movie")
+    members = [(str(content), os.stat(content)), (str(movie), os.stat(movie))]
+    cache = HardlinkVerdictCache(str(tmp_path))
+    cache.set(str(content), False, True, members)
+    cache.save()
+
+    cache = HardlinkVerdictCache(str(tmp_path))
+    assert cache.get(str(content), False, os.stat) is True
+    assert cache.get(str(content), True, os.stat) is None
+    # Creating a hardlink changes the link count of the file
+    os.link(movie, tmp_path / "movie.mkv")
+    assert cache.get(str(content), False, os.stat) is None
+    os.remove(movie)
+    assert cache.get(str(content), False, os.stat) is None
+
+
+def test_hardlink_verdict_cache_evicts_unchecked_paths(tmp_path):
+    first, second = tmp_path / "first.mkv", tmp_path / "second.mkv"
+    first.write_text("first")
+    second.write_text("second")
+    cache = HardlinkVerdictCache(str(tmp_path))
+    cache.set(str(first), False, False, [(str(first), os.stat(first))])
+    cache.set(str(second), False, True, [(str(second), os.stat(second))])
+    cache.save()
+
+    cache = HardlinkVerdictCache(str(tmp_path))
+    assert cache.get(str(first), False, os.stat) is False
+    cache.save(evict=True)
+    cache = HardlinkVerdictCache(str(tmp_path))
+    assert cache.get(str(first), False, os.stat) is False
+    assert cache.get(str(second), False, os.stat) is None
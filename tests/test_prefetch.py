@@ -0,0 +1,99 @@
+import threading
+from collections import Counter
+
+from qbittorrentapi import TorrentDictionary
+from qbittorrentapi import TorrentFilesList
+from qbittorrentapi import TrackersList
+
+from modules.persistent_cache import TorrentFileCache
+from modules.qbittorrent import Qbt
+
+
+class FakeClient:
+    def __init__(self, failing=()):
+        self.requests = Counter()
+        self.failing = set(failing)
+        self.lock = threading.Lock()
+
+    def request(self, endpoint, torrent_hash):
+        with self.lock:
+            self.requests[(endpoint, torrent_hash)] += 1
+        if torrent_hash in self.failing:
+            raise ConnectionError(torrent_hash)
+
+    def torrents_trackers(self, torrent_hash):
+        self.request("trackers", torrent_hash)
+        return TrackersList([{"url": f"https://tracker.example.org/{torrent_hash}", "status": 2, "msg": ""}])
+
+    def torrents_files(self, torrent_hash):
+        self.request("files", torrent_hash)
+        return TorrentFilesList([{"index": 0, "name": f"{torrent_hash}.mkv", "size": 10}])
+
+
+def make_qbt(client, file_cache=None):
+    qbt = Qbt.__new__(Qbt)
+    qbt.client = client
+    qbt.max_concurrent_requests = 4
+    qbt.torrent_trackers = {}
+    qbt.torrent_files = {}
+    qbt.cached_file_hashes = set()
+    qbt.file_cache = file_cache
+    return qbt
+
+
+def make_torrents(client, count):
+    return [
+        TorrentDictionary(data={"hash": f"{idx:040x}", "name": f"torrent {idx}", "total_size": 10}, client=client)
+        for idx in range(count)
+    ]
+
+
+def test_details_are_requested_once_per_torrent():
+    client = FakeClient(failing={f"{3:040x}"})
+    torrents = make_torrents(client, 20)
+    qbt = make_qbt(client)
+    qbt.prefetch_torrent_details(torrents)
+    expected = Counter({("trackers", torrent.hash): 1 for torrent in torrents})
+    expected.update(("files", torrent.hash) for torrent in torrents if torrent.hash not in client.failing)
+    assert client.requests == expected
+    for torrent in torrents:
+        if torrent.hash in client.failing:
+            continue
+        assert qbt.get_torrent_trackers(torrent)[0].url.endswith(torrent.hash)
+        assert qbt.get_torrent_files(torrent)[0].name == f"{torrent.hash}.mkv"
+    # Prefetched torrents are served without requests, failed ones are requested again on demand
+    assert sum(client.requests.values()) == 39
+    client.failing.clear()
+    qbt.get_torrent_trackers(torrents[3])
+    qbt.get_torrent_files(torrents[3])
+    assert client.requests[("trackers", torrents[3].hash)] == 2
+    assert client.requests[("files", torrents[3].hash)] == 1
+    qbt.prefetch_torrent_details(torrents)
+    assert sum(client.requests.values()) == 41
+
+
+def test_cached_file_lists_are_not_requested(tmp_path):
+    client = FakeClient()
+    torrents = make_torrents(client, 4)
+    file_cache = TorrentFileCache(str(tmp_path), "localhost:8080")
+    file_cache.set([(torrents[0], TorrentFilesList([{"index": 0, "name": "cached.mkv", "size": 10}]))])
+    qbt = make_qbt(client, file_cache)
+    qbt.prefetch_torrent_details(torrents)
+    assert client.requests[("files", torrents[0].hash)] == 0
+    assert qbt.get_torrent_files(torrents[0])[0].name == "cached.mkv"
+    assert qbt.cached_file_hashes == {torrents[0].hash}
+    # Fetched file lists are added to the cache for the next run
+    assert file_cache.get(torrents[1])[0].name == f"{torrents[1].hash}.mkv"
+    file_cache.close()
+
+
+def test_trackers_only_prefetch():
+    client = FakeClient()
+    torrents = make_torrents(client, 10)
+    qbt = make_qbt(client)
+    qbt.prefetch_torrent_trackers(torrents[:5])
+    qbt.prefetch_torrent_trackers(torrents)
+    assert client.requests == Counter({("trackers", torrent.hash): 1 for torrent in torrents})
+    for torrent in torrents:
+        qbt.get_torrent_trackers(torrent)
+    assert sum(client.requests.values()) == 10
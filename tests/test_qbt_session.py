@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+from qbittorrentapi import ApplicationPreferencesDictionary
+
+from modules.qbittorrent import Qbt
+from modules.qbittorrent import QbtSession
+
+
+class FakeSessionClient:
+    def __init__(self):
+        self.version = "v5.1.0"
+        self.version_reads = 0
+        self.preferences = {
+            "max_ratio_act": 1,
+            "max_ratio_enabled": True,
+            "max_ratio": 2.0,
+            "max_seeding_time_enabled": False,
+            "max_seeding_time": 1440,
+            "max_inactive_seeding_time_enabled": False,
+        }
+        self.preference_reads = 0
+        self.preference_writes = 0
+
+    def app_version(self):
+        return self.version
+
+    def app_web_api_version(self):
+        self.version_reads += 1
+        return "2.11.4"
+
+    def app_preferences(self):
+        self.preference_reads += 1
+        return ApplicationPreferencesDictionary(dict(self.preferences))
+
+    def app_set_preferences(self, prefs):
+        self.preference_writes += 1
+        self.preferences.update(prefs)
+
+
+def test_web_api_version_is_read_again_only_for_a_new_application_version():
+    client = FakeSessionClient()
+    session = QbtSession(client)
+    assert session.get_versions() == ("v5.1.0", "2.11.4")
+    session.get_versions()
+    assert client.version_reads == 1
+    client.version = "v5.1.1"
+    assert session.get_versions() == ("v5.1.1", "2.11.4")
+    assert client.version_reads == 2
+
+
+def make_qbt(client, disable_default_share_limits):
+    qbt = Qbt.__new__(Qbt)
+    qbt.client = client
+    qbt.config = SimpleNamespace(
+        commands={"share_limits": True}, settings={"disable_qbt_default_share_limits": disable_default_share_limits}
+    )
+    return qbt
+
+
+def test_preferences_are_read_once_per_run():
+    client = FakeSessionClient()
+    qbt = make_qbt(client, False)
+    qbt.read_preferences()
+    assert client.preference_reads == 1 and client.preference_writes == 0
+    assert (qbt.global_max_ratio_enabled, qbt.global_max_ratio) == (True, 2.0)
+    # Changes made in qBittorrent between runs are picked up by the next run
+    client.preferences["max_ratio"] = 3.0
+    qbt = make_qbt(client, False)
+    qbt.read_preferences()
+    assert qbt.global_max_ratio == 3.0
+    assert client.preference_reads == 2
+
+
+def test_default_share_limits_are_disabled_again_every_run():
+    client = FakeSessionClient()
+    make_qbt(client, True).read_preferences()
+    assert client.preference_writes == 1
+    assert client.preferences["max_ratio_act"] == 0 and not client.preferences["max_ratio_enabled"]
+    # Nothing is written while the limits stay disabled
+    qbt = make_qbt(client, True)
+    qbt.read_preferences()
+    assert client.preference_writes == 1
+    assert qbt.global_max_ratio_enabled is False
+    # Limits turned back on in qBittorrent are disabled by the next run
+    client.preferences.update({"max_ratio_act": 1, "max_ratio_enabled": True})
+    make_qbt(client, True).read_preferences()
+    assert client.preference_writes == 2
+    assert client.preferences["max_ratio_act"] == 0
@@ -0,0 +1,95 @@
+import fnmatch
+import os
+import random
+import re
+from pathlib import Path
+
+from modules import util
+
+
+def reference_remove_empty_directories(pathlib_root_dir, excluded_paths=None, exclude_patterns=()):
+    """remove_empty_directories as it was called once per directory before the single bottom-up pass"""
+    pathlib_root_dir = Path(pathlib_root_dir)
+    if not pathlib_root_dir.exists():
+        return
+    excluded_paths_set = {Path(p).resolve() for p in excluded_paths or ()}
+    compiled_patterns = [re.compile(fnmatch.translate(pattern)) for pattern in exclude_patterns]
+    directories_to_check = []
+    for root, _, files in os.walk(pathlib_root_dir, topdown=False):
+        root_path = Path(root).resolve()
+        if root_path in excluded_paths_set:
+            continue
+        if any(pattern.match(str(root_path) + os.sep) for pattern in compiled_patterns):
+            continue
+        if not files:
+            directories_to_check.append(root_path)
+    for dir_path in directories_to_check:
+        try:
+            os.rmdir(dir_path)
+        except OSError:
+            pass
+    if pathlib_root_dir.resolve() not in excluded_paths_set:
+        try:
+            pathlib_root_dir.rmdir()
+        except OSError:
+            pass
+
+
+def make_random_tree(base, rng):
+    directories = [base]
+    for idx in range(60):
+        parent = rng.choice(directories)
+        directory = parent / f"dir{idx}"
+        directory.mkdir()
+        directories.append(directory)
+    for directory in rng.sample(directories[1:], 8):
+        (directory / "file.mkv").write_text("file")
+    (base / "keep").mkdir()
+    (base / "keep" / "empty").mkdir()
+    return [directory.relative_to(base) for directory in directories]
+
+
+def remaining(base):
+    return sorted(os.path.relpath(dir_path, base) for dir_path, _, _ in os.walk(base))
+
+
+def test_matches_removing_each_directory_separately(tmp_path):
+    for seed in range(5):
+        rng = random.Random(seed)
+        trees = []
+        for name in ("reference", "single_pass"):
+            base = tmp_path / str(seed) / name
+            base.mkdir(parents=True)
+            relative_dirs = make_random_tree(base, random.Random(seed))
+            trees.append(base)
+        start_dirs = rng.sample(relative_dirs[1:], 15)
+        protected = rng.sample(relative_dirs[1:], 3)
+        reference, single_pass = trees
+        patterns = [f"{reference}/keep/*"]
+        for rel in start_dirs:
+            reference_remove_empty_directories(reference / rel, [reference / p for p in protected], patterns)
+        util.remove_empty_directories(
+            [single_pass / rel for rel in start_dirs], [single_pass / p for p in protected], [f"{single_pass}/keep/*"]
+        )
+        assert remaining(single_pass) == remaining(reference)
+
+
+def test_protected_and_excluded_directories_are_kept(tmp_path):
+    for path in ("a/b/c", "protected/sub", "excluded/sub", "with file/sub"):
+        (tmp_path / path).mkdir(parents=True)
+    (tmp_path / "with file" / "file.mkv").write_text("file")
+    util.remove_empty_directories(
+        [tmp_path / "a", tmp_path / "a" / "b", tmp_path / "protected", tmp_path / "excluded", tmp_path / "with file"],
+        [tmp_path / "protected"],
+        [f"{tmp_path}/excluded/*"],
+    )
+    assert remaining(tmp_path) == [".", "excluded", "excluded/sub", "protected", "with file"]
+
+
+def test_symlinked_directories_are_never_removed(tmp_path):
+    (tmp_path / "target" / "empty").mkdir(parents=True)
+    (tmp_path / "root" / "sub").mkdir(parents=True)
+    os.symlink(tmp_path / "target", tmp_path / "root" / "sub" / "link")
+    util.remove_empty_directories([tmp_path / "root"])
+    assert os.path.islink(tmp_path / "root" / "sub" / "link")
+    assert (tmp_path / "target" / "empty").is_dir()
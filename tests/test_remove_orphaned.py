@@ -0,0 +1,145 @@
+import errno
+import os
+import random
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from qbittorrentapi import TorrentDictionary
+from qbittorrentapi import TorrentFilesList
+
+from modules import util
+from modules.core.remove_orphaned import RemoveOrphaned
+
+
+def make_torrent(t_hash, save_path, names):
+    torrent = TorrentDictionary(data={"hash": t_hash, "save_path": save_path}, client=None)
+    files = TorrentFilesList([{"index": idx, "name": name, "size": 1} for idx, name in enumerate(names)])
+    return torrent, files
+
+
+def make_remove_orphaned(torrent_files, executor=None):
+    remove_orphaned = RemoveOrphaned.__new__(RemoveOrphaned)
+    remove_orphaned.qbt = SimpleNamespace(get_torrent_files=lambda torrent: torrent_files[torrent.hash])
+    remove_orphaned.executor = executor
+    return remove_orphaned
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_matches_the_set_difference_of_all_paths(parallel):
+    rng = random.Random(17)
+    save_paths = ["/data/torrents/movies", "/data/torrents/tv", "/data/torrents"]
+    names = [f"Release {idx}/file {part}.mkv" for idx in range(30) for part in range(3)] + ["single.mkv", "other.mkv"]
+    torrent_list, torrent_files = [], {}
+    for idx in range(40):
+        torrent, files = make_torrent(f"{idx:040x}", rng.choice(save_paths), rng.sample(names, rng.randint(1, 3)))
+        torrent_list.append(torrent)
+        torrent_files[torrent.hash] = files
+    all_paths = {os.path.join(save_path, name) for save_path in save_paths for name in names}
+    on_disk = set(rng.sample(sorted(all_paths), len(all_paths) // 2)) | {"/data/torrents/unknown/dir/file.bin"}
+    root_files = {}
+    for path in on_disk:
+        directory, name = os.path.split(path)
+        root_files.setdefault(directory, []).append(name)
+
+    # Reference: every file on disk minus the full path of every torrent file
+    torrent_paths = {
+        os.path.normpath(os.path.join(torrent.save_path, file.name))
+        for torrent in torrent_list
+        for file in torrent_files[torrent.hash]
+    }
+    executor = ThreadPoolExecutor(max_workers=4) if parallel else None
+    try:
+        orphaned_files = make_remove_orphaned(torrent_files, executor).find_orphaned_files(torrent_list, root_files)
+    finally:
+        if executor:
+            executor.shutdown()
+    assert orphaned_files == on_disk - torrent_paths
+    assert "/data/torrents/unknown/dir/file.bin" in orphaned_files
+
+
+def make_orphan_handler(tmp_path, empty_after_x_days):
+    remove_orphaned = RemoveOrphaned.__new__(RemoveOrphaned)
+    # Directories read from the config end with a separator
+    remove_orphaned.root_dir = os.path.join(tmp_path, "root", "")
+    remove_orphaned.remote_dir = os.path.join(tmp_path, "root", "")
+    remove_orphaned.orphaned_dir = os.path.join(tmp_path, "orphaned", "")
+    remove_orphaned.config = SimpleNamespace(
+        orphaned={"empty_after_x_days": empty_after_x_days}, fs_inventory=util.FileSystemInventory()
+    )
+    return remove_orphaned
+
+
+def make_orphans(tmp_path, *names):
+    files = []
+    for name in names:
+        path = tmp_path / "root" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+        files.append(str(path))
+    return files
+
+
+def test_orphans_are_moved_to_the_orphaned_dir(tmp_path):
+    files = make_orphans(tmp_path, "Movie/movie.nfo", "Show/S01/e01.srt")
+    results = make_orphan_handler(tmp_path, 7).handle_orphaned_batch(files)
+    assert results == [str(tmp_path / "root" / "Movie"), str(tmp_path / "root" / "Show" / "S01")]
+    assert (tmp_path / "orphaned" / "Movie" / "movie.nfo").read_text() == "Movie/movie.nfo"
+    assert not any(os.path.exists(file) for file in files)
+
+
+def test_failed_deletes_fall_back_to_moving(tmp_path, monkeypatch):
+    deleted, failing, denied = make_orphans(tmp_path, "a/deleted.nfo", "b/failing.nfo", "c/denied.nfo")
+    start_delete = util.start_delete
+
+    def fake_start_delete(path):
+        future = Future()
+        if path == failing:
+            future.set_exception(OSError(errno.EIO, "Input/output error", path))
+        elif path == denied:
+            future.set_exception(PermissionError(errno.EACCES, "Permission denied", path))
+        else:
+            return start_delete(path)
+        return future
+
+    monkeypatch.setattr(util, "start_delete", fake_start_delete)
+    results = make_orphan_handler(tmp_path, 0).handle_orphaned_batch([deleted, failing, denied])
+    # A permission error skips the file so its parent path is not processed
+    assert results == [str(tmp_path / "root" / "a"), str(tmp_path / "root" / "b"), None]
+    assert not os.path.exists(deleted)
+    assert not os.path.exists(failing)
+    assert (tmp_path / "orphaned" / "b" / "failing.nfo").exists()
+    assert os.path.exists(denied)
+
+
+def test_orphan_scan_and_hardlink_check_share_one_walk(tmp_path, monkeypatch):
+    for name in ("Movie/movie.mkv", "Show/S01/e01.mkv", "orphaned_data/Old/old.mkv", "excluded/tmp/file.!qB"):
+        path = tmp_path / "root" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+    remove_orphaned = make_orphan_handler(tmp_path, 7)
+    remove_orphaned.orphaned_dir = os.path.join(tmp_path, "root", "orphaned_data", "")
+    remove_orphaned.config.default_dir = str(tmp_path)
+    remove_orphaned.exclude_matcher = util.ExcludeMatcher([os.path.join(tmp_path, "root", "excluded", "**")])
+    remove_orphaned.config.root_dir = remove_orphaned.root_dir
+    remove_orphaned.config.remote_dir = remove_orphaned.remote_dir
+    remove_orphaned.config.orphaned_dir = remove_orphaned.orphaned_dir
+    remove_orphaned.config.recycle_dir = ""
+    listed = []
+    list_directory = util.list_directory
+
+    def counting_list_directory(path):
+        listed.append(os.path.normpath(path))
+        return list_directory(path)
+
+    monkeypatch.setattr(util, "list_directory", counting_list_directory)
+    root_files = remove_orphaned.get_root_files()
+    # The orphaned data and the excluded directories are pruned from the orphan scan
+    assert sorted(root_files) == [str(tmp_path / "root" / "Movie"), str(tmp_path / "root" / "Show" / "S01")]
+    checker = util.CheckHardLinks(remove_orphaned.config)
+    checker.get_inode_count()
+    assert len(checker.root_files) == 4
+    # The hardlink check reuses the tree of the orphan scan and only lists the pruned directories
+    assert sorted(listed) == sorted(set(listed))
+    assert str(tmp_path / "root" / "orphaned_data" / "Old") in listed
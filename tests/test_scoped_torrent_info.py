@@ -0,0 +1,120 @@
+import threading
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+from qbittorrentapi import TorrentDictionary
+from qbittorrentapi import TorrentFilesList
+from qbittorrentapi import TrackersList
+
+from modules.qbittorrent import CrossSeedIndex
+from modules.qbittorrent import Qbt
+
+# name, save path, content path relative to the save path, file names
+TORRENTS = [
+    ("Movie", "/data/torrents/movies", "Movie", ["Movie/movie.mkv", "Movie/movie.nfo"]),
+    ("Movie", "/data/torrents/movies", "Movie", ["Movie/movie.mkv", "Movie/movie.nfo"]),
+    ("Movie", "/data/cross-seed", "Movie", ["Movie/movie.mkv"]),
+    ("Movie Extras", "/data/torrents/movies/Movie", "Extras", ["Extras/trailer.mkv"]),
+    ("Movies Pack", "/data/torrents", "movies", ["movies/Movie/movie.mkv", "movies/Other/other.mkv"]),
+    ("Movie 2", "/data/torrents/movies", "Movie 2", ["Movie 2/movie 2.mkv"]),
+    ("Show", "/data/torrents/tv", "Show", ["Show/e01.mkv"]),
+]
+
+
+class FakeInfoClient:
+    def __init__(self, files):
+        self.files = files
+        self.requests = Counter()
+        self.lock = threading.Lock()
+
+    def torrents_trackers(self, torrent_hash):
+        with self.lock:
+            self.requests[torrent_hash] += 1
+        status = 4 if torrent_hash.endswith("6") else 2
+        return TrackersList([{"url": "https://tracker.example.org/announce", "status": status, "msg": "Unregistered torrent"}])
+
+    def torrents_files(self, torrent_hash):
+        return TorrentFilesList([{"index": idx, "name": name, "size": 1} for idx, name in enumerate(self.files[torrent_hash])])
+
+
+def make_torrents():
+    torrents, files = [], {}
+    for idx, (name, save_path, content, names) in enumerate(TORRENTS):
+        t_hash = f"{idx:040x}"
+        data = {
+            "hash": t_hash,
+            "name": name,
+            "save_path": save_path,
+            "content_path": f"{save_path}/{content}",
+            "category": "movies",
+            "state": "uploading",
+            "auto_tmm": True,
+            "tags": "",
+        }
+        torrents.append(TorrentDictionary(data=data, client=None))
+        files[t_hash] = names
+    return torrents, files
+
+
+def make_qbt(hashes=None, commands=None):
+    torrents, files = make_torrents()
+    qbt = Qbt.__new__(Qbt)
+    qbt.config = SimpleNamespace(
+        settings={"force_auto_tmm": False},
+        args={"hashes": hashes},
+        commands=commands or {},
+        dry_run=False,
+        loglevel="INFO",
+        notify=lambda *args, **kwargs: None,
+    )
+    qbt.client = FakeInfoClient(files)
+    qbt.max_concurrent_requests = 4
+    qbt.torrent_list = torrents
+    qbt.torrent_trackers = {}
+    qbt.torrent_files = {}
+    qbt.cached_file_hashes = set()
+    qbt.file_cache = None
+    qbt.cross_seed_index = CrossSeedIndex()
+    return qbt
+
+
+def torrent_ids(torrents):
+    return sorted(torrent.hash[-1] for torrent in torrents)
+
+
+def test_related_torrents_share_the_name_or_content_path():
+    qbt = make_qbt()
+    # The same name, the same content path, a content path inside it or containing it, but not a sibling prefix
+    assert torrent_ids(qbt.get_related_torrents([f"{0:040X}"])) == ["0", "1", "2", "3", "4"]
+    assert torrent_ids(qbt.get_related_torrents([f"{6:040x}"])) == ["6"]
+    assert torrent_ids(qbt.get_related_torrents([f"{5:040x}", f"{6:040x}"])) == ["4", "5", "6"]
+    assert qbt.get_related_torrents(["f" * 40]) == []
+
+
+@pytest.mark.parametrize("requested", [0, 3, 5, 6])
+def test_scoped_run_matches_the_full_run_for_the_requested_torrent(requested):
+    full = make_qbt()
+    full.get_torrent_info()
+    t_hash = f"{requested:040x}"
+    scoped = make_qbt(hashes=[t_hash])
+    scoped.get_torrent_info()
+    name = TORRENTS[requested][0]
+    for key in ("Category", "save_path", "msg", "status", "is_complete"):
+        assert scoped.torrentinfo[name][key] == full.torrentinfo[name][key]
+    assert torrent_ids(scoped.torrentinfo[name]["torrents"]) == torrent_ids(full.torrentinfo[name]["torrents"])
+    assert scoped.cross_seed_index.is_cross_seed(t_hash) == full.cross_seed_index.is_cross_seed(t_hash)
+    assert scoped.cross_seed_index.has_cross_seed(t_hash) == full.cross_seed_index.has_cross_seed(t_hash)
+    assert (t_hash in [torrent.hash for torrent in scoped.torrentissue]) == (
+        t_hash in [torrent.hash for torrent in full.torrentissue]
+    )
+    # Only the related torrents are requested from qBittorrent
+    related = {torrent.hash for torrent in scoped.get_related_torrents([t_hash])}
+    assert set(scoped.client.requests) == related
+    assert len(full.client.requests) == len(TORRENTS)
+
+
+def test_orphan_runs_gather_every_torrent():
+    qbt = make_qbt(hashes=[f"{6:040x}"], commands={"rem_orphaned": True})
+    qbt.get_torrent_info()
+    assert len(qbt.client.requests) == len(TORRENTS)
@@ -0,0 +1,105 @@
+import itertools
+import random
+from types import SimpleNamespace
+
+from modules.core.share_limits import ShareLimitClassifier
+
+TAGS = ["private", "public", "noHL", "cross-seed", "upgrade"]
+CATEGORIES = ["movies", "tv", "music", ""]
+GB = 1024**3
+
+
+def reference_group(share_limits, tags, category, size):
+    """get_share_limit_group as it looped over every group with check_tags, check_category and check_size"""
+    tags_set = set(tags)
+    for group_name, group_config in share_limits.items():
+        if group_config["include_all_tags"] and not set(group_config["include_all_tags"]).issubset(tags_set):
+            continue
+        if group_config["include_any_tags"] and not set(group_config["include_any_tags"]).intersection(tags_set):
+            continue
+        if group_config["exclude_all_tags"] and set(group_config["exclude_all_tags"]).issubset(tags_set):
+            continue
+        if group_config["exclude_any_tags"] and set(group_config["exclude_any_tags"]).intersection(tags_set):
+            continue
+        if group_config["categories"] and category not in group_config["categories"]:
+            continue
+        min_size, max_size = group_config.get("min_torrent_size"), group_config.get("max_torrent_size")
+        if min_size is not None or max_size is not None:
+            if size is None:
+                continue
+            if min_size is not None and size < int(min_size):
+                continue
+            if max_size is not None and size > int(max_size):
+                continue
+        return group_name
+    return None
+
+
+def random_tags(rng):
+    return rng.sample(TAGS, rng.randint(0, 2)) or None
+
+
+def random_share_limits(rng):
+    share_limits = {}
+    for idx in range(rng.randint(1, 8)):
+        group_config = {
+            "include_all_tags": random_tags(rng),
+            "include_any_tags": random_tags(rng),
+            "exclude_all_tags": random_tags(rng),
+            "exclude_any_tags": random_tags(rng),
+            "categories": rng.sample(CATEGORIES, rng.randint(0, 2)) or None,
+        }
+        if rng.random() < 0.3:
+            group_config["min_torrent_size"] = rng.choice([1, 5, 20]) * GB
+        if rng.random() < 0.3:
+            group_config["max_torrent_size"] = rng.choice([2, 10, 50]) * GB
+        share_limits[f"group{idx}"] = group_config
+    return share_limits
+
+
+def test_matches_checking_every_group_in_priority_order():
+    rng = random.Random(23)
+    torrent = SimpleNamespace(name="torrent")
+    tag_sets = [list(tags) for count in range(3) for tags in itertools.combinations(TAGS, count)]
+    for _ in range(200):
+        share_limits = random_share_limits(rng)
+        classifier = ShareLimitClassifier(share_limits)
+        for tags, category, size in itertools.product(tag_sets, CATEGORIES, [None, 3 * GB, 15 * GB, 60 * GB]):
+            group = classifier.get_group(tags, category, torrent, lambda torrent, size=size: size)
+            assert group == reference_group(share_limits, tags, category, size), (share_limits, tags, category, size)
+
+
+def test_size_is_only_looked_up_for_size_filtered_groups():
+    share_limits = {
+        "sized": {
+            "include_all_tags": ["private"],
+            "include_any_tags": None,
+            "exclude_all_tags": None,
+            "exclude_any_tags": None,
+            "categories": None,
+            "min_torrent_size": 10 * GB,
+        },
+        "default": {
+            "include_all_tags": None,
+            "include_any_tags": None,
+            "exclude_all_tags": None,
+            "exclude_any_tags": None,
+            "categories": None,
+        },
+    }
+    lookups = []
+
+    def get_size(torrent):
+        lookups.append(torrent)
+        return GB
+
+    classifier = ShareLimitClassifier(share_limits)
+    torrent = SimpleNamespace(name="torrent")
+    assert classifier.get_group(["public"], "movies", torrent, get_size) == "default"
+    assert lookups == []
+    assert classifier.get_group(["private"], "movies", torrent, get_size) == "default"
+    assert lookups == [torrent]
+
+
+def test_no_groups():
+    assert ShareLimitClassifier({}).get_group(["private"], "movies", SimpleNamespace(name="torrent"), lambda torrent: 0) is None
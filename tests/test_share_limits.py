@@ -0,0 +1,112 @@
+from collections import Counter
+from types import SimpleNamespace
+
+from qbittorrentapi import TorrentDictionary
+
+from modules.core.share_limits import ShareLimits
+from tests.test_torrent_write_queue import FakeWriteClient
+from tests.test_torrent_write_queue import make_queue
+
+GROUP_TAG = "~share_limit_1.noHL"
+OLD_TAG = "~share_limit_2.default"
+MIN_SEEDS_TAG = "MinSeedsNotMet"
+
+
+def make_share_limits(queue):
+    share_limits = ShareLimits.__new__(ShareLimits)
+    share_limits.qbt = SimpleNamespace(
+        write_queue=queue,
+        get_torrent_trackers=lambda torrent: [],
+        get_tracker_urls=lambda trackers: [],
+        get_tags=lambda urls: {"url": "https://tracker.example.org"},
+    )
+    share_limits.config = SimpleNamespace(dry_run=False, loglevel="INFO")
+    share_limits.client = None
+    share_limits.root_dir = share_limits.remote_dir = "/data/torrents/"
+    share_limits.share_limits_tag = "~share_limit"
+    share_limits.share_limits_custom_tags = []
+    share_limits.min_seeding_time_tag = "MinSeedTimeNotReached"
+    share_limits.min_num_seeds_tag = MIN_SEEDS_TAG
+    share_limits.last_active_tag = "LastActiveLimitNotReached"
+    share_limits.torrent_hash_checked = []
+    share_limits.tdel_dict = {}
+    share_limits.torrents_updated = []
+    share_limits.stats_tagged = 0
+    return share_limits
+
+
+def make_torrent(idx, tags="", num_complete=10):
+    data = {
+        "hash": f"{idx:040x}",
+        "name": f"torrent {idx}",
+        "category": "movies",
+        "tags": tags,
+        "ratio": 0.5,
+        "ratio_limit": -2,
+        "seeding_time": 600,
+        "seeding_time_limit": -2,
+        "up_limit": 0,
+        "num_complete": num_complete,
+        "last_activity": 0,
+        "state": "uploading",
+        "content_path": f"/data/torrents/torrent {idx}",
+    }
+    return TorrentDictionary(data=data, client=None)
+
+
+def test_local_record_reflects_queued_writes():
+    share_limits = make_share_limits(make_queue(FakeWriteClient([])))
+    torrent = make_torrent(1, tags=f"{OLD_TAG}, cross-seed")
+    share_limits.add_tags(torrent, [GROUP_TAG, "cross-seed"])
+    assert torrent.tags == f"{OLD_TAG}, cross-seed, {GROUP_TAG}"
+    share_limits.remove_tags(torrent, OLD_TAG)
+    assert torrent.tags == f"cross-seed, {GROUP_TAG}"
+    share_limits.set_share_limits(torrent, ratio_limit=2.0, seeding_time_limit=1440, inactive_seeding_time_limit=-2)
+    assert (torrent.ratio_limit, torrent.seeding_time_limit, torrent.inactive_seeding_time_limit) == (2.0, 1440, -2)
+    share_limits.set_upload_limit(torrent, 512000)
+    assert torrent.up_limit == 512000
+
+
+def test_group_update_is_sent_in_one_request_per_action_and_value():
+    group_config = {
+        "priority": 1,
+        "add_group_to_tag": True,
+        "custom_tag": None,
+        "max_ratio": 2.0,
+        "max_seeding_time": 1440,
+        "max_last_active": -1,
+        "min_seeding_time": 0,
+        "min_num_seeds": 5,
+        "min_last_active": None,
+        "limit_upload_speed": 500,
+        "enable_group_upload_speed": False,
+        "upload_speed_on_limit_reached": 0,
+        "reset_upload_speed_on_unmet_minimums": False,
+        "resume_torrent_after_change": False,
+        "cleanup": False,
+    }
+    # Torrents without enough seeds get the min seeds tag and no share limits, the others the group's limits
+    torrents = [make_torrent(idx, tags=OLD_TAG if idx % 2 else "", num_complete=1 if idx % 3 == 0 else 10) for idx in range(30)]
+    client = FakeWriteClient([torrent.hash for torrent in torrents])
+    queue = make_queue(client)
+    share_limits = make_share_limits(queue)
+    share_limits.update_share_limits_for_group("noHL", group_config, torrents)
+    assert queue.flush() == set()
+
+    for idx, torrent in enumerate(torrents):
+        state = client.state[torrent.hash]
+        if idx % 3 == 0:
+            assert state["tags"] == {GROUP_TAG, MIN_SEEDS_TAG}
+            assert state["share_limits"] == (-1, -1, -1)
+        else:
+            assert state["tags"] == {GROUP_TAG}
+            assert state["share_limits"] == (2.0, 1440, -2)
+        assert state["upload_limit"] == 500 * 1024
+    # remove_tags, add_tags x2, share_limits x2 and upload_limit, whatever the number of torrents
+    assert Counter(operation for operation, _ in client.requests) == Counter(
+        {"remove_tags": 1, "add_tags": 2, "share_limits": 2, "upload_limit": 1}
+    )
+    for operation in ("add_tags", "share_limits", "upload_limit"):
+        hashes = [t_hash for request_operation, chunk in client.requests if request_operation == operation for t_hash in chunk]
+        assert sorted(hashes) == sorted(torrent.hash for torrent in torrents)
+    assert share_limits.stats_tagged == len(torrents)
@@ -0,0 +1,42 @@
+import itertools
+
+from modules import util
+
+TORRENT_TAGS = ["", "private", "private, noHL", "noHL,private", "MaM, ~share_limit_group1, noHL", "tag1, tag10, ~tag1", " a , b "]
+CHECK_TAGS = ["private", "noHL", "tag1", "~share_limit", "", "a", ["private", "noHL"], ["tag1", "tag10"], ["~", "no"], []]
+
+
+def reference_is_tag_in_torrent(check_tag, torrent_tags, exact=True):
+    """is_tag_in_torrent as it split the torrent tags string with get_list on every call"""
+    tags = [tag.strip() for tag in str(torrent_tags).split(",")] if isinstance(torrent_tags, str) else torrent_tags
+    if isinstance(check_tag, str):
+        if exact:
+            return check_tag in tags
+        return [tag for tag in tags if check_tag in tag]
+    elif isinstance(check_tag, list):
+        if exact:
+            return all(tag in tags for tag in check_tag)
+        return [tag for tag in tags for ctag in check_tag if ctag in tag]
+
+
+def test_matches_splitting_the_tags_on_every_call():
+    for check_tag, torrent_tags, exact in itertools.product(CHECK_TAGS, TORRENT_TAGS, [True, False]):
+        expected = reference_is_tag_in_torrent(check_tag, torrent_tags, exact)
+        # Repeated checks are served from the caches and return the same result
+        for _ in range(2):
+            assert util.is_tag_in_torrent(check_tag, torrent_tags, exact) == expected, (check_tag, torrent_tags, exact)
+        tag_list = util.get_list(torrent_tags)
+        assert util.is_tag_in_torrent(check_tag, tag_list, exact) == expected, (check_tag, tag_list, exact)
+
+
+def test_parse_tags():
+    for torrent_tags in TORRENT_TAGS:
+        assert list(util.parse_tags(torrent_tags)) == util.get_list(torrent_tags)
+        assert util.parse_tag_set(torrent_tags) == set(util.get_list(torrent_tags))
+
+
+def test_unsupported_check_tags_match_nothing():
+    for check_tag, torrent_tags, exact in itertools.product([None, 5, ("private",)], TORRENT_TAGS, [True, False]):
+        assert reference_is_tag_in_torrent(check_tag, torrent_tags, exact) is None
+        assert util.is_tag_in_torrent(check_tag, torrent_tags, exact) is None, (check_tag, torrent_tags, exact)
+        assert util.is_tag_in_torrent(check_tag, util.get_list(torrent_tags), exact) is None, (check_tag, torrent_tags, exact)
@@ -0,0 +1,91 @@
+import itertools
+
+from qbittorrentapi import TorrentDictionary
+
+from modules.qbittorrent import TorrentSnapshot
+from modules.qbittorrent import TorrentSyncStore
+from modules.qbittorrent import get_torrent_state
+
+STATES = ["uploading", "stalledUP", "pausedUP", "stoppedDL", "downloading", "error", "missingFiles", "checkingUP"]
+TAGS = ["", "noHL", "noHL, cross-seed", "cross-seed", "issue, noHL", "tracker.example"]
+
+
+def make_torrent(idx, **fields):
+    data = {
+        "hash": f"{idx:040x}",
+        "name": f"torrent {idx}",
+        "state": STATES[idx % len(STATES)],
+        "category": ["movies", "tv", ""][idx % 3],
+        "tags": TAGS[idx % len(TAGS)],
+        "added_on": (idx * 7919) % 1000,
+    }
+    data.update(fields)
+    return TorrentDictionary(data=data, client=None)
+
+
+def torrents_info(torrent_list, status_filter="all", category=None, torrent_hashes=None, tag=None, sort=None, reverse=False):
+    """Reference torrents/info filtering, as requested from qBittorrent before the snapshot"""
+    status_check = TorrentSyncStore.STATUS_FILTERS[status_filter or "all"]
+    if isinstance(torrent_hashes, str):
+        torrent_hashes = torrent_hashes.split("|")
+    wanted = None if torrent_hashes is None else {t_hash.lower() for t_hash in torrent_hashes}
+    result = []
+    for torrent in torrent_list:
+        if wanted is not None and torrent.hash not in wanted:
+            continue
+        if category is not None and torrent.category != category:
+            continue
+        if tag is not None and tag not in [t.strip() for t in torrent.tags.split(",")]:
+            continue
+        if not status_check(get_torrent_state(torrent.state)):
+            continue
+        result.append(torrent)
+    if sort:
+        result.sort(key=lambda torrent: torrent.get(sort, 0), reverse=bool(reverse))
+    return [torrent.hash for torrent in result]
+
+
+def snapshot_hashes(snapshot, **params):
+    return [torrent.hash for torrent in snapshot.get_torrents(**params)]
+
+
+def test_filters_match_torrents_info():
+    torrent_list = [make_torrent(idx) for idx in range(60)]
+    snapshot = TorrentSnapshot(torrent_list)
+    subset = [torrent.hash for torrent in torrent_list[::4]]
+    for status_filter, category, tag, torrent_hashes in itertools.product(
+        list(TorrentSyncStore.STATUS_FILTERS) + [None],
+        [None, "movies", "tv", ""],
+        [None, "noHL", "cross-seed", "missing"],
+        [None, subset],
+    ):
+        params = {"status_filter": status_filter, "category": category, "tag": tag, "torrent_hashes": torrent_hashes}
+        assert snapshot_hashes(snapshot, **params) == torrents_info(torrent_list, **params)
+    for reverse in (False, True):
+        params = {"sort": "added_on", "reverse": reverse, "category": "tv"}
+        assert snapshot_hashes(snapshot, **params) == torrents_info(torrent_list, **params)
+
+
+def test_requested_hashes_match_case_insensitively():
+    torrent_list = [make_torrent(idx) for idx in range(10)]
+    snapshot = TorrentSnapshot(torrent_list)
+    wanted = [torrent_list[5].hash.upper(), torrent_list[2].hash]
+    assert snapshot_hashes(snapshot, torrent_hashes=wanted) == torrents_info(torrent_list, torrent_hashes=wanted)
+    assert snapshot_hashes(snapshot, torrent_hashes="|".join(wanted)) == [torrent_list[2].hash, torrent_list[5].hash]
+
+
+def test_update_and_remove_keep_indexes_in_sync():
+    torrent_list = [make_torrent(idx) for idx in range(20)]
+    snapshot = TorrentSnapshot(torrent_list)
+    updated = make_torrent(4, category="tv", tags="noHL", state="pausedUP")
+    snapshot.update([updated])
+    snapshot.remove(torrent_list[7].hash)
+    current = [updated if torrent.hash == updated.hash else torrent for torrent in torrent_list if torrent is not torrent_list[7]]
+    for params in ({"category": "tv"}, {"category": "movies"}, {"tag": "noHL"}, {"status_filter": "stopped"}, {}):
+        assert snapshot_hashes(snapshot, **params) == torrents_info(current, **params)
+
+
+def test_supports_tag_filter():
+    assert TorrentSnapshot.supports({"tag": "noHL", "status_filter": "completed"})
+    assert not TorrentSnapshot.supports({"status_filter": "seeding"})
+    assert not TorrentSnapshot.supports({"limit": 10})
@@ -0,0 +1,141 @@
+from modules.qbittorrent import TorrentSyncStore
+from modules.qbittorrent import get_torrent_state
+
+STATES = ["uploading", "stalledUP", "pausedUP", "stoppedDL", "downloading", "error", "missingFiles", "checkingUP"]
+
+
+class FakeSyncClient:
+    """qBittorrent stand-in serving sync/maindata deltas of an in-memory torrent list"""
+
+    def __init__(self, torrents):
+        self.torrents = {t_hash: dict(fields) for t_hash, fields in torrents.items()}
+        self.rid = 1
+        self.history = {}  # rid -> copy of the torrents at that rid
+        self.calls = []
+        self.snapshot()
+
+    def snapshot(self):
+        self.history[self.rid] = {t_hash: dict(fields) for t_hash, fields in self.torrents.items()}
+
+    def change(self, updates=None, removed=()):
+        for t_hash, fields in (updates or {}).items():
+            self.torrents.setdefault(t_hash, {}).update(fields)
+        for t_hash in removed:
+            self.torrents.pop(t_hash, None)
+        self.rid += 1
+        self.snapshot()
+
+    def sync_maindata(self, rid=0):
+        self.calls.append(rid)
+        if rid not in self.history:
+            return {"rid": self.rid, "full_update": True, "torrents": {t: dict(f) for t, f in self.torrents.items()}}
+        previous = self.history[rid]
+        changed = {}
+        for t_hash, fields in self.torrents.items():
+            diff = {key: value for key, value in fields.items() if previous.get(t_hash, {}).get(key) != value}
+            if diff:
+                changed[t_hash] = diff
+        removed = [t_hash for t_hash in previous if t_hash not in self.torrents]
+        return {"rid": self.rid, "torrents": changed, "torrents_removed": removed}
+
+    def torrents_info(self, status_filter="all", category=None, torrent_hashes=None, sort=None, reverse=False):
+        """Reference torrents/info filtering of the full torrent list, as done before the sync store"""
+        status_check = TorrentSyncStore.STATUS_FILTERS[status_filter or "all"]
+        if isinstance(torrent_hashes, str):
+            torrent_hashes = torrent_hashes.split("|")
+        wanted = None if torrent_hashes is None else {t_hash.lower() for t_hash in torrent_hashes}
+        result = []
+        for t_hash, fields in self.torrents.items():
+            if wanted is not None and t_hash not in wanted:
+                continue
+            if category is not None and fields.get("category", "") != category:
+                continue
+            if not status_check(get_torrent_state(fields.get("state"))):
+                continue
+            result.append(t_hash)
+        if sort:
+            result.sort(key=lambda t_hash: self.torrents[t_hash].get(sort, 0), reverse=bool(reverse))
+        return result
+
+
+def make_torrents(count):
+    return {
+        f"{idx:040x}": {
+            "name": f"torrent {idx}",
+            "state": STATES[idx % len(STATES)],
+            "category": ["movies", "tv", ""][idx % 3],
+            "added_on": 1000 - idx,
+        }
+        for idx in range(count)
+    }
+
+
+def hashes(torrent_list):
+    return [torrent.hash for torrent in torrent_list]
+
+
+def assert_matches_torrents_info(store, client, **params):
+    result = store.get_torrents(None, **params)
+    expected = client.torrents_info(**params)
+    if params.get("sort"):
+        assert hashes(result) == expected
+    else:
+        assert sorted(hashes(result)) == sorted(expected)
+
+
+def test_first_sync_is_a_full_update():
+    client = FakeSyncClient(make_torrents(12))
+    store = TorrentSyncStore()
+    store.sync(client)
+    assert client.calls == [0]
+    assert store.rid == client.rid
+    assert set(store.torrents) == set(client.torrents)
+
+
+def test_deltas_match_torrents_info():
+    client = FakeSyncClient(make_torrents(30))
+    store = TorrentSyncStore()
+    store.sync(client)
+    client.change(
+        updates={
+            f"{1:040x}": {"state": "pausedUP"},
+            f"{2:040x}": {"category": "tv"},
+            f"{99:040x}": {"name": "new", "state": "downloading", "category": "movies", "added_on": 5},
+        },
+        removed=[f"{3:040x}", f"{4:040x}"],
+    )
+    store.sync(client)
+    assert client.calls == [0, client.rid - 1]
+    for status_filter in TorrentSyncStore.STATUS_FILTERS:
+        for category in (None, "movies", "tv", ""):
+            assert_matches_torrents_info(store, client, status_filter=status_filter, category=category)
+    assert_matches_torrents_info(store, client, sort="added_on")
+    assert_matches_torrents_info(store, client, sort="added_on", reverse=True, status_filter="completed")
+
+
+def test_requested_hashes_match_case_insensitively():
+    client = FakeSyncClient(make_torrents(5))
+    store = TorrentSyncStore()
+    store.sync(client)
+    wanted = [f"{1:040x}".upper(), f"{2:040x}", "0" * 39 + "z"]
+    assert_matches_torrents_info(store, client, torrent_hashes=wanted)
+    assert_matches_torrents_info(store, client, torrent_hashes="|".join(wanted))
+    assert hashes(store.get_torrents(None, torrent_hashes=wanted)) == [f"{1:040x}", f"{2:040x}"]
+
+
+def test_full_update_replaces_the_mirror():
+    client = FakeSyncClient(make_torrents(5))
+    store = TorrentSyncStore()
+    store.sync(client)
+    client.change(removed=[f"{0:040x}"])
+    client.history.clear()  # qBittorrent restarted, the stored rid is unknown
+    store.sync(client)
+    assert set(store.torrents) == set(client.torrents)
+
+
+def test_supports_only_local_filters():
+    store = TorrentSyncStore()
+    assert store.supports({"sort": "added_on"})
+    assert store.supports({"status_filter": "completed", "category": "tv"})
+    assert not store.supports({"status_filter": "seeding"})
+    assert not store.supports({"tag": "x"})
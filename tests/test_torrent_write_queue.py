@@ -0,0 +1,203 @@
+import random
+from types import SimpleNamespace
+
+from qbittorrentapi import Conflict409Error
+from qbittorrentapi import TorrentDictionary
+
+from modules.qbittorrent import Qbt
+from modules.qbittorrent import TorrentWriteQueue
+
+TAGS = ["noHL", "issue", "cross-seed", "tracker.example"]
+CATEGORIES = ["movies", "tv", "new"]
+OPERATIONS = [
+    "add_tags",
+    "remove_tags",
+    "set_category",
+    "set_auto_management",
+    "set_share_limits",
+    "set_upload_limit",
+    "resume",
+    "recheck",
+]
+
+
+class FakeWriteClient:
+    """Records multi-hash writes and applies them to per-torrent state"""
+
+    def __init__(self, hashes, categories=("movies", "tv")):
+        self.state = {t_hash: new_state() for t_hash in hashes}
+        self.categories = set(categories)
+        self.requests = []
+        self.torrent_categories = SimpleNamespace(create_category=self.create_category)
+
+    def record(self, operation, hashes):
+        assert len(hashes) <= TorrentWriteQueue.CHUNK_SIZE
+        self.requests.append((operation, list(hashes)))
+
+    def create_category(self, name, save_path):
+        self.categories.add(name)
+
+    def torrents_set_category(self, category, torrent_hashes):
+        if category not in self.categories:
+            raise Conflict409Error()
+        self.record("category", torrent_hashes)
+        for t_hash in torrent_hashes:
+            self.state[t_hash]["category"] = category
+
+    def torrents_set_auto_management(self, enable, torrent_hashes):
+        self.record("auto_management", torrent_hashes)
+        for t_hash in torrent_hashes:
+            self.state[t_hash]["auto_tmm"] = enable
+
+    def torrents_add_tags(self, tags, torrent_hashes):
+        self.record("add_tags", torrent_hashes)
+        for t_hash in torrent_hashes:
+            self.state[t_hash]["tags"].update(tags)
+
+    def torrents_remove_tags(self, tags, torrent_hashes):
+        self.record("remove_tags", torrent_hashes)
+        for t_hash in torrent_hashes:
+            self.state[t_hash]["tags"].difference_update(tags)
+
+    def torrents_set_share_limits(self, ratio_limit, seeding_time_limit, inactive_seeding_time_limit, torrent_hashes):
+        self.record("share_limits", torrent_hashes)
+        for t_hash in torrent_hashes:
+            self.state[t_hash]["share_limits"] = (ratio_limit, seeding_time_limit, inactive_seeding_time_limit)
+
+    def torrents_set_upload_limit(self, limit, torrent_hashes):
+        self.record("upload_limit", torrent_hashes)
+        for t_hash in torrent_hashes:
+            self.state[t_hash]["upload_limit"] = limit
+
+    def torrents_start(self, torrent_hashes):
+        self.record("resume", torrent_hashes)
+        for t_hash in torrent_hashes:
+            self.state[t_hash]["resumed"] = True
+
+    def torrents_recheck(self, torrent_hashes):
+        self.record("recheck", torrent_hashes)
+        for t_hash in torrent_hashes:
+            self.state[t_hash]["rechecked"] = True
+
+
+def new_state():
+    return {
+        "category": "",
+        "auto_tmm": False,
+        "tags": set(),
+        "share_limits": None,
+        "upload_limit": None,
+        "resumed": False,
+        "rechecked": False,
+    }
+
+
+def apply_directly(state, operation, args):
+    """Reference: the per-torrent write each queued operation replaces"""
+    if operation == "add_tags":
+        state["tags"].update(args[0])
+    elif operation == "remove_tags":
+        state["tags"].difference_update(args[0])
+    elif operation == "set_category":
+        state["category"] = args[0]
+    elif operation == "set_auto_management":
+        state["auto_tmm"] = args[0]
+    elif operation == "set_share_limits":
+        state["share_limits"] = args
+    elif operation == "set_upload_limit":
+        state["upload_limit"] = args[0]
+    elif operation == "resume":
+        state["resumed"] = True
+    elif operation == "recheck":
+        state["rechecked"] = True
+
+
+def random_operation(rng):
+    operation = rng.choice(OPERATIONS)
+    if operation in ("add_tags", "remove_tags"):
+        return operation, (rng.sample(TAGS, rng.randint(1, 2)),)
+    if operation == "set_category":
+        return operation, (rng.choice(CATEGORIES),)
+    if operation == "set_auto_management":
+        return operation, (rng.random() < 0.5,)
+    if operation == "set_share_limits":
+        return operation, (rng.choice([-2, -1, 2.0]), rng.choice([-2, 60]), rng.choice([-2, 30]))
+    if operation == "set_upload_limit":
+        return operation, (rng.choice([-1, 1024, 2048]),)
+    return operation, ()
+
+
+def make_queue(client):
+    config = SimpleNamespace(loglevel="INFO", notify=lambda *args, **kwargs: None)
+    qbt = Qbt.__new__(Qbt)
+    qbt.config = config
+    qbt.client = client
+    qbt.max_concurrent_requests = 4
+    return TorrentWriteQueue(qbt)
+
+
+def make_torrent(t_hash):
+    return TorrentDictionary(data={"hash": t_hash, "save_path": "/data/new"}, client=None)
+
+
+def test_flush_matches_per_torrent_writes():
+    rng = random.Random(1)
+    hashes = [f"{idx:040x}" for idx in range(40)]
+    client = FakeWriteClient(hashes)
+    queue = make_queue(client)
+    expected = {t_hash: new_state() for t_hash in hashes}
+    for _ in range(600):
+        t_hash = rng.choice(hashes)
+        operation, args = random_operation(rng)
+        getattr(queue, operation)(make_torrent(t_hash), *args)
+        apply_directly(expected[t_hash], operation, args)
+    assert queue.flush() == set()
+    assert client.state == expected
+    assert len(queue) == 0
+    # One request per distinct (operation, value) instead of one per torrent write
+    assert len(client.requests) < 600 // 3
+
+
+def test_add_then_remove_of_the_same_tag_cancels_out():
+    client = FakeWriteClient(["a" * 40])
+    queue = make_queue(client)
+    torrent = make_torrent("a" * 40)
+    queue.add_tags(torrent, "noHL")
+    queue.remove_tags(torrent, ["noHL"])
+    queue.flush()
+    assert client.state[torrent.hash]["tags"] == set()
+    assert [operation for operation, _ in client.requests] == ["remove_tags"]
+
+
+def test_hashes_are_sent_in_chunks():
+    hashes = [f"{idx:040x}" for idx in range(TorrentWriteQueue.CHUNK_SIZE * 2 + 10)]
+    client = FakeWriteClient(hashes)
+    queue = make_queue(client)
+    for t_hash in hashes:
+        queue.add_tags(make_torrent(t_hash), "noHL")
+    queue.flush()
+    assert sorted(len(chunk) for _, chunk in client.requests) == [10, TorrentWriteQueue.CHUNK_SIZE, TorrentWriteQueue.CHUNK_SIZE]
+    assert all(state["tags"] == {"noHL"} for state in client.state.values())
+
+
+def test_missing_category_is_created():
+    client = FakeWriteClient(["a" * 40], categories=())
+    queue = make_queue(client)
+    queue.set_category(make_torrent("a" * 40), "new")
+    assert queue.flush() == set()
+    assert client.categories == {"new"}
+    assert client.state["a" * 40]["category"] == "new"
+
+
+def test_failed_writes_return_their_hashes():
+    client = FakeWriteClient(["a" * 40, "b" * 40])
+
+    def fail(tags, torrent_hashes):
+        raise ConnectionError("qBittorrent is unavailable")
+
+    client.torrents_add_tags = fail
+    queue = make_queue(client)
+    queue.add_tags(make_torrent("a" * 40), "noHL")
+    queue.set_upload_limit(make_torrent("b" * 40), 1024)
+    assert queue.flush() == {"a" * 40}
+    assert client.state["b" * 40]["upload_limit"] == 1024
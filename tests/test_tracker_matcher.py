@@ -0,0 +1,50 @@
+import itertools
+import random
+
+from modules.qbittorrent import TrackerMatcher
+
+KEYWORDS = ["tracker.example.org", "example", "torrentleech", "tleechreload", "animebytes.tv", "bt", "https://bt.", "passkey=abc"]
+URLS = [
+    "https://tracker.example.org:443/announce/passkey=abc",
+    "https://bt.example.com/announce",
+    "udp://open.tracker.net:1337/announce",
+    "https://tracker.torrentleech.org/a/1234/announce",
+    "https://tracker.tleechreload.org/a/1234/announce",
+    "https://animebytes.tv/announce/xyz",
+    "http://btbtbt.net/announce",
+    "",
+]
+
+
+def reference_match(keywords, urls):
+    """The first keyword in config order contained in an announce URL, as Qbt.get_tags looped over the tracker config"""
+    for keyword in keywords:
+        for url in urls:
+            if keyword in url:
+                return keyword, url
+    return None, None
+
+
+def test_matches_looping_over_every_keyword():
+    rng = random.Random(5)
+    for _ in range(200):
+        keywords = rng.sample(KEYWORDS, rng.randint(0, len(KEYWORDS)))
+        matcher = TrackerMatcher(keywords)
+        for url in URLS:
+            expected = next((index for index, keyword in enumerate(keywords) if keyword in url), None)
+            # The second lookup is served from the per URL cache
+            assert matcher.match_url(url) == expected == matcher.match_url(url), (keywords, url)
+        for count in range(3):
+            for urls in itertools.permutations(URLS, count):
+                assert matcher.match(urls) == reference_match(keywords, urls), (keywords, urls)
+
+
+def test_added_keywords_come_after_the_existing_ones():
+    matcher = TrackerMatcher(["bt"])
+    url = "https://bt.example.com/announce"
+    assert matcher.match([url]) == ("bt", url)
+    matcher.add("example")
+    matcher.add("bt")
+    assert matcher.keywords == ["bt", "example"]
+    assert matcher.match(["https://example.com/announce", url]) == ("bt", url)
+    assert TrackerMatcher().match([url]) == (None, None)
@@ -0,0 +1,180 @@
+import os
+import shutil
+
+import pytest
+
+from modules import util
+
+LAYOUT = [
+    "Movie (2020)/movie.mkv",
+    "Movie (2020)/Subs/en.srt",
+    "Show/S01/e01.mkv",
+    "Show/S01/e02.mkv",
+    "Show/S02/e01.mkv",
+    "Show/.hidden",
+    "deep/a/b/c/d/e/file.bin",
+    "loose.txt",
+]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "root"
+    for path in LAYOUT:
+        full_path = root / path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(path)
+    (root / "empty").mkdir()
+    # Symlinks to directories are neither listed nor descended, symlinks to files are listed like os.walk does
+    os.symlink(root / "Show", root / "linked show")
+    os.symlink(root / "loose.txt", root / "linked file.txt")
+    return root
+
+
+def os_walk_listing(base, skip=None):
+    listing = {}
+    for dir_path, dirs, files in os.walk(base):
+        dirs[:] = [name for name in dirs if not (skip and skip(os.path.join(dir_path, name)))]
+        listing[dir_path] = sorted(files)
+    return listing
+
+
+def walk_listing(walker):
+    listing = {}
+    for path, files in walker:
+        assert path not in listing
+        listing[path] = sorted(files)
+    return listing
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_matches_os_walk(tree, workers):
+    assert walk_listing(util.walk_tree(str(tree), workers)) == os_walk_listing(str(tree))
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_skip_prunes_subtrees(tree, workers):
+    def skip(path):
+        return os.path.basename(path) in ("Show", "c")
+
+    listing = walk_listing(util.walk_tree(str(tree), workers, skip=skip))
+    assert listing == os_walk_listing(str(tree), skip)
+    assert str(tree / "Show" / "S01") not in listing
+    assert walk_listing(util.walk_tree(str(tree), workers, skip=lambda path: path == str(tree))) == {}
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_unreadable_directories_are_skipped(tree, workers):
+    def lister(path):
+        if os.path.basename(path) == "S01":
+            raise PermissionError(13, "Permission denied", path)
+        return util.list_directory(path)
+
+    listing = walk_listing(util.walk_tree(str(tree), workers, lister))
+    expected = os_walk_listing(str(tree))
+    del expected[str(tree / "Show" / "S01")]
+    assert listing == expected
+
+
+class CountingLister:
+    def __init__(self, lister=util.list_directory):
+        self.lister = lister
+        self.listed = []
+
+    def __call__(self, path):
+        self.listed.append(path)
+        return self.lister(path)
+
+
+def test_inventory_walks_each_tree_once(tree):
+    inventory = util.FileSystemInventory(4)
+    lister = CountingLister()
+    assert walk_listing(inventory.walk(str(tree), lister)) == os_walk_listing(str(tree))
+    walked = len(lister.listed)
+    # Later walks of the tree or of a directory below it are served from the first walk
+    assert walk_listing(inventory.walk(str(tree), lister)) == os_walk_listing(str(tree))
+    assert walk_listing(inventory.walk(str(tree / "Show"), lister)) == os_walk_listing(str(tree / "Show"))
+    assert len(lister.listed) == walked
+    # Moving or deleting files clears the inventory
+    (tree / "Show" / "S02" / "e02.mkv").write_text("e02")
+    inventory.clear()
+    assert walk_listing(inventory.walk(str(tree), lister)) == os_walk_listing(str(tree))
+    assert len(lister.listed) == walked * 2
+
+
+def test_inventory_stat_follows_symlinks(tree):
+    inventory = util.FileSystemInventory()
+    link = str(tree / "linked file.txt")
+    assert inventory.stat(link) == os.stat(link)
+    assert inventory.stat(link).st_ino == os.stat(tree / "loose.txt").st_ino
+    # Results are cached until the inventory is cleared
+    os.remove(tree / "loose.txt")
+    assert inventory.stat(link).st_size == len("loose.txt")
+    inventory.clear()
+    with pytest.raises(FileNotFoundError):
+        inventory.stat(link)
+
+
+def test_inventory_lstat_does_not_follow_symlinks(tree):
+    inventory = util.FileSystemInventory()
+    link, target = str(tree / "linked file.txt"), str(tree / "loose.txt")
+    assert inventory.lstat(link) == os.lstat(link)
+    assert inventory.lstat(link).st_ino != os.stat(target).st_ino
+    # The lstat result of a regular file serves its stat as well
+    target_stat = inventory.lstat(target)
+    assert inventory.stat(target) is target_stat
+    assert inventory.stat(link) != inventory.lstat(link)
+
+
+def test_inventory_walk_prunes_skipped_subtrees(tree):
+    def skip(path):
+        return os.path.basename(path) == "Show"
+
+    inventory = util.FileSystemInventory(4)
+    lister = CountingLister()
+    # A pruned walk does not descend into the skipped subtree but is kept for later walks
+    assert walk_listing(inventory.walk(str(tree), lister, skip)) == os_walk_listing(str(tree), skip)
+    assert not any(path.startswith(str(tree / "Show")) for path in lister.listed)
+    assert inventory.find_tree(str(tree)) is not None
+    listed = len(lister.listed)
+    # Later pruned walks are filtered from it, full walks only list the pruned subtree
+    assert walk_listing(inventory.walk(str(tree), lister, skip)) == os_walk_listing(str(tree), skip)
+    assert walk_listing(inventory.walk(str(tree / "Show" / "S01"), lister)) == os_walk_listing(str(tree / "Show" / "S01"))
+    assert walk_listing(inventory.walk(str(tree), lister)) == os_walk_listing(str(tree))
+    assert len(lister.listed) == listed
+
+
+def test_inventory_invalidate_lists_only_the_changed_directories(tree, monkeypatch):
+    inventory = util.FileSystemInventory(4)
+    walk_listing(inventory.walk(str(tree)))
+    inventory.stat(str(tree / "Show" / "S01" / "e01.mkv"))
+    # A moved file, a file in a new directory and a deleted subtree
+    os.rename(tree / "Show" / "S01" / "e01.mkv", tree / "e01.mkv")
+    (tree / "Movie (2020)" / "Extras" / "Deleted").mkdir(parents=True)
+    (tree / "Movie (2020)" / "Extras" / "Deleted" / "scene.mkv").write_text("scene")
+    shutil.rmtree(tree / "deep" / "a" / "b" / "c")
+    inventory.invalidate(
+        [
+            str(tree / "Show" / "S01" / "e01.mkv"),
+            str(tree / "e01.mkv"),
+            str(tree / "Movie (2020)" / "Extras" / "Deleted" / "scene.mkv"),
+            str(tree / "deep" / "a" / "b" / "c" / "d" / "e" / "file.bin"),
+            str(tree / "deep" / "a" / "b" / "c"),
+        ]
+    )
+    with pytest.raises(FileNotFoundError):
+        inventory.stat(str(tree / "Show" / "S01" / "e01.mkv"))
+    lister = CountingLister()
+    monkeypatch.setattr(util, "list_directory", lister)
+    assert walk_listing(inventory.walk(str(tree))) == os_walk_listing(str(tree))
+    assert sorted(lister.listed) == sorted(
+        [
+            str(tree),
+            str(tree / "Show" / "S01"),
+            str(tree / "Movie (2020)"),
+            str(tree / "Movie (2020)" / "Extras"),
+            str(tree / "Movie (2020)" / "Extras" / "Deleted"),
+            str(tree / "deep" / "a" / "b"),
+            str(tree / "deep" / "a" / "b" / "c" / "d" / "e"),
+        ]
+    )
@@ -135,6 +135,30 @@ export const settingsSchema = {
             description: 'Minimum age in minutes to protect newly added torrents from removal when a tracker reports unregistered. Set to 0 to disable.',
             default: 10,
             min: 0
+        },
+        {
+            name: 'max_concurrent_api_requests',
+            type: 'number',
+            label: 'Max Concurrent API Requests',
+            description: 'Maximum number of requests sent to qBittorrent at the same time when fetching torrent details and applying changes.',
+            default: 8,
+            min: 1
+        },
+        {
+            name: 'max_concurrent_dir_scans',
+            type: 'number',
+            label: 'Max Concurrent Directory Scans',
+            description: 'Maximum number of directories listed at the same time when scanning the root, orphaned and recycle bin directories, and files expired at the same time during cleanup. Set to 1 to scan sequentially.',
+            default: 8,
+            min: 1
+        },
+        {
+            name: 'max_concurrent_file_operations',
+            type: 'number',
+            label: 'Max Concurrent File Operations',
+            description: 'Maximum number of files moved or deleted at the same time for the recycle bin and orphaned data. Set to 1 to move files one at a time.',
+            default: 8,
+            min: 1
         }
     ]
 };